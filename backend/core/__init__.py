@@ -1,12 +1,50 @@
 # 核心算法模块
-from .meihua import MeihuaCalculator
-from .bazi import BaziCalculator
-from .fengshui import FengshuiCalculator
-from .crawler import ContextCrawler
+#
+# 子模块按需导入 (PEP 562)，`import core` 不会加载 lunar_python、
+# duckduckgo_search、NumPy 等较重的依赖；需要预热时调用 warmup()
+from importlib import import_module
+
+_EXPORTS = {
+    "MeihuaCalculator": ".meihua",
+    "BaziCalculator": ".bazi",
+    "FengshuiCalculator": ".fengshui",
+    "ContextCrawler": ".crawler",
+}
 
 __all__ = [
     "MeihuaCalculator",
     "BaziCalculator",
     "FengshuiCalculator",
     "ContextCrawler",
+    "warmup",
 ]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def warmup():
+    """
+    预先加载延迟导入的依赖与查找表
+
+    在服务启动后调用，可把首个请求的冷启动开销提前到启动阶段
+    """
+    from .bazi import _solar_class
+    from .bazi_engine import _numpy_tables
+    from .crawler import _load_ddgs
+    from .fengshui import _flying_stars_by_year, _ming_gua_tables, _recommendation_table
+    from .meihua import _outcome_table
+
+    _solar_class()
+    _load_ddgs()
+    _numpy_tables()
+    _outcome_table()
+    _ming_gua_tables()
+    _flying_stars_by_year()
+    _recommendation_table()
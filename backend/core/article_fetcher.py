@@ -0,0 +1,367 @@
+"""
+外应正文抓取 (Article Fetcher)
+
+搜索结果只有百字左右的摘要，开启后对排名靠前的结果页并发抓取正文:
+- 共享一个有连接数上限的 httpx.AsyncClient (连接池复用，首次使用时创建)
+- 流式读取响应，边下载边用 HTMLParser 增量解析，提取到足够正文即停止下载
+- 单页超过字节上限或单页超时即丢弃
+- 整体截止时间一到立即返回: 已完成的页面返回完整正文，
+  仍在下载的页面返回目前已提取的部分正文 (complete=False)
+- 搜索结果中的地址不可信: 首个地址与重定向目标 (手动跟随，最多 MAX_REDIRECTS 次)
+  都须为 http/https; 每次建立连接时解析主机并要求全部地址为公网地址，
+  直接连接检查过的地址 (不再二次解析，DNS 重绑定无法绕过)
+
+正文提取为轻量启发式: 跳过 script / style / nav / footer 等区块，
+只保留长度不小于 MIN_BLOCK_CHARS 的文本块 (过滤菜单、链接列表等短文本)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import ipaddress
+import os
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+
+# 单页字节上限、单页超时 (秒)、整体截止时间 (秒)、并发连接数、每页最多提取字数 (支持环境变量覆盖)
+DEFAULT_MAX_BYTES = int(os.getenv("CRAWLER_FETCH_MAX_BYTES", str(512 * 1024)))
+DEFAULT_PAGE_TIMEOUT = float(os.getenv("CRAWLER_FETCH_TIMEOUT", "3"))
+DEFAULT_DEADLINE = float(os.getenv("CRAWLER_FETCH_DEADLINE", "4"))
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("CRAWLER_FETCH_CONNECTIONS", "8"))
+DEFAULT_MAX_CHARS = int(os.getenv("CRAWLER_FETCH_MAX_CHARS", "800"))
+
+# 最多跟随的重定向次数
+MAX_REDIRECTS = 5
+
+# 正文文本块的最短长度
+MIN_BLOCK_CHARS = 20
+
+# 不含正文的标签 (其中的文本全部跳过)
+SKIP_TAGS = frozenset((
+    "script", "style", "noscript", "template", "svg", "iframe", "head",
+    "nav", "header", "footer", "aside", "form", "button", "select", "textarea",
+))
+
+# 块级标签 (开始或结束时切分文本块)
+BLOCK_TAGS = frozenset((
+    "p", "div", "article", "section", "main", "br", "li", "ul", "ol", "table", "tr", "td",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "figcaption", "dd", "dt",
+))
+
+# 未声明编码时在页面开头查找 <meta charset>
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w-]+)""", re.IGNORECASE)
+
+# 编码别名 (GB2312 / GBK 页面统一按超集 GB18030 解码)
+_CHARSET_ALIASES = {"gb2312": "gb18030", "gbk": "gb18030", "x-gbk": "gb18030"}
+
+USER_AGENT = "Mozilla/5.0 (compatible; CyberGua/1.0)"
+
+
+class TextExtractor(HTMLParser):
+    """增量正文提取器: 可多次 feed，随时读取已提取的正文"""
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.blocks: list[str] = []
+        self.chars = 0
+        self._skip_depth = 0
+        self._buffer: list[str] = []
+
+    @property
+    def done(self) -> bool:
+        """已提取到足够的正文"""
+        return self.chars >= self.max_chars
+
+    @property
+    def text(self) -> str:
+        """已提取的正文 (不超过 max_chars 字)"""
+        return "\n".join(self.blocks)[:self.max_chars]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip_depth and not self.done:
+            self._buffer.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        """结束当前文本块，足够长的块计入正文"""
+        if not self._buffer:
+            return
+        block = " ".join("".join(self._buffer).split())
+        self._buffer.clear()
+        if len(block) >= MIN_BLOCK_CHARS and not self.done:
+            self.blocks.append(block)
+            self.chars += len(block)
+
+
+@dataclass
+class ArticleText:
+    """单页抓取结果"""
+    url: str
+    text: str                     # 提取的正文 (失败时为空)
+    complete: bool                # 页面是否完整处理 (截止时间到达时为 False)
+    error: Optional[str] = None
+
+
+def _charset(content_type: str, head: bytes) -> str:
+    """由 Content-Type 或页面开头的 <meta charset> 确定编码 (默认 UTF-8)"""
+    match = re.search(r"charset\s*=\s*[\"']?([\w-]+)", content_type, re.IGNORECASE)
+    name = match.group(1) if match else None
+    if name is None:
+        meta = _META_CHARSET_RE.search(head)
+        name = meta.group(1).decode("ascii") if meta else "utf-8"
+    name = _CHARSET_ALIASES.get(name.lower(), name.lower())
+    try:
+        codecs.lookup(name)
+    except LookupError:
+        name = "utf-8"
+    return name
+
+
+async def _public_address(host: str) -> str:
+    """
+    解析主机并返回可连接的地址
+
+    Raises:
+        ValueError: 解析出的地址中有任一非公网地址 (内网、本机、链路本地等)
+    """
+    try:
+        addresses = [ipaddress.ip_address(host)]
+    except ValueError:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None)
+        addresses = [ipaddress.ip_address(info[4][0]) for info in infos]
+    if not addresses or not all(address.is_global for address in addresses):
+        raise ValueError(f"non-public address: {host}")
+    return str(addresses[0])
+
+
+class _PublicNetworkBackend:
+    """
+    httpcore 网络后端: 建立 TCP 连接前检查主机只解析到公网地址，并直接连接该地址
+
+    TLS 的 SNI 与证书校验仍使用原主机名 (由 httpcore 在 start_tls 时传入)
+    """
+
+    def __init__(self):
+        import httpcore
+
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        address = await _public_address(host)
+        return await self._backend.connect_tcp(
+            address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise ValueError("unix sockets are not allowed")
+
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+
+class ArticleFetcher:
+    """并发正文抓取器 (在单个事件循环内使用)"""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        page_timeout: float = DEFAULT_PAGE_TIMEOUT,
+        deadline: float = DEFAULT_DEADLINE,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_chars: int = DEFAULT_MAX_CHARS,
+        allow_private_addresses: bool = False,
+    ):
+        """
+        Args:
+            max_bytes: 单页字节上限 (超过即丢弃)
+            page_timeout: 单页超时 (秒，超过即丢弃)
+            deadline: fetch_all 的默认整体截止时间 (秒)
+            max_connections: 连接池最大连接数 (即最大并发抓取数)
+            max_chars: 每页最多提取字数 (提取到即停止下载)
+            allow_private_addresses: 允许抓取 (或重定向到) 内网、本机地址 (仅用于本地测试)
+        """
+        self.max_bytes = max_bytes
+        self.page_timeout = page_timeout
+        self.deadline = deadline
+        self.max_connections = max_connections
+        self.max_chars = max_chars
+        self.allow_private_addresses = allow_private_addresses
+        self._client: Optional[httpx.AsyncClient] = None
+        self.fetched = 0     # 完整处理的页面数
+        self.partial = 0     # 截止时间到达时返回部分正文的页面数
+        self.dropped = 0     # 超限、超时或出错而丢弃的页面数
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取 (必要时创建) 共享的 HTTP 客户端"""
+        if self._client is None:
+            import httpx
+
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            )
+            transport = None
+            if not self.allow_private_addresses:
+                import httpcore
+
+                # 替换默认连接池的网络后端 (不读取代理环境变量: 连接须直达检查过的地址)
+                transport = httpx.AsyncHTTPTransport(limits=limits, trust_env=False)
+                transport._pool = httpcore.AsyncConnectionPool(
+                    ssl_context=httpx.create_ssl_context(trust_env=False),
+                    max_connections=limits.max_connections,
+                    max_keepalive_connections=limits.max_keepalive_connections,
+                    keepalive_expiry=limits.keepalive_expiry,
+                    network_backend=_PublicNetworkBackend(),
+                )
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.page_timeout),
+                limits=limits,
+                transport=transport,
+                trust_env=transport is None,
+                follow_redirects=False,  # 由 _fetch 逐跳检查后跟随
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+            )
+        return self._client
+
+    async def aclose(self):
+        """关闭 HTTP 客户端"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def info(self) -> dict:
+        """抓取统计"""
+        return {
+            "max_connections": self.max_connections,
+            "fetched": self.fetched,
+            "partial": self.partial,
+            "dropped": self.dropped,
+        }
+
+    def _check_url(self, url) -> httpx.URL:
+        """地址须为 http/https (是否为公网地址在建立连接时检查)，否则抛出 ValueError"""
+        import httpx
+
+        url = httpx.URL(url)
+        if url.scheme not in ("http", "https") or not url.host:
+            raise ValueError(f"unsupported url: {url}")
+        return url
+
+    async def _fetch(self, url: str, extractor: TextExtractor):
+        """下载并增量解析单个页面 (正文写入 extractor)"""
+        client = self._get_client()
+        url = self._check_url(url)
+        for _ in range(MAX_REDIRECTS + 1):
+            async with client.stream("GET", url) as response:
+                if response.is_redirect:
+                    url = self._check_url(response.url.join(response.headers.get("location", "")))
+                    continue
+                await self._read(response, extractor)
+                return
+        raise ValueError(f"more than {MAX_REDIRECTS} redirects")
+
+    async def _read(self, response: httpx.Response, extractor: TextExtractor):
+        """流式读取响应并增量解析"""
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if content_type and "html" not in content_type:
+            raise ValueError(f"not an HTML page: {content_type}")
+        length = response.headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            raise ValueError(f"page larger than {self.max_bytes} bytes")
+
+        decoder = None
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > self.max_bytes:
+                raise ValueError(f"page larger than {self.max_bytes} bytes")
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(_charset(content_type, chunk))("replace")
+            extractor.feed(decoder.decode(chunk))
+            if extractor.done:
+                break  # 正文已足够，不再下载剩余部分
+        if decoder is not None:
+            extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+
+    async def _fetch_page(self, url: str, extractor: TextExtractor) -> ArticleText:
+        """抓取单个页面，失败或超限时丢弃"""
+        try:
+            await asyncio.wait_for(self._fetch(url, extractor), timeout=self.page_timeout)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            return ArticleText(url=url, text="", complete=True, error="page timed out")
+        except Exception as e:
+            self.dropped += 1
+            error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            return ArticleText(url=url, text="", complete=True, error=error)
+        self.fetched += 1
+        return ArticleText(url=url, text=extractor.text, complete=True)
+
+    async def fetch_all(
+        self, urls: list[str], deadline: Optional[float] = None
+    ) -> list[ArticleText]:
+        """
+        并发抓取多个页面的正文
+
+        Args:
+            urls: 页面地址 (非 http/https 地址直接跳过)
+            deadline: 整体截止时间 (秒)，默认使用 self.deadline
+
+        Returns:
+            与 urls 一一对应的结果; 截止时间到达时仍在下载的页面返回已提取的部分正文
+        """
+        deadline = self.deadline if deadline is None else deadline
+        extractors = [TextExtractor(self.max_chars) for _ in urls]
+        tasks = {}
+        for i, url in enumerate(urls):
+            if url.startswith(("http://", "https://")):
+                tasks[i] = asyncio.ensure_future(self._fetch_page(url, extractors[i]))
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=max(deadline, 0))
+
+        results = []
+        for i, url in enumerate(urls):
+            task = tasks.get(i)
+            if task is None:
+                results.append(ArticleText(url=url, text="", complete=True, error="unsupported url"))
+            elif task.done():
+                results.append(task.result())
+            else:
+                task.cancel()
+                extractors[i]._flush()
+                text = extractors[i].text
+                if text:
+                    self.partial += 1
+                else:
+                    self.dropped += 1
+                results.append(ArticleText(url=url, text=text, complete=False, error="deadline exceeded"))
+        return results
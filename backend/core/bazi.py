@@ -4,24 +4,46 @@
 使用 lunar_python 库进行:
 - 阳历转农历
 - 计算四柱 (年柱、月柱、日柱、时柱)
-- 分析日主强弱
+  (1900-2100 年优先查预计算索引，见 bazi_index.py)
+- 分析日主强弱 (整数编码查表，见 bazi_engine.py)
 - 判断喜用神
+- 排大运、流年 (惰性生成，见 bazi_luck.py)
+- 合婚评分与候选检索 (见 hehun.py)
+
+lunar_python 与 NumPy 均在首次需要时才导入，模块本身导入开销很小
 """
 
+from __future__ import annotations
+
+import os
 from dataclasses import dataclass
-from typing import Literal, Optional
+from typing import TYPE_CHECKING, Hashable, Literal, Optional
+
+from .bazi_engine import ELEMENTS, JIAZI, TEN_GOD_NAMES, score_chart
+from .bazi_luck import LuckTimeline
+from .bazi_index import DEFAULT_INDEX_PATH, BaziIndex, hour_to_slot
+from .cache import LRUCache
+
+if TYPE_CHECKING:
+    from .bazi_batch import CohortResult
+    from .hehun import CompatibilityIndex, CompatibilityResult
+
 
-try:
-    from lunar_python import Lunar, Solar
-except ImportError:
-    raise ImportError("请安装 lunar_python: pip install lunar_python")
+def _solar_class():
+    """延迟导入 lunar_python.Solar (约 100ms，仅在索引未覆盖时需要)"""
+    try:
+        from lunar_python import Solar
+    except ImportError:
+        raise ImportError("请安装 lunar_python: pip install lunar_python")
+    return Solar
 
 
-# 天干
-TIANGAN = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+# 排盘结果缓存容量 (支持环境变量覆盖，0 表示禁用)
+DEFAULT_CACHE_SIZE = int(os.getenv("BAZI_CACHE_SIZE", "4096"))
 
-# 地支
-DIZHI = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+
+# 六十甲子 (序号 0-59)
+JIAZI_INDEX = {name: i for i, name in enumerate(JIAZI)}
 
 # 天干五行
 TIANGAN_WUXING = {
@@ -58,10 +80,6 @@ DIZHI_CANGGAN = {
     "亥": ["壬", "甲"],
 }
 
-# 五行相生相克
-WUXING_SHENG = {"木": "火", "火": "土", "土": "金", "金": "水", "水": "木"}
-WUXING_KE = {"木": "土", "土": "水", "水": "火", "火": "金", "金": "木"}
-
 
 @dataclass
 class Pillar:
@@ -86,13 +104,60 @@ class BaziResult:
     favorable_elements: list[str]  # 喜用神 (五行)
     unfavorable_elements: list[str]  # 忌神 (五行)
     analysis: str          # 分析文字
+    wuxing_scores: dict[str, float]  # 五行分值 (天干 + 藏干加权 + 月令加权)
+    ten_gods: dict[str, str]  # 年干、月干、时干相对日主的十神
 
 
 class BaziCalculator:
     """八字计算器"""
 
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        index_path: Optional[str] = DEFAULT_INDEX_PATH,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        """
+        初始化八字计算器
+
+        Args:
+            index_path: 四柱索引文件路径 (None 或文件不存在时全部使用 lunar_python)
+            cache_size: 排盘结果 LRU 缓存容量 (0 表示禁用)
+        """
+        self.index = BaziIndex.load(index_path) if index_path else None
+        self.cache = LRUCache(cache_size)
+        self.timelines = LRUCache(cache_size)
+
+    def _cache_key(self, year: int, month: int, day: int, hour: int) -> Hashable:
+        """
+        缓存键: (年, 月, 日, 时辰)
+
+        同一时辰内的两个小时四柱相同，共用一个缓存条目;
+        仅当索引无法确认 (节气交接时辰、无索引) 时按小时区分
+        """
+        key = (year, month, day, hour_to_slot(hour))
+        if self.index is None or self.index.lookup(year, month, day, hour) is None:
+            return key + (hour,)
+        return key
+
+    def cache_info(self) -> dict:
+        """排盘缓存统计 (命中/未命中/容量)"""
+        return self.cache.info()
+
+    def _four_pillars(self, year: int, month: int, day: int, hour: int) -> tuple[int, int, int, int]:
+        """获取四柱甲子序号 (优先查索引，索引未覆盖时使用 lunar_python)"""
+        if self.index is not None:
+            indices = self.index.lookup(year, month, day, hour)
+            if indices is not None:
+                return indices
+
+        solar = _solar_class().fromYmdHms(year, month, day, hour, 0, 0)
+        bazi = solar.getLunar().getEightChar()
+        return (
+            JIAZI_INDEX[bazi.getYear()],
+            JIAZI_INDEX[bazi.getMonth()],
+            JIAZI_INDEX[bazi.getDay()],
+            JIAZI_INDEX[bazi.getTime()],
+        )
 
     def _create_pillar(self, ganzhi: str) -> Pillar:
         """从干支字符串创建 Pillar 对象"""
@@ -110,57 +175,6 @@ class BaziCalculator:
             canggan=DIZHI_CANGGAN.get(dizhi, []),
         )
 
-    def _count_wuxing(self, pillars: list[Pillar]) -> dict[str, int]:
-        """统计四柱中各五行的数量"""
-        count = {"木": 0, "火": 0, "土": 0, "金": 0, "水": 0}
-
-        for p in pillars:
-            # 天干算1点
-            if p.tiangan_wuxing:
-                count[p.tiangan_wuxing] += 1
-            # 地支主气算1点
-            if p.canggan:
-                main_canggan = p.canggan[0]
-                cg_wuxing = TIANGAN_WUXING.get(main_canggan, "")
-                if cg_wuxing:
-                    count[cg_wuxing] += 1
-
-        return count
-
-    def _analyze_strength(
-        self, day_master_wuxing: str, wuxing_count: dict[str, int]
-    ) -> tuple[str, list[str], list[str]]:
-        """
-        分析日主强弱与喜用神
-
-        规则 (简化版):
-        - 同我者 (比劫) + 生我者 (印绶) 的五行数量多 = 身强
-        - 身强喜: 克泄耗 (官杀、食伤、财星)
-        - 身弱喜: 生扶 (印绶、比劫)
-        """
-        dm = day_master_wuxing
-
-        # 找出同我、生我、克我、我克、我生
-        sheng_wo = [k for k, v in WUXING_SHENG.items() if v == dm][0]  # 生我者
-        wo_sheng = WUXING_SHENG[dm]  # 我生者
-        ke_wo = [k for k, v in WUXING_KE.items() if v == dm][0]  # 克我者
-        wo_ke = WUXING_KE[dm]  # 我克者
-
-        # 计算身强身弱
-        support_score = wuxing_count[dm] + wuxing_count[sheng_wo]  # 比劫 + 印绶
-        drain_score = wuxing_count[wo_sheng] + wuxing_count[wo_ke] + wuxing_count[ke_wo]
-
-        if support_score >= drain_score:
-            strength = "身强"
-            favorable = [ke_wo, wo_sheng, wo_ke]  # 官杀、食伤、财星
-            unfavorable = [dm, sheng_wo]  # 比劫、印绶
-        else:
-            strength = "身弱"
-            favorable = [sheng_wo, dm]  # 印绶、比劫
-            unfavorable = [ke_wo, wo_sheng, wo_ke]  # 官杀、食伤、财星
-
-        return strength, favorable, unfavorable
-
     def _generate_analysis(
         self,
         day_master: str,
@@ -191,7 +205,7 @@ class BaziCalculator:
         hour: int,
     ) -> BaziResult:
         """
-        计算八字
+        计算八字 (带时辰级 LRU 缓存，返回的结果为共享实例，请勿修改)
 
         Args:
             year: 出生年 (阳历)
@@ -202,36 +216,140 @@ class BaziCalculator:
         Returns:
             BaziResult: 完整八字分析结果
         """
-        # 使用 lunar_python 获取八字
-        solar = Solar.fromYmdHms(year, month, day, hour, 0, 0)
-        lunar = solar.getLunar()
-        bazi = lunar.getEightChar()
+        key = self._cache_key(year, month, day, hour)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._calculate(year, month, day, hour)
+            self.cache.put(key, result)
+        return result
+
+    def calculate_batch(
+        self, births, workers: Optional[int] = None, max_unindexed: Optional[int] = None
+    ) -> CohortResult:
+        """
+        批量排盘 (向量化查索引 + 向量化评分，索引未覆盖的行用进程池计算)
 
-        # 获取四柱
-        year_gz = bazi.getYear()
-        month_gz = bazi.getMonth()
-        day_gz = bazi.getDay()
-        hour_gz = bazi.getTime()
+        Args:
+            births: (N, 4) 数组，每行为 (年, 月, 日, 时)
+            workers: 进程池大小 (默认 CPU 核数; 1 表示不创建进程池)
+            max_unindexed: 索引未覆盖 (需调用 lunar_python) 的行数上限 (None 表示不限)
 
-        # 创建 Pillar 对象
-        year_pillar = self._create_pillar(year_gz)
-        month_pillar = self._create_pillar(month_gz)
-        day_pillar = self._create_pillar(day_gz)
-        hour_pillar = self._create_pillar(hour_gz)
+        Returns:
+            CohortResult: 列式结果，可用 bazi_batch.cohort_histograms 汇总
+        """
+        from .bazi_batch import compute_cohort
 
-        pillars = [year_pillar, month_pillar, day_pillar, hour_pillar]
+        return compute_cohort(
+            births, index=self.index, workers=workers, max_unindexed=max_unindexed
+        )
+
+    def compatibility(
+        self,
+        birth_a: tuple[int, int, int, int],
+        birth_b: tuple[int, int, int, int],
+    ) -> CompatibilityResult:
+        """
+        合婚评分
+
+        Args:
+            birth_a, birth_b: 双方出生 (年, 月, 日, 时)
+
+        Returns:
+            CompatibilityResult: 总分与各项得分
+        """
+        from .hehun import compatibility
+
+        return compatibility(self._four_pillars(*birth_a), self._four_pillars(*birth_b))
+
+    def build_compatibility_index(self, births, workers: Optional[int] = None) -> CompatibilityIndex:
+        """
+        为候选人批量排盘并建立合婚检索索引
+
+        Args:
+            births: (N, 4) 数组，每行为 (年, 月, 日, 时)
+            workers: 进程池大小 (默认 CPU 核数)
+
+        Returns:
+            CompatibilityIndex: 用 search(pillar_indices(...), k) 检索前 K 名
+        """
+        from .hehun import CompatibilityIndex
+
+        return CompatibilityIndex(self.calculate_batch(births, workers=workers).pillars)
+
+    def pillar_indices(self, year: int, month: int, day: int, hour: int) -> tuple[int, int, int, int]:
+        """四柱甲子序号 (用于合婚检索等整数接口)"""
+        return self._four_pillars(year, month, day, hour)
+
+    def luck_timeline(
+        self,
+        year: int,
+        month: int,
+        day: int,
+        hour: int,
+        gender: Literal["male", "female"],
+    ) -> LuckTimeline:
+        """
+        获取大运/流年时间线 (按命盘与性别缓存，大运在遍历时惰性计算)
+
+        Args:
+            year: 出生年 (阳历)
+            month: 出生月 (阳历)
+            day: 出生日 (阳历)
+            hour: 出生时辰 (0-23 小时)
+            gender: 性别 ("male" 或 "female")
+
+        Returns:
+            LuckTimeline: 可逐步遍历的时间线
+        """
+        key = (year, month, day, hour, gender)
+        timeline = self.timelines.get(key)
+        if timeline is None:
+            year_pillar, month_pillar, _, _ = self._four_pillars(year, month, day, hour)
+            timeline = LuckTimeline((year, month, day, hour), gender, year_pillar, month_pillar)
+            self.timelines.put(key, timeline)
+        return timeline
+
+    def luck_to_dict(self, timeline: LuckTimeline, year: int) -> dict:
+        """当前与下一步大运、当年流年 (字典格式)"""
+        current, upcoming = timeline.current_and_next(year)
+        annual = next(timeline.annual_pillars(year))
+
+        def pillar_dict(pillar):
+            if pillar is None:
+                return None
+            return {
+                "ganzhi": pillar.ganzhi,
+                "start_year": pillar.start_year,
+                "end_year": pillar.end_year,
+                "start_age": pillar.start_age,
+                "end_age": pillar.end_age,
+            }
+
+        return {
+            "current": pillar_dict(current),
+            "next": pillar_dict(upcoming),
+            "annual": {"year": annual.year, "ganzhi": annual.ganzhi, "age": annual.age},
+        }
+
+    def _calculate(self, year: int, month: int, day: int, hour: int) -> BaziResult:
+        """计算八字 (不经缓存)"""
+        # 获取四柱 (甲子序号)
+        indices = self._four_pillars(year, month, day, hour)
+
+        # 创建 Pillar 对象
+        year_pillar, month_pillar, day_pillar, hour_pillar = (
+            self._create_pillar(JIAZI[i]) for i in indices
+        )
 
         # 日主
         day_master = day_pillar.tiangan
         day_master_wuxing = day_pillar.tiangan_wuxing
 
-        # 统计五行
-        wuxing_count = self._count_wuxing(pillars)
-
-        # 分析强弱与喜用神
-        strength, favorable, unfavorable = self._analyze_strength(
-            day_master_wuxing, wuxing_count
-        )
+        # 五行评分、强弱与喜用神 (查表)
+        score = score_chart(indices)
+        strength = "身强" if score.strong else "身弱"
+        favorable = [ELEMENTS[e] for e in score.favorable]
+        unfavorable = [ELEMENTS[e] for e in score.unfavorable]
 
         # 生成分析
         analysis = self._generate_analysis(
@@ -249,6 +367,11 @@ class BaziCalculator:
             favorable_elements=favorable,
             unfavorable_elements=unfavorable,
             analysis=analysis,
+            wuxing_scores={ELEMENTS[e]: v / 10 for e, v in enumerate(score.scores)},
+            ten_gods={
+                pos: TEN_GOD_NAMES[god]
+                for pos, god in zip(("year", "month", "hour"), score.ten_gods)
+            },
         )
 
     def to_dict(self, result: BaziResult) -> dict:
@@ -266,4 +389,6 @@ class BaziCalculator:
             "favorable_elements": result.favorable_elements,
             "unfavorable_elements": result.unfavorable_elements,
             "analysis": result.analysis,
+            "wuxing_scores": result.wuxing_scores,
+            "ten_gods": result.ten_gods,
         }
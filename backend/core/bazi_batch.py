@@ -0,0 +1,207 @@
+"""
+八字批量统计 (Cohort Batch)
+
+对一批出生时间 (或一段日期范围) 批量排盘并统计:
+- 四柱: 优先向量化查索引，索引未覆盖的行用进程池并行调用 lunar_python
+- 评分: bazi_engine.score_charts 向量化计算
+- 汇总: 身强/身弱、喜用神、日主等分布直方图
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .bazi_engine import ELEMENTS, ChartScores, score_charts
+from .bazi_index import END_YEAR, START_YEAR, BaziIndex
+
+
+# 索引未覆盖的行数超过该值时才启用进程池
+PARALLEL_THRESHOLD = 256
+
+
+@dataclass(frozen=True)
+class CohortResult:
+    """批量排盘结果 (列式数组，第 i 行对应第 i 个出生时间)"""
+    births: np.ndarray    # (N, 4) 年、月、日、时
+    pillars: np.ndarray   # (N, 4) 年、月、日、时柱的甲子序号
+    scores: ChartScores   # 向量化评分结果
+
+
+def births_in_range(
+    start: date, end: date, hours: Iterable[int] = range(24)
+) -> np.ndarray:
+    """
+    生成日期范围内 (含首尾) 每天每个指定小时的出生时间
+
+    Returns:
+        (N, 4) 数组，每行为 (年, 月, 日, 时)
+    """
+    days = np.arange(
+        np.datetime64(start, "D"), np.datetime64(end, "D") + 1, dtype="datetime64[D]"
+    )
+    hours = np.asarray(list(hours), dtype=np.int64)
+
+    years = days.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    dom = (days - days.astype("datetime64[M]")).astype(np.int64) + 1
+
+    births = np.empty((len(days), len(hours), 4), dtype=np.int64)
+    births[:, :, 0] = years[:, None]
+    births[:, :, 1] = months[:, None]
+    births[:, :, 2] = dom[:, None]
+    births[:, :, 3] = hours[None, :]
+    return births.reshape(-1, 4)
+
+
+def validate_births(
+    births, start_year: int = START_YEAR, end_year: int = END_YEAR
+) -> np.ndarray:
+    """
+    检查出生时间 (向量化): 年份在范围内、日期合法、小时为 0-23
+
+    Returns:
+        (N, 4) int64 数组
+
+    Raises:
+        ValueError: 形状不对或存在非法行 (报告第一处)
+    """
+    births = np.asarray(births, dtype=np.int64)
+    if births.ndim != 2 or births.shape[1] != 4:
+        raise ValueError(f"births 形状应为 (N, 4)，实际为 {births.shape}")
+    year, month, day, hour = births.T
+
+    valid = (
+        (year >= start_year) & (year <= end_year)
+        & (month >= 1) & (month <= 12)
+        & (hour >= 0) & (hour <= 23)
+        & (day >= 1)
+    )
+    # 当月天数 (借助 datetime64 处理大小月与闰年，非法行按 1970-01 计算)
+    months = np.where(valid, (year - 1970) * 12 + (month - 1), 0)
+    month_start = months.astype("datetime64[M]").astype("datetime64[D]")
+    next_month = (months + 1).astype("datetime64[M]").astype("datetime64[D]")
+    valid &= day <= (next_month - month_start).astype(np.int64)
+
+    bad = np.flatnonzero(~valid)
+    if len(bad):
+        row = bad[0]
+        raise ValueError(
+            f"第 {row} 行出生时间无效: {births[row].tolist()} "
+            f"(年份须在 {start_year}-{end_year}，日期须合法，小时须为 0-23)"
+        )
+    return births
+
+
+def _lunar_pillars(births: np.ndarray) -> np.ndarray:
+    """用 lunar_python 逐行排盘 (进程池工作函数)"""
+    from .bazi import BaziCalculator
+
+    calculator = BaziCalculator(index_path=None, cache_size=0)
+    return np.array(
+        [calculator._four_pillars(*map(int, row)) for row in births],
+        dtype=np.uint8,
+    ).reshape(-1, 4)
+
+
+def compute_cohort(
+    births: np.ndarray,
+    index: Optional[BaziIndex] = None,
+    workers: Optional[int] = None,
+    max_unindexed: Optional[int] = None,
+) -> CohortResult:
+    """
+    批量排盘与评分
+
+    Args:
+        births: (N, 4) 数组，每行为 (年, 月, 日, 时)
+        index: 四柱索引 (None 则全部使用 lunar_python)
+        workers: 进程池大小 (默认 CPU 核数; 1 表示在当前线程逐行计算，不创建进程池)
+        max_unindexed: 索引未覆盖的行数上限 (None 表示不限)
+
+    Returns:
+        CohortResult: 列式结果
+
+    Raises:
+        ValueError: 形状不对，或索引未覆盖的行数超过 max_unindexed
+    """
+    births = np.asarray(births, dtype=np.int64)
+    if births.ndim != 2 or births.shape[1] != 4:
+        raise ValueError(f"births 形状应为 (N, 4)，实际为 {births.shape}")
+
+    if index is not None:
+        pillars, found = index.lookup_many(*births.T)
+        pillars = pillars.copy()
+    else:
+        pillars = np.zeros((len(births), 4), dtype=np.uint8)
+        found = np.zeros(len(births), dtype=bool)
+
+    # 索引未覆盖的行: 分片交给进程池
+    missing = np.flatnonzero(~found)
+    if max_unindexed is not None and len(missing) > max_unindexed:
+        raise ValueError(
+            f"索引未覆盖的行数 {len(missing)} 超过上限 {max_unindexed} (需逐行调用 lunar_python)"
+        )
+    if len(missing):
+        rows = births[missing]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(missing) > PARALLEL_THRESHOLD:
+            chunks = np.array_split(rows, workers * 4)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_lunar_pillars, chunks))
+            pillars[missing] = np.concatenate(parts)
+        else:
+            pillars[missing] = _lunar_pillars(rows)
+
+    return CohortResult(births=births, pillars=pillars, scores=score_charts(pillars))
+
+
+def cohort_histograms(result: CohortResult) -> dict:
+    """
+    汇总分布直方图
+
+    Returns:
+        strength: 身强/身弱人数
+        favorable: 各五行被列为喜用神的人数
+        primary_favorable: 首选喜用神分布
+        day_master_element: 日主五行分布
+        average_scores: 五行平均分值
+    """
+    scores = result.scores
+    total = len(result.pillars)
+
+    strong = int(scores.strong.sum())
+    favorable = scores.favorable[scores.favorable >= 0]
+    favorable_counts = np.bincount(favorable, minlength=5)
+    primary_counts = np.bincount(scores.favorable[:, 0], minlength=5)
+    dm_elements = scores.day_master // 2  # 天干两两同五行
+    dm_counts = np.bincount(dm_elements, minlength=5)
+    average = scores.scores.mean(axis=0) / 10 if total else np.zeros(5)
+
+    return {
+        "total": total,
+        "strength": {"身强": strong, "身弱": total - strong},
+        "favorable": dict(zip(ELEMENTS, favorable_counts.tolist())),
+        "primary_favorable": dict(zip(ELEMENTS, primary_counts.tolist())),
+        "day_master_element": dict(zip(ELEMENTS, dm_counts.tolist())),
+        "average_scores": dict(zip(ELEMENTS, np.round(average, 3).tolist())),
+    }
+
+
+def cohort_to_dict(result: CohortResult, include_rows: bool = False) -> dict:
+    """将批量结果转换为字典格式 (汇总 + 可选的列式明细)"""
+    data = {"histograms": cohort_histograms(result)}
+    if include_rows:
+        scores = result.scores
+        data["rows"] = {
+            "births": result.births.tolist(),
+            "pillars": result.pillars.tolist(),
+            "day_master": scores.day_master.tolist(),
+            "strong": scores.strong.tolist(),
+            "favorable": scores.favorable.tolist(),
+            "scores": scores.scores.tolist(),
+        }
+    return data
@@ -0,0 +1,240 @@
+"""
+八字评分引擎 (整数编码 + 查表)
+
+天干 0-9、地支 0-11、五行 0-4 (木火土金水)、六十甲子 0-59 均以整数表示，
+十神、五行生克、藏干权重全部预计算成表，评分只需几次数组运算。
+分值为整数 (以 0.1 为单位)，标量与向量化两条路径结果完全一致:
+- score_chart: 单个命盘 (纯 Python 查表)
+- score_charts: 多个命盘 (NumPy 向量化，结果与 score_chart 一致)
+
+NumPy 仅在首次向量化评分时导入，单盘评分不依赖 NumPy
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 五行 (序号即编码; 相生 e -> e+1，相克 e -> e+2)
+ELEMENTS = ("木", "火", "土", "金", "水")
+
+# 六十甲子 (序号 p 的天干为 p % 10，地支为 p % 12)
+JIAZI = tuple("甲乙丙丁戊己庚辛壬癸"[i % 10] + "子丑寅卯辰巳午未申酉戌亥"[i % 12] for i in range(60))
+
+# 天干五行 (甲乙木、丙丁火 ...)，偶数为阳干、奇数为阴干
+STEM_ELEMENT = (0, 0, 1, 1, 2, 2, 3, 3, 4, 4)
+
+# 地支五行 (子水、丑土、寅木 ...)
+BRANCH_ELEMENT = (4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4)
+
+# 地支藏干 (主气、中气、余气)
+BRANCH_HIDDEN_STEMS = (
+    (9,),         # 子: 癸
+    (5, 9, 7),    # 丑: 己 癸 辛
+    (0, 2, 4),    # 寅: 甲 丙 戊
+    (1,),         # 卯: 乙
+    (4, 1, 9),    # 辰: 戊 乙 癸
+    (2, 6, 4),    # 巳: 丙 庚 戊
+    (3, 5),       # 午: 丁 己
+    (5, 3, 1),    # 未: 己 丁 乙
+    (6, 8, 4),    # 申: 庚 壬 戊
+    (7,),         # 酉: 辛
+    (4, 7, 3),    # 戌: 戊 辛 丁
+    (8, 0),       # 亥: 壬 甲
+)
+
+# 天干权重、藏干权重 (主气、中气、余气)，以 0.1 为单位
+STEM_WEIGHT = 10
+HIDDEN_WEIGHTS = (10, 5, 3)
+
+# 月令 (月支) 权重倍数
+MONTH_BRANCH_FACTOR = 2
+
+# 日主与某五行的关系: RELATION[日主五行][五行] = (五行 - 日主五行) % 5
+SAME, OUTPUT, WEALTH, OFFICER, RESOURCE = range(5)  # 比劫、食伤、财星、官杀、印绶
+RELATION = tuple(tuple((e - dm) % 5 for e in range(5)) for dm in range(5))
+
+# 十神 (编码 = 关系 * 2 + 阴阳是否相异)
+TEN_GOD_NAMES = (
+    "比肩", "劫财",
+    "食神", "伤官",
+    "偏财", "正财",
+    "七杀", "正官",
+    "偏印", "正印",
+)
+TEN_GODS = tuple(
+    tuple(
+        RELATION[STEM_ELEMENT[dm]][STEM_ELEMENT[s]] * 2 + (dm % 2 != s % 2)
+        for s in range(10)
+    )
+    for dm in range(10)
+)
+
+# 每个地支按藏干权重折算到五行的分值
+BRANCH_SCORES = tuple(
+    tuple(
+        sum(
+            HIDDEN_WEIGHTS[i]
+            for i, stem in enumerate(BRANCH_HIDDEN_STEMS[b])
+            if STEM_ELEMENT[stem] == e
+        )
+        for e in range(5)
+    )
+    for b in range(12)
+)
+
+# 喜用神 / 忌神: (日主五行, 是否身强) -> 五行编码
+# 身强喜克泄耗 (官杀、食伤、财星)，身弱喜生扶 (印绶、比劫)
+_DRAIN = (OFFICER, OUTPUT, WEALTH)
+_SUPPORT = (RESOURCE, SAME)
+FAVORABLE = tuple(
+    (
+        tuple((dm + r) % 5 for r in _SUPPORT),   # 身弱
+        tuple((dm + r) % 5 for r in _DRAIN),     # 身强
+    )
+    for dm in range(5)
+)
+UNFAVORABLE = tuple(
+    (
+        tuple((dm + r) % 5 for r in _DRAIN),
+        tuple((dm + r) % 5 for r in (SAME, RESOURCE)),
+    )
+    for dm in range(5)
+)
+
+# 每个甲子 (作为年/日/时柱、作为月柱) 贡献的五行分值
+PILLAR_SCORES = tuple(
+    tuple(
+        (STEM_WEIGHT if STEM_ELEMENT[p % 10] == e else 0) + BRANCH_SCORES[p % 12][e]
+        for e in range(5)
+    )
+    for p in range(60)
+)
+MONTH_PILLAR_SCORES = tuple(
+    tuple(
+        (STEM_WEIGHT if STEM_ELEMENT[p % 10] == e else 0)
+        + BRANCH_SCORES[p % 12][e] * MONTH_BRANCH_FACTOR
+        for e in range(5)
+    )
+    for p in range(60)
+)
+
+
+@lru_cache(maxsize=None)
+def _numpy_tables() -> dict:
+    """NumPy 版本的表 (首次向量化评分时构建)"""
+    import numpy as np
+
+    def pad(groups, fill: int = -1) -> np.ndarray:
+        """将不等长分组补齐为数组"""
+        return np.array(
+            [[list(g) + [fill] * (3 - len(g)) for g in pair] for pair in groups],
+            dtype=np.int8,
+        )
+
+    return {
+        "pillar_scores": np.array(PILLAR_SCORES, dtype=np.int16),
+        "month_pillar_scores": np.array(MONTH_PILLAR_SCORES, dtype=np.int16),
+        "stem_element": np.array(STEM_ELEMENT, dtype=np.int8),
+        "ten_gods": np.array(TEN_GODS, dtype=np.int8),
+        "favorable": pad(FAVORABLE),
+        "unfavorable": pad(UNFAVORABLE),
+    }
+
+
+@dataclass(frozen=True)
+class ChartScore:
+    """单个命盘评分"""
+    day_master: int                # 日主天干
+    scores: tuple[int, ...]        # 五行分值 (按 ELEMENTS 顺序，单位 0.1)
+    strong: bool                   # 是否身强
+    favorable: tuple[int, ...]     # 喜用神 (五行编码)
+    unfavorable: tuple[int, ...]   # 忌神 (五行编码)
+    ten_gods: tuple[int, int, int]  # 年干、月干、时干的十神编码
+
+
+@dataclass(frozen=True)
+class ChartScores:
+    """多个命盘评分 (列式数组，第 i 行对应第 i 个命盘)"""
+    day_master: np.ndarray   # (N,) 日主天干
+    scores: np.ndarray       # (N, 5) 五行分值 (单位 0.1)
+    strong: np.ndarray       # (N,) 是否身强
+    favorable: np.ndarray    # (N, 3) 喜用神，不足 3 个以 -1 补齐
+    unfavorable: np.ndarray  # (N, 3) 忌神，不足 3 个以 -1 补齐
+    ten_gods: np.ndarray     # (N, 3) 年干、月干、时干的十神编码
+
+
+def score_chart(pillars: tuple[int, int, int, int]) -> ChartScore:
+    """
+    单个命盘评分
+
+    Args:
+        pillars: 年、月、日、时柱的甲子序号 (0-59)
+    """
+    year, month, day, hour = pillars
+    stems = [p % 10 for p in pillars]
+
+    scores = [
+        sum(column)
+        for column in zip(
+            PILLAR_SCORES[year], MONTH_PILLAR_SCORES[month],
+            PILLAR_SCORES[day], PILLAR_SCORES[hour],
+        )
+    ]
+
+    day_master = stems[2]
+    dm = STEM_ELEMENT[day_master]
+    support = scores[dm] + scores[(dm + RESOURCE) % 5]
+    strong = bool(support >= sum(scores) - support)
+
+    gods = TEN_GODS[day_master]
+    return ChartScore(
+        day_master=day_master,
+        scores=tuple(scores),
+        strong=strong,
+        favorable=FAVORABLE[dm][strong],
+        unfavorable=UNFAVORABLE[dm][strong],
+        ten_gods=(gods[stems[0]], gods[stems[1]], gods[stems[3]]),
+    )
+
+
+def score_charts(pillars: np.ndarray) -> ChartScores:
+    """
+    多个命盘向量化评分
+
+    Args:
+        pillars: 形状为 (N, 4) 的甲子序号数组 (年、月、日、时柱)
+    """
+    import numpy as np
+
+    pillars = np.asarray(pillars)
+    if pillars.ndim != 2 or pillars.shape[1] != 4:
+        raise ValueError(f"pillars 形状应为 (N, 4)，实际为 {pillars.shape}")
+    pillars = pillars.astype(np.intp, copy=False)
+    tables = _numpy_tables()
+
+    pillar_scores = tables["pillar_scores"]
+    scores = pillar_scores[pillars[:, 0]] + tables["month_pillar_scores"][pillars[:, 1]]
+    scores += pillar_scores[pillars[:, 2]]
+    scores += pillar_scores[pillars[:, 3]]
+
+    day_master = pillars[:, 2] % 10
+    dm = tables["stem_element"][day_master]
+    rows = np.arange(len(pillars))
+    support = scores[rows, dm] + scores[rows, (dm + RESOURCE) % 5]
+    strong = support >= scores.sum(axis=1, dtype=np.int16) - support
+
+    strong_index = strong.view(np.int8)
+    return ChartScores(
+        day_master=day_master.astype(np.int8),
+        scores=scores,
+        strong=strong,
+        favorable=tables["favorable"][dm, strong_index],
+        unfavorable=tables["unfavorable"][dm, strong_index],
+        ten_gods=tables["ten_gods"][day_master[:, None], pillars[:, [0, 1, 3]] % 10],
+    )
@@ -0,0 +1,294 @@
+"""
+八字四柱索引 (Bazi Index) - 预计算的阳历 -> 四柱查找表
+
+将 1900-2100 年每一天、每个时辰的四柱预先排好，以六十甲子序号 (0-59)
+存入紧凑的二进制文件，运行时通过 mmap 做 O(1) 查表，跳过 lunar_python。
+
+文件格式 (小端):
+- 文件头: 魔数 "BZIX"、版本、每日槽位数、起始日 (公历序数)、天数
+- 数据区: 天数 × 13 槽位 × 4 字节 (年、月、日、时柱的甲子序号)
+
+时辰槽位: 0 = 早子时 (0 点)，1-11 = 丑至亥时，12 = 晚子时 (23 点)。
+若节气交接落在某时辰的两个小时之间，该槽位标记为 SPLIT_SLOT，查表时回退到
+lunar_python 逐时计算。
+
+构建:
+    python -m core.bazi_index [--output data/bazi_index.bin] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+from datetime import date
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 默认索引文件路径 (支持环境变量覆盖)
+DEFAULT_INDEX_PATH = os.getenv(
+    "BAZI_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "bazi_index.bin"),
+)
+
+# 索引覆盖范围 (与 DetailedRequest 的出生年份范围一致)
+START_YEAR = 1900
+END_YEAR = 2100
+
+MAGIC = b"BZIX"
+VERSION = 1
+SLOTS_PER_DAY = 13
+HEADER = struct.Struct("<4sHHiI")  # 魔数, 版本, 每日槽位数, 起始日序数, 天数
+
+# 节气交接时辰的标记 (甲子序号不会超过 59)
+SPLIT_SLOT = 0xFF
+
+# 1970-01-01 的公历序数 (datetime64 与 date.toordinal 换算)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def hour_to_slot(hour: int) -> int:
+    """小时 (0-23) -> 时辰槽位 (0-12)"""
+    return (hour + 1) // 2
+
+
+def slot_hours(slot: int) -> tuple[int, ...]:
+    """时辰槽位 -> 所含小时"""
+    if slot == 0:
+        return (0,)
+    if slot == SLOTS_PER_DAY - 1:
+        return (23,)
+    return (slot * 2 - 1, slot * 2)
+
+
+class BaziIndex:
+    """mmap 方式加载的四柱索引"""
+
+    def __init__(self, path: str):
+        """
+        打开索引文件
+
+        Args:
+            path: 索引文件路径
+
+        Raises:
+            ValueError: 文件格式不正确
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, slots, start, days = HEADER.unpack_from(self._mmap, 0)
+        expected_size = HEADER.size + days * slots * 4
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or slots != SLOTS_PER_DAY
+            or len(self._mmap) != expected_size
+        ):
+            self._mmap.close()
+            raise ValueError(f"八字索引文件格式错误: {path}")
+
+        self.start_ordinal = start
+        self.days = days
+        self._table = None
+
+    @property
+    def table(self) -> np.ndarray:
+        """只读数组视图 (天数, 槽位, 四柱)，供批量查询使用 (首次访问时创建)"""
+        if self._table is None:
+            import numpy as np
+
+            self._table = np.frombuffer(
+                self._mmap, dtype=np.uint8, count=self.days * SLOTS_PER_DAY * 4, offset=HEADER.size
+            ).reshape(self.days, SLOTS_PER_DAY, 4)
+        return self._table
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> Optional["BaziIndex"]:
+        """加载索引，文件不存在或损坏时返回 None"""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def lookup(
+        self, year: int, month: int, day: int, hour: int
+    ) -> Optional[tuple[int, int, int, int]]:
+        """
+        查询四柱
+
+        Returns:
+            (年, 月, 日, 时柱) 的甲子序号; 超出范围、日期非法或节气交接时辰返回 None
+        """
+        try:
+            offset = date(year, month, day).toordinal() - self.start_ordinal
+        except ValueError:
+            return None
+        if not 0 <= offset < self.days or not 0 <= hour <= 23:
+            return None
+
+        pos = HEADER.size + (offset * SLOTS_PER_DAY + hour_to_slot(hour)) * 4
+        pillars = tuple(self._mmap[pos:pos + 4])
+        if SPLIT_SLOT in pillars:
+            return None
+        return pillars
+
+    def lookup_many(
+        self, year: np.ndarray, month: np.ndarray, day: np.ndarray, hour: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        批量查询四柱 (向量化)
+
+        Returns:
+            (pillars, found): pillars 为 (N, 4) 的甲子序号数组，found 为 (N,) 布尔数组;
+            found 为 False 的行 (超出范围、日期非法、节气交接时辰) 内容无意义
+        """
+        import numpy as np
+
+        year = np.asarray(year, dtype=np.int64)
+        month = np.asarray(month, dtype=np.int64)
+        day = np.asarray(day, dtype=np.int64)
+        hour = np.asarray(hour, dtype=np.int64)
+
+        # 年月日 -> 距 1970-01-01 的天数，借助 datetime64 处理大小月与闰年
+        months = (year - 1970) * 12 + (month - 1)
+        month_start = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+        next_month = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+        days_since_epoch = month_start + day - 1
+
+        offset = days_since_epoch + _EPOCH_ORDINAL - self.start_ordinal
+        found = (
+            (month >= 1) & (month <= 12)
+            & (day >= 1) & (days_since_epoch < next_month)
+            & (hour >= 0) & (hour <= 23)
+            & (offset >= 0) & (offset < self.days)
+        )
+
+        slot = (hour + 1) // 2
+        pillars = self.table[np.where(found, offset, 0), np.where(found, slot, 0)]
+        found &= (pillars != SPLIT_SLOT).all(axis=1)
+        return pillars, found
+
+    def close(self):
+        """关闭 mmap"""
+        self._table = None
+        self._mmap.close()
+
+
+def _eight_char_indices(lunar_util, solar_cls, d: date, hour: int) -> tuple[int, int, int, int]:
+    """用 lunar_python 计算某时刻四柱的甲子序号"""
+    ec = solar_cls.fromYmdHms(d.year, d.month, d.day, hour, 0, 0).getLunar().getEightChar()
+    return (
+        lunar_util.getJiaZiIndex(ec.getYear()),
+        lunar_util.getJiaZiIndex(ec.getMonth()),
+        lunar_util.getJiaZiIndex(ec.getDay()),
+        lunar_util.getJiaZiIndex(ec.getTime()),
+    )
+
+
+def _build_days(start: int, days: int) -> bytes:
+    """
+    计算一段连续日期的索引数据
+
+    每天只需调用 lunar_python 两次 (0 点与 23 点):
+    - 日柱全天相同 (晚子时仍算当日)
+    - 年柱、月柱仅在节气交接日变化，此时逐小时计算
+    - 时柱按五鼠遁由 0 点时柱顺推，晚子时取 23 点结果
+    """
+    from lunar_python import Solar
+    from lunar_python.util import LunarUtil
+
+    data = bytearray(days * SLOTS_PER_DAY * 4)
+    for offset in range(days):
+        d = date.fromordinal(start + offset)
+        first = _eight_char_indices(LunarUtil, Solar, d, 0)
+        last = _eight_char_indices(LunarUtil, Solar, d, 23)
+
+        # 年柱、月柱: 未交节气则全天一致
+        if first[:2] == last[:2]:
+            year_month = {hour: first[:2] for hour in range(24)}
+        else:
+            year_month = {
+                hour: _eight_char_indices(LunarUtil, Solar, d, hour)[:2]
+                for hour in range(24)
+            }
+
+        day_pillar = first[2]
+        # 0 点时柱为本日甲子时起点，丑至亥时依次 +1
+        for slot in range(SLOTS_PER_DAY):
+            if slot == SLOTS_PER_DAY - 1:
+                time_pillar = last[3]
+            else:
+                time_pillar = (first[3] + slot) % 60
+
+            hours = slot_hours(slot)
+            year_pillar, month_pillar = year_month[hours[0]]
+            if any(year_month[h] != (year_pillar, month_pillar) for h in hours):
+                year_pillar = month_pillar = SPLIT_SLOT
+
+            pos = (offset * SLOTS_PER_DAY + slot) * 4
+            data[pos:pos + 4] = bytes((year_pillar, month_pillar, day_pillar, time_pillar))
+
+    return bytes(data)
+
+
+def build(
+    path: str = DEFAULT_INDEX_PATH,
+    start_year: int = START_YEAR,
+    end_year: int = END_YEAR,
+    workers: int = 1,
+):
+    """
+    构建索引文件
+
+    Args:
+        path: 输出文件路径
+        start_year: 起始年份
+        end_year: 结束年份 (含)
+        workers: 并行进程数 (按年份分片)
+    """
+    start = date(start_year, 1, 1).toordinal()
+    days = date(end_year, 12, 31).toordinal() - start + 1
+
+    # 按年份分片
+    chunks = []
+    for year in range(start_year, end_year + 1):
+        chunk_start = date(year, 1, 1).toordinal()
+        chunks.append((chunk_start, date(year, 12, 31).toordinal() - chunk_start + 1))
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_build_days, *zip(*chunks)))
+    else:
+        parts = [_build_days(chunk_start, chunk_days) for chunk_start, chunk_days in chunks]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, SLOTS_PER_DAY, start, days))
+        for part in parts:
+            f.write(part)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建八字四柱索引")
+    parser.add_argument("--output", default=DEFAULT_INDEX_PATH, help="输出文件路径")
+    parser.add_argument("--start-year", type=int, default=START_YEAR)
+    parser.add_argument("--end-year", type=int, default=END_YEAR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    args = parser.parse_args()
+
+    build(args.output, args.start_year, args.end_year, args.workers)
+    print(f"[BaziIndex] 已生成 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+大运 / 流年时间线 (Luck Pillars)
+
+- 大运: 由月柱按六十甲子顺排 (阳年男、阴年女) 或逆排，每步十年
+- 流年: 年份对应的干支 (以立春为界，此处按公历年份近似)
+- 起运时间由 lunar_python 按节气推算，仅在首次需要时计算一次
+
+时间线以生成器惰性展开，已展开的部分缓存在 LuckTimeline 对象中
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Literal, Optional
+
+from .bazi_engine import JIAZI
+
+
+# 最多排出的大运步数 (约 120 年)
+MAX_LUCK_PILLARS = 12
+
+
+def year_pillar_index(year: int) -> int:
+    """公历年份 -> 流年干支的甲子序号 (公元 4 年为甲子年)"""
+    return (year - 4) % 60
+
+
+@dataclass(frozen=True)
+class AnnualPillar:
+    """流年"""
+    year: int      # 公历年份
+    ganzhi: str    # 干支
+    age: int       # 虚岁
+
+
+@dataclass(frozen=True)
+class LuckPillar:
+    """一步大运"""
+    index: int       # 第几步 (1 起)
+    ganzhi: str      # 干支
+    start_year: int  # 起始年份
+    end_year: int    # 结束年份 (含)
+    start_age: int   # 起始虚岁
+    end_age: int     # 结束虚岁
+
+    def annual_pillars(self) -> Iterator[AnnualPillar]:
+        """本步大运内的十个流年"""
+        birth_year = self.start_year - self.start_age + 1
+        for year in range(self.start_year, self.end_year + 1):
+            yield annual_pillar(year, birth_year)
+
+
+def annual_pillar(year: int, birth_year: int) -> AnnualPillar:
+    """构建流年"""
+    return AnnualPillar(
+        year=year,
+        ganzhi=JIAZI[year_pillar_index(year)],
+        age=year - birth_year + 1,
+    )
+
+
+class LuckTimeline:
+    """单个命盘的大运时间线 (惰性展开并缓存)"""
+
+    def __init__(
+        self,
+        birth: tuple[int, int, int, int],
+        gender: Literal["male", "female"],
+        year_pillar: int,
+        month_pillar: int,
+    ):
+        """
+        Args:
+            birth: 出生 (年, 月, 日, 时)
+            gender: 性别
+            year_pillar: 年柱甲子序号
+            month_pillar: 月柱甲子序号
+        """
+        self.birth = birth
+        self.gender = gender
+        self.month_pillar = month_pillar
+        # 阳干序号为偶数: 阳年男、阴年女顺排，其余逆排
+        self.forward = (year_pillar % 2 == 0) == (gender == "male")
+        self._start_year: Optional[int] = None
+        self._pillars: list[LuckPillar] = []
+        self._lock = threading.Lock()
+
+    @property
+    def start_year(self) -> int:
+        """起运年份 (首次访问时由 lunar_python 推算)"""
+        if self._start_year is None:
+            from lunar_python import Solar
+
+            year, month, day, hour = self.birth
+            eight_char = Solar.fromYmdHms(year, month, day, hour, 0, 0).getLunar().getEightChar()
+            yun = eight_char.getYun(1 if self.gender == "male" else 0)
+            self._start_year = yun.getStartSolar().getYear()
+        return self._start_year
+
+    def _make_pillar(self, index: int) -> LuckPillar:
+        """计算第 index 步大运"""
+        step = index if self.forward else -index
+        start_year = self.start_year + 10 * (index - 1)
+        start_age = start_year - self.birth[0] + 1
+        return LuckPillar(
+            index=index,
+            ganzhi=JIAZI[(self.month_pillar + step) % 60],
+            start_year=start_year,
+            end_year=start_year + 9,
+            start_age=start_age,
+            end_age=start_age + 9,
+        )
+
+    def luck_pillars(self) -> Iterator[LuckPillar]:
+        """逐步生成大运 (已计算的部分直接复用)"""
+        for i in range(MAX_LUCK_PILLARS):
+            with self._lock:
+                if i == len(self._pillars):
+                    self._pillars.append(self._make_pillar(i + 1))
+                pillar = self._pillars[i]
+            yield pillar
+
+    def annual_pillars(self, start_year: Optional[int] = None) -> Iterator[AnnualPillar]:
+        """从 start_year (默认出生年) 起逐年生成流年 (无上限，由调用方截断)"""
+        year = self.birth[0] if start_year is None else start_year
+        while True:
+            yield annual_pillar(year, self.birth[0])
+            year += 1
+
+    def current_and_next(self, year: int) -> tuple[Optional[LuckPillar], Optional[LuckPillar]]:
+        """
+        查找某年所在的大运及下一步大运
+
+        Returns:
+            (当前大运, 下一步大运); 尚未起运时当前大运为 None
+        """
+        current = None
+        for pillar in self.luck_pillars():
+            if pillar.start_year > year:
+                return current, pillar
+            current = pillar
+        return current, None
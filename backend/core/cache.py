@@ -0,0 +1,208 @@
+"""
+通用缓存工具
+
+- LRUCache: 线程安全的有界 LRU 缓存，可选 TTL，带命中统计
+- SQLiteCache: 基于 SQLite (WAL) 的持久化键值缓存，带 TTL 与可选容量上限，可跨进程共享
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+# 未命中标记
+_MISSING = object()
+
+
+class LRUCache:
+    """有界 LRU 缓存 (线程安全)"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大条目数 (0 表示禁用缓存)
+            ttl: 条目有效期 (秒)，None 表示永不过期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，命中时将条目移到最近使用端 (过期条目视为未命中并删除)"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] is not None and entry[1] <= time.monotonic():
+                del self._data[key]
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """写入缓存 (ttl 为本条目的有效期，默认使用 self.ttl)，超出容量时淘汰最久未使用的条目"""
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """清空缓存与统计"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def info(self) -> dict:
+        """缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class SQLiteCache:
+    """
+    SQLite 持久化缓存 (值以 JSON 存储)
+
+    使用 WAL 模式，多个进程 (如多个 uvicorn worker) 可同时读写同一文件;
+    每个线程使用独立连接
+    """
+
+    # 每写入多少次清理一次过期条目 (及超出容量的条目)
+    PURGE_INTERVAL = 256
+
+    def __init__(self, path: str, ttl: float, table: str = "cache", maxsize: Optional[int] = None):
+        """
+        打开 (必要时创建) 缓存数据库
+
+        Args:
+            path: 数据库文件路径
+            ttl: 条目有效期 (秒)
+            table: 表名
+            maxsize: 最大条目数 (None 表示不限)，定期清理时淘汰最早过期的条目，
+                两次清理之间最多超出 PURGE_INTERVAL 条
+        """
+        if not table.isidentifier():
+            raise ValueError(f"非法表名: {table}")
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        if maxsize is not None:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires ON {table} (expires)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取未过期的条目"""
+        row = self._connection().execute(
+            f"SELECT value FROM {self.table} WHERE key = ? AND expires > ?",
+            (key, time.time()),
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入条目 (值须可 JSON 序列化，ttl 默认使用 self.ttl)，定期清理过期条目"""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + (self.ttl if ttl is None else ttl)),
+            )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_INTERVAL == 0
+        if purge:
+            self.purge(now)
+
+    def purge(self, now: Optional[float] = None):
+        """删除过期条目，并在超出容量时淘汰最早过期的条目"""
+        now = time.time() if now is None else now
+        conn = self._connection()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE expires <= ?", (now,))
+            if self.maxsize is not None:
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY expires "
+                    f"LIMIT max((SELECT COUNT(*) FROM {self.table}) - ?, 0))",
+                    (self.maxsize,),
+                )
+
+    def clear(self):
+        """清空缓存与统计"""
+        conn = self._connection()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table}")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def info(self) -> dict:
+        """缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "path": self.path,
+                "ttl": self.ttl,
+                "maxsize": self.maxsize,
+            }
@@ -1,20 +1,108 @@
 """
 外应搜索模块 (Context Crawler)
 
-使用 DuckDuckGo 搜索引擎获取实时信息作为"外应"
+通过可替换的搜索源获取相关信息作为"外应"
 - 提取问题关键词
 - 搜索相关新闻/信息
 - 返回摘要作为外应参考
+
+搜索源 (CRAWLER_PROVIDER):
+- ddgs: DuckDuckGo 实时网络搜索 (默认)
+- local: 本地 SQLite FTS5 语料库 (见 local_search)，适合无外网或低延迟部署
+
+搜索源均为同步调用，异步接口 search_async 将其放入有界线程池执行，
+并带有单次调用的截止时间，避免慢搜索阻塞事件循环。
+
+成功的搜索结果按规范化后的关键词缓存: 内存 LRU (带 TTL) + 可选的 SQLite (WAL)
+持久层，后者在重启后保留并可由多个 worker 进程共享; 相同关键词的并发异步搜索
+合并为一次上游请求
+
+开启正文抓取 (CRAWLER_FETCH_ARTICLES=1) 时，search_async 在截止时间内并发抓取结果页正文
+(见 article_fetcher)，以正文代替百字摘要作为外应; 截止时间到达时返回已提取的部分正文
+
+prefetch 在用户提交前 (如输入问题后) 即在后台开始搜索并返回凭证，
+search_async 携带凭证时直接等待或复用该搜索，把搜索延迟移出预测请求的关键路径
 """
 
+import asyncio
+import os
 import re
-from dataclasses import dataclass
-from typing import Optional
+import secrets
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Optional, Union
+
+from .article_fetcher import ArticleFetcher
+from .cache import LRUCache, SQLiteCache
+from .local_search import DEFAULT_LOCAL_SEARCH_DB, LocalSearchIndex
+from .singleflight import SingleFlight
+
+
+# 默认搜索源 (支持环境变量覆盖): ddgs 或 local
+DEFAULT_PROVIDER = os.getenv("CRAWLER_PROVIDER", "ddgs")
+
+# 同时进行的搜索数上限 (支持环境变量覆盖)
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("CRAWLER_MAX_CONCURRENCY", "4"))
+
+# 搜索结果缓存: 内存容量 (0 表示禁用)、有效期 (秒)、SQLite 文件路径 (留空不启用持久层)
+DEFAULT_CACHE_SIZE = int(os.getenv("CRAWLER_CACHE_SIZE", "1024"))
+DEFAULT_CACHE_TTL = float(os.getenv("CRAWLER_CACHE_TTL", "3600"))
+DEFAULT_CACHE_DB = os.getenv("CRAWLER_CACHE_DB", "")
+
+# 开启正文抓取时，尚未抓取正文或正文不完整 (截止时间到达) 的结果的缓存有效期 (秒)
+DEFAULT_PARTIAL_CACHE_TTL = float(os.getenv("CRAWLER_CACHE_PARTIAL_TTL", "60"))
+
+# 是否抓取结果页正文 (默认关闭)
+DEFAULT_FETCH_ARTICLES = os.getenv("CRAWLER_FETCH_ARTICLES", "0").lower() in ("1", "true", "yes")
+
+# 摘要中每条结果最多引用的字数: 仅有搜索摘要时 / 抓取到正文时
+SNIPPET_SUMMARY_CHARS = 100
+ARTICLE_SUMMARY_CHARS = 300
+
+# 正文抓取须在搜索截止时间前留出的余量 (秒)
+FETCH_MARGIN = 0.05
+
+# 预取凭证: 最多保留数量、有效期 (秒)
+DEFAULT_PREFETCH_SIZE = int(os.getenv("CRAWLER_PREFETCH_SIZE", "1024"))
+DEFAULT_PREFETCH_TTL = float(os.getenv("CRAWLER_PREFETCH_TTL", "300"))
+
+# 停用词
+STOP_WORDS = (
+    "吗", "呢", "啊", "呀", "吧", "了", "的", "是", "会",
+    "能", "可以", "应该", "怎么", "怎么样", "什么", "如何", "为什么",
+    "我", "你", "他", "她", "它", "我们", "他们",
+    "请问", "想问", "问一下", "帮我", "帮忙",
+)
 
-try:
-    from duckduckgo_search import DDGS
-except ImportError:
-    DDGS = None
+# 停用词 (长词优先，如"我们"整体匹配而非只匹配"我") 与标点、空白编译为一个正则，一次扫描完成清理
+_CLEAN_RE = re.compile(
+    "|".join(re.escape(w) for w in sorted(STOP_WORDS, key=len, reverse=True))
+    + r"|[\s\W_]+"
+)
+
+
+def normalize_query(text: str) -> str:
+    """全角转半角 (NFKC)、小写，移除停用词与标点，词项之间以单个空格分隔"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return " ".join(_CLEAN_RE.sub(" ", text).split())
+
+
+def canonical_query(text: str) -> str:
+    """规范化查询 (缓存键): normalize_query 后词项去重并排序，与原词序无关"""
+    return " ".join(sorted(set(normalize_query(text).split())))
+
+
+@lru_cache(maxsize=None)
+def _load_ddgs():
+    """延迟导入 duckduckgo_search (首次搜索时加载，未安装返回 None)"""
+    try:
+        from duckduckgo_search import DDGS
+    except ImportError:
+        return None
+    return DDGS
 
 
 @dataclass
@@ -23,6 +111,7 @@ class SearchResult:
     title: str
     snippet: str
     url: str
+    content: str = ""  # 抓取到的正文 (未开启正文抓取时为空)
 
 
 @dataclass
@@ -35,43 +124,259 @@ class ContextResult:
     error: Optional[str] = None
 
 
+class ProviderUnavailable(Exception):
+    """搜索源不可用 (依赖未安装、语料库不存在等)"""
+
+    def __init__(self, reason: str, error: str):
+        super().__init__(reason)
+        self.reason = reason  # 中文说明 (用于摘要)
+        self.error = error    # 错误信息
+
+
+class SearchProvider:
+    """搜索源接口: search 返回按相关度排序的结果，失败时抛出异常"""
+
+    name = ""
+
+    def search(self, query: str, max_results: int) -> list[SearchResult]:
+        raise NotImplementedError
+
+    def info(self) -> dict:
+        """搜索源信息"""
+        return {"name": self.name}
+
+
+class DDGSProvider(SearchProvider):
+    """DuckDuckGo 网络搜索"""
+
+    name = "ddgs"
+
+    def __init__(self, timeout: int = 10, region: str = "cn-zh"):
+        """
+        Args:
+            timeout: 请求超时时间 (秒)
+            region: 搜索区域 (默认中国区域，中文结果)
+        """
+        self.timeout = timeout
+        self.region = region
+
+    def search(self, query: str, max_results: int) -> list[SearchResult]:
+        DDGS = _load_ddgs()
+        if DDGS is None:
+            raise ProviderUnavailable(
+                "duckduckgo_search 未安装", "duckduckgo_search library not installed"
+            )
+        with DDGS(timeout=self.timeout) as ddgs:
+            results = ddgs.text(query, max_results=max_results, region=self.region)
+        return [
+            SearchResult(
+                title=r.get("title", ""),
+                snippet=r.get("body", ""),
+                url=r.get("href", ""),
+            )
+            for r in results or []
+        ]
+
+
+class LocalSearchProvider(SearchProvider):
+    """本地 SQLite FTS5 语料库 (语料库在首次搜索时打开)"""
+
+    name = "local"
+
+    def __init__(self, path: str = DEFAULT_LOCAL_SEARCH_DB):
+        """
+        Args:
+            path: 语料库文件路径 (由 python -m core.local_search ingest 生成)
+        """
+        self.path = path
+        self._index: Optional[LocalSearchIndex] = None
+        self._lock = threading.Lock()
+
+    def _get_index(self) -> LocalSearchIndex:
+        """打开语料库 (不存在时抛出 ProviderUnavailable，下次搜索重试)"""
+        with self._lock:
+            if self._index is None:
+                try:
+                    self._index = LocalSearchIndex(self.path, create=False)
+                except FileNotFoundError:
+                    raise ProviderUnavailable(
+                        "本地语料库不存在", f"local search database not found: {self.path}"
+                    )
+            return self._index
+
+    def search(self, query: str, max_results: int) -> list[SearchResult]:
+        return [
+            SearchResult(title=r["title"], snippet=r["snippet"], url=r["url"])
+            for r in self._get_index().search(query, max_results)
+        ]
+
+    def info(self) -> dict:
+        index = self._index
+        if index is None:
+            return {"name": self.name, "path": self.path, "documents": None}
+        return {"name": self.name, **index.info()}
+
+
+# 搜索源名称 -> 实现
+PROVIDERS = {
+    DDGSProvider.name: DDGSProvider,
+    LocalSearchProvider.name: LocalSearchProvider,
+}
+
+
 class ContextCrawler:
     """外应爬虫"""
 
-    def __init__(self, max_results: int = 3, timeout: int = 10):
+    def __init__(
+        self,
+        max_results: int = 3,
+        timeout: int = 10,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        cache_db: Optional[str] = DEFAULT_CACHE_DB,
+        provider: Union[str, SearchProvider] = DEFAULT_PROVIDER,
+        prefetch_size: int = DEFAULT_PREFETCH_SIZE,
+        prefetch_ttl: float = DEFAULT_PREFETCH_TTL,
+        fetch_articles: bool = DEFAULT_FETCH_ARTICLES,
+    ):
         """
         初始化爬虫
 
         Args:
             max_results: 最大搜索结果数
-            timeout: 请求超时时间 (秒)
+            timeout: 请求超时时间 (秒)，也是 search_async 的默认截止时间
+            max_concurrency: search_async 同时执行的搜索数上限 (线程池大小)
+            cache_size: 内存缓存容量 (0 表示禁用)
+            cache_ttl: 缓存有效期 (秒)
+            cache_db: SQLite 持久缓存路径 (None 或空字符串表示不启用)
+            provider: 搜索源名称 (PROVIDERS 之一) 或 SearchProvider 实例
+            prefetch_size: 预取凭证最多保留数量
+            prefetch_ttl: 预取凭证有效期 (秒)
+            fetch_articles: 是否在 search_async 中抓取结果页正文
         """
+        if provider == DDGSProvider.name:
+            provider = DDGSProvider(timeout=timeout)
+        elif isinstance(provider, str):
+            if provider not in PROVIDERS:
+                raise ValueError(f"未知的搜索源: {provider} (可选 {', '.join(PROVIDERS)})")
+            provider = PROVIDERS[provider]()
+        self.provider = provider
         self.max_results = max_results
         self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+        self.disk_cache = SQLiteCache(cache_db, ttl=cache_ttl, table="search_cache") if cache_db else None
+        self._partial_ttl = min(DEFAULT_PARTIAL_CACHE_TTL, cache_ttl)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.flight = SingleFlight()
+        self.in_flight = 0
+        self.timeouts = 0
+        # 预取: 凭证 -> (缓存键, 后台搜索任务)
+        self.prefetches = LRUCache(maxsize=prefetch_size, ttl=prefetch_ttl)
+        self._prefetch_tasks: set[asyncio.Task] = set()
+        self.prefetch_started = 0
+        self.prefetch_used = 0
+        self.prefetch_missed = 0
+        self.prefetch_failed = 0
+        self.fetcher = ArticleFetcher() if fetch_articles else None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取 (必要时创建) 搜索线程池"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix="crawler"
+                )
+            return self._executor
+
+    def close(self):
+        """关闭线程池 (未开始的搜索直接取消)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aclose(self):
+        """关闭线程池与正文抓取的 HTTP 客户端"""
+        self.close()
+        if self.fetcher is not None:
+            await self.fetcher.aclose()
+
+    def info(self) -> dict:
+        """搜索统计 (并发上限、进行中数量、超时次数、缓存命中)"""
+        memory = self.cache.info()
+        disk = self.disk_cache.info() if self.disk_cache is not None else None
+        hits = memory["hits"] + (disk["hits"] if disk else 0)
+        lookups = memory["hits"] + memory["misses"]
+        return {
+            "provider": self.provider.info(),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "timeouts": self.timeouts,
+            "singleflight": self.flight.info(),
+            "fetcher": self.fetcher.info() if self.fetcher is not None else None,
+            "prefetch": {
+                "started": self.prefetch_started,
+                "used": self.prefetch_used,
+                "missed": self.prefetch_missed,
+                "failed": self.prefetch_failed,
+                "pending": len(self._prefetch_tasks),
+                "ttl": self.prefetches.ttl,
+            },
+            "cache": {
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory": memory,
+                "disk": disk,
+            },
+        }
+
+    def _cache_key(self, query: str) -> str:
+        """
+        缓存键: 搜索源 + 结果数 + 规范化的搜索关键词 (见 canonical_query)
+
+        关键词过短而回退为原问题时 (见 _extract_keywords)，实际发送的是原问题，
+        按原问题作键 (以 "=" 区分)，避免全部为停用词的不同问题共用同一条缓存
+        """
+        if normalize_query(query) == query:
+            key = canonical_query(query)
+        else:
+            key = "=" + query
+        return f"{self.provider.name}:{self.max_results}:{key}"
+
+    def _cache_get(self, key: str, memory: bool = True) -> Optional[ContextResult]:
+        """依次查内存 (memory=False 时跳过)、SQLite 缓存 (SQLite 命中时回填内存)"""
+        result = self.cache.get(key) if memory else None
+        if result is None and self.disk_cache is not None:
+            try:
+                data = self.disk_cache.get(key)
+            except Exception:
+                data = None  # 持久层故障不影响搜索
+            if data is not None:
+                result = self._from_dict(data)
+                self.cache.put(key, result)
+        return result
+
+    def _cache_put(self, key: str, result: ContextResult, ttl: Optional[float] = None):
+        """写入内存与 SQLite 缓存 (ttl 默认使用缓存的有效期)"""
+        self.cache.put(key, result, ttl=ttl)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.put(key, self.to_dict(result), ttl=ttl)
+            except Exception:
+                pass
 
     def _extract_keywords(self, question: str) -> str:
         """
         从问题中提取关键词用于搜索
 
         策略:
-        - 移除停用词
+        - 全角转半角、统一小写
+        - 一次扫描移除停用词与标点 (见 normalize_query)
         - 添加运势相关词汇
         """
-        # 停用词
-        stop_words = [
-            "吗", "呢", "啊", "呀", "吧", "了", "的", "是", "会",
-            "能", "可以", "应该", "怎么", "什么", "如何", "为什么",
-            "我", "你", "他", "她", "它", "我们", "他们",
-            "请问", "想问", "问一下", "帮我", "帮忙",
-        ]
-
-        # 清理问题
-        query = question
-        for word in stop_words:
-            query = query.replace(word, " ")
-
-        # 移除多余空格
-        query = re.sub(r"\s+", " ", query).strip()
+        query = normalize_query(question)
 
         # 如果结果太短，使用原问题
         if len(query) < 4:
@@ -84,7 +389,7 @@ class ContextCrawler:
 
     def search(self, question: str) -> ContextResult:
         """
-        执行搜索获取外应
+        执行搜索获取外应 (同步，先查缓存)
 
         Args:
             question: 用户的问题
@@ -92,59 +397,55 @@ class ContextCrawler:
         Returns:
             ContextResult: 搜索结果与摘要
         """
-        if DDGS is None:
-            return ContextResult(
-                query=question,
-                results=[],
-                summary="外应模块未启用 (duckduckgo_search 未安装)",
-                success=False,
-                error="duckduckgo_search library not installed",
-            )
-
         # 提取搜索关键词
         query = self._extract_keywords(question)
+        key = self._cache_key(query)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        return self._fetch(query, key)
+
+    def _lookup_or_fetch(self, query: str, key: str) -> ContextResult:
+        """查 SQLite 缓存，未命中则请求搜索源 (search_async 的线程池工作函数)"""
+        cached = self._cache_get(key, memory=False)
+        if cached is not None:
+            return cached
+        return self._fetch(query, key)
 
+    def _fetch(self, query: str, key: str) -> ContextResult:
+        """请求搜索源并写入缓存"""
         try:
             # 执行搜索
-            with DDGS() as ddgs:
-                results = list(ddgs.text(
-                    query,
-                    max_results=self.max_results,
-                    region="cn-zh",  # 中国区域，中文结果
-                ))
-
-            if not results:
-                return ContextResult(
+            search_results = self.provider.search(query, self.max_results)
+
+            if not search_results:
+                result = ContextResult(
                     query=query,
                     results=[],
                     summary="未找到相关外应信息",
                     success=True,
                 )
+                self._cache_put(key, result)
+                return result
 
-            # 解析结果
-            search_results = []
-            summaries = []
-
-            for r in results:
-                sr = SearchResult(
-                    title=r.get("title", ""),
-                    snippet=r.get("body", ""),
-                    url=r.get("href", ""),
-                )
-                search_results.append(sr)
-                if sr.snippet:
-                    summaries.append(sr.snippet[:100])
-
-            # 生成综合摘要
-            summary = "；".join(summaries[:3]) if summaries else "无相关外应"
-
-            return ContextResult(
+            result = ContextResult(
                 query=query,
                 results=search_results,
-                summary=summary,
+                summary=self._summarize(search_results),
                 success=True,
             )
+            # 开启正文抓取时这只是中间结果: 短期缓存，过期后重新搜索并抓取正文
+            self._cache_put(key, result, ttl=self._partial_ttl if self.fetcher is not None else None)
+            return result
 
+        except ProviderUnavailable as e:
+            return ContextResult(
+                query=query,
+                results=[],
+                summary=f"外应模块未启用 ({e.reason})",
+                success=False,
+                error=e.error,
+            )
         except Exception as e:
             return ContextResult(
                 query=query,
@@ -154,6 +455,151 @@ class ContextCrawler:
                 error=str(e),
             )
 
+    def _summarize(self, results: list[SearchResult]) -> str:
+        """综合摘要: 前三条结果的正文 (有正文时) 或搜索摘要节选"""
+        summaries = [
+            r.content[:ARTICLE_SUMMARY_CHARS] if r.content else r.snippet[:SNIPPET_SUMMARY_CHARS]
+            for r in results
+            if r.content or r.snippet
+        ]
+        return "；".join(summaries[:3]) if summaries else "无相关外应"
+
+    async def _enrich(self, result: ContextResult, key: str, deadline: float) -> ContextResult:
+        """
+        抓取结果页正文并重新生成摘要 (截止时间内的部分正文同样采用)
+
+        全部页面处理完毕时按缓存有效期缓存; 有页面因截止时间未完成时只短期缓存，
+        过期后重新抓取
+        """
+        articles = await self.fetcher.fetch_all([r.url for r in result.results], deadline)
+        ttl = None if all(a.complete for a in articles) else self._partial_ttl
+        if any(a.text for a in articles):
+            results = [replace(r, content=a.text) for r, a in zip(result.results, articles)]
+            result = replace(result, results=results, summary=self._summarize(results))
+        self._cache_put(key, result, ttl=ttl)
+        return result
+
+    def prefetch(self, question: str) -> str:
+        """
+        在后台开始搜索 (须在事件循环中调用)
+
+        Args:
+            question: 用户的问题
+
+        Returns:
+            预取凭证，传给 search_async(token=...) 以等待或复用该搜索
+        """
+        key = self._cache_key(self._extract_keywords(question))
+        task = asyncio.ensure_future(self.search_async(question))
+        # 保留任务引用直到完成，避免后台任务被提前回收
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+        token = secrets.token_urlsafe(16)
+        self.prefetches.put(token, (key, task))
+        self.prefetch_started += 1
+        return token
+
+    async def search_async(
+        self,
+        question: str,
+        timeout: Optional[float] = None,
+        token: Optional[str] = None,
+    ) -> ContextResult:
+        """
+        异步搜索: 内存缓存未命中时在有界线程池中查询，不阻塞事件循环
+
+        - 携带有效的预取凭证且问题关键词一致时，直接等待或复用预取的搜索;
+          凭证过期、未知、问题已修改或预取失败 (如超时) 时按正常流程搜索
+        - 相同关键词的并发调用合并为一次上游请求 (SingleFlight)
+        - 线程池满时请求排队等待，排队时间计入截止时间; 所有等待者都超时后，
+          尚未开始的搜索被取消，已开始的搜索在后台线程中自然结束 (DDGS 自身也有 timeout 限制)
+
+        Args:
+            question: 用户的问题
+            timeout: 截止时间 (秒)，默认使用 self.timeout
+            token: prefetch 返回的预取凭证 (可选)
+
+        Returns:
+            ContextResult: 搜索结果; 超时返回 success=False
+        """
+        timeout = self.timeout if timeout is None else timeout
+        query = self._extract_keywords(question)
+        key = self._cache_key(query)
+
+        if token is not None:
+            prefetched = self.prefetches.get(token)
+            if prefetched is not None and prefetched[0] == key:
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                try:
+                    # shield: 本请求超时或断开不影响预取任务本身
+                    result = await asyncio.wait_for(asyncio.shield(prefetched[1]), timeout=timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    return self._timeout_result(question, timeout)
+                if result.success:
+                    self.prefetch_used += 1
+                    return result
+                # 预取失败: 用剩余时间重新搜索
+                self.prefetch_failed += 1
+                timeout -= loop.time() - start
+                if timeout <= 0:
+                    return result
+            else:
+                self.prefetch_missed += 1
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        async def run():
+            result = await loop.run_in_executor(
+                self._get_executor(), self._lookup_or_fetch, query, key
+            )
+            if (
+                self.fetcher is not None
+                and result.success
+                and result.results
+                and not any(r.content for r in result.results)
+            ):
+                budget = min(self.fetcher.deadline, deadline - loop.time() - FETCH_MARGIN)
+                if budget > 0:
+                    result = await self._enrich(result, key, budget)
+            return result
+
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(self.flight.do(key, run), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return self._timeout_result(question, timeout)
+        finally:
+            self.in_flight -= 1
+
+    def _timeout_result(self, question: str, timeout: float) -> ContextResult:
+        """搜索超时的结果"""
+        return ContextResult(
+            query=question,
+            results=[],
+            summary="外应搜索超时",
+            success=False,
+            error=f"search timed out after {timeout}s",
+        )
+
+    def _from_dict(self, data: dict) -> ContextResult:
+        """由 to_dict 的结果还原 ContextResult"""
+        return ContextResult(
+            query=data["query"],
+            results=[SearchResult(**r) for r in data["results"]],
+            summary=data["summary"],
+            success=data["success"],
+            error=data.get("error"),
+        )
+
     def to_dict(self, result: ContextResult) -> dict:
         """将结果转换为字典格式"""
         return {
@@ -163,6 +609,7 @@ class ContextCrawler:
                     "title": r.title,
                     "snippet": r.snippet,
                     "url": r.url,
+                    "content": r.content,
                 }
                 for r in result.results
             ],
@@ -5,11 +5,19 @@
 - 计算本命卦 (根据出生年份和性别)
 - 计算流年飞星 (当年吉凶方位)
 - 提供风水布局建议
+- 流年以立春为岁首 (节气表见 solar_terms.py)，月飞星、日飞星见 fengshui_calendar.py
+- 户型九宫分析 (见 fengshui_floorplan.py)
+
+流年飞星只有 9 种盘面 (每颗中宫星一种)，本命卦在 1900-2100 年 × 性别范围内
+也只是一张小表，二者连同字典形式在首次使用时全部预计算，计算时只需查表
 """
 
-from dataclasses import dataclass
-from typing import Literal
-from datetime import datetime
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Literal, Mapping, Optional
+from datetime import date
+
+from .solar_terms import DEFAULT_SOLAR_TERMS_PATH, SolarTermTable, solar_year
 
 
 # 九星信息
@@ -48,44 +56,146 @@ MING_GUA_MAP = {
 EAST_LIFE = [1, 3, 4, 9]
 WEST_LIFE = [2, 6, 7, 8]
 
+# 本命卦、流年飞星的预计算年份范围 (含首尾，超出范围时现算)
+TABLE_START_YEAR = 1900
+TABLE_END_YEAR = 2100
+
+GENDERS = ("male", "female")
+
+# 流年中宫星基准 (简化公式，标准公式较复杂，此处使用近似算法)
+ANNUAL_BASE_YEAR = 2024  # 已知2024年五黄入中
+ANNUAL_BASE_CENTER = 5
 
-@dataclass
+
+@dataclass(frozen=True)
 class MingGuaResult:
-    """本命卦结果"""
+    """本命卦结果 (只读，同一卦数共享同一对象)"""
     gua_number: int
     gua_name: str
     element: str
     best_direction: str
     life_group: str  # 东四命/西四命
-    favorable_directions: list[str]
-    unfavorable_directions: list[str]
+    favorable_directions: tuple[str, ...]
+    unfavorable_directions: tuple[str, ...]
 
 
-@dataclass
+@dataclass(frozen=True)
 class FlyingStarResult:
-    """流年飞星结果"""
+    """流年飞星结果 (只读，除年份外同一中宫星共享盘面数据)"""
     year: int
     center_star: int
-    positions: dict[str, dict]  # 方位 -> 星信息
-    auspicious: list[str]  # 吉方
-    inauspicious: list[str]  # 凶方
+    positions: Mapping[str, Mapping]  # 方位 -> 星信息
+    auspicious: tuple[str, ...]  # 吉方
+    inauspicious: tuple[str, ...]  # 凶方
     wealth_position: str  # 财位
     romance_position: str  # 桃花位
 
 
-@dataclass
+@dataclass(frozen=True)
 class FengshuiResult:
     """完整风水分析结果"""
     ming_gua: MingGuaResult
     flying_stars: FlyingStarResult
-    recommendations: list[str]
+    recommendations: tuple[str, ...]
+
+
+def annual_center_star(year):
+    """
+    某年的流年中宫星 (逐年逆行)
+
+    规则: 使用三元九运，计算某年的九宫飞星分布。
+    year 可为整数或 NumPy 整数数组 (向量化计算)
+    """
+    diff = year - ANNUAL_BASE_YEAR
+    return ((ANNUAL_BASE_CENTER - diff - 1) % 9) + 1
+
+
+# 预计算表 (首次使用时构建)
+# 本命卦数: 下标 (年份 - 起始年) * 2 + 性别
+_MING_GUA_NUMBERS: Optional[bytes] = None
+# 卦数 -> (本命卦结果, 字典形式)
+_MING_GUA_RESULTS: Optional[dict[int, tuple[MingGuaResult, dict]]] = None
+# 中宫星 1-9 -> (年份待填的飞星盘, 不含年份的字典形式)，下标为中宫星 - 1
+_FLYING_STAR_CHARTS: Optional[tuple[tuple[FlyingStarResult, dict], ...]] = None
+# 预计算范围内各年的流年飞星 (与上表共享盘面数据)，下标为年份 - 起始年
+_FLYING_STARS_BY_YEAR: Optional[tuple[FlyingStarResult, ...]] = None
+# (卦数, 中宫星) -> (流年财位之前的建议, 之后的建议)，含年份的财位建议按年生成
+_RECOMMENDATIONS: Optional[dict[tuple[int, int], tuple[tuple[str, ...], tuple[str, ...]]]] = None
+
+
+def _ming_gua_tables() -> tuple[bytes, dict[int, tuple[MingGuaResult, dict]]]:
+    """获取 (必要时构建) 本命卦表"""
+    global _MING_GUA_NUMBERS, _MING_GUA_RESULTS
+    if _MING_GUA_RESULTS is None:
+        calc = FengshuiCalculator(solar_terms_path=None)
+        numbers = bytes(
+            calc._ming_gua_number(year, gender)
+            for year in range(TABLE_START_YEAR, TABLE_END_YEAR + 1)
+            for gender in GENDERS
+        )
+        results = {}
+        for gua_num in MING_GUA_MAP:
+            result = calc._compute_ming_gua(gua_num)
+            results[gua_num] = (result, calc._ming_gua_to_dict(result))
+        _MING_GUA_NUMBERS = numbers
+        _MING_GUA_RESULTS = results
+    return _MING_GUA_NUMBERS, _MING_GUA_RESULTS
+
+
+def _flying_star_charts() -> tuple[tuple[FlyingStarResult, dict], ...]:
+    """获取 (必要时构建) 9 种流年飞星盘"""
+    global _FLYING_STAR_CHARTS
+    if _FLYING_STAR_CHARTS is None:
+        calc = FengshuiCalculator(solar_terms_path=None)
+        charts = []
+        for center_star in range(1, 10):
+            chart = calc._compute_flying_stars(center_star)
+            charts.append((chart, calc._flying_stars_to_dict(chart)))
+        _FLYING_STAR_CHARTS = tuple(charts)
+    return _FLYING_STAR_CHARTS
+
+
+def _flying_stars_by_year() -> tuple[FlyingStarResult, ...]:
+    """获取 (必要时构建) 预计算范围内各年的流年飞星"""
+    global _FLYING_STARS_BY_YEAR
+    if _FLYING_STARS_BY_YEAR is None:
+        calc = FengshuiCalculator(solar_terms_path=None)
+        charts = _flying_star_charts()
+        _FLYING_STARS_BY_YEAR = tuple(
+            replace(charts[calc.center_star(year) - 1][0], year=year)
+            for year in range(TABLE_START_YEAR, TABLE_END_YEAR + 1)
+        )
+    return _FLYING_STARS_BY_YEAR
+
+
+def _recommendation_table() -> dict[tuple[int, int], tuple[tuple[str, ...], tuple[str, ...]]]:
+    """获取 (必要时构建) 本命卦 × 中宫星的布局建议 (不含年份相关的财位建议)"""
+    global _RECOMMENDATIONS
+    if _RECOMMENDATIONS is None:
+        calc = FengshuiCalculator(solar_terms_path=None)
+        _, ming_guas = _ming_gua_tables()
+        table = {}
+        for gua_num, (ming_gua, _) in ming_guas.items():
+            for chart, _ in _flying_star_charts():
+                table[gua_num, chart.center_star] = (
+                    tuple(calc._ming_gua_recommendations(ming_gua)),
+                    tuple(calc._flying_star_recommendations(chart)),
+                )
+        _RECOMMENDATIONS = table
+    return _RECOMMENDATIONS
 
 
 class FengshuiCalculator:
     """风水计算器"""
 
-    def __init__(self):
-        pass
+    def __init__(self, solar_terms_path: Optional[str] = DEFAULT_SOLAR_TERMS_PATH):
+        """
+        初始化计算器
+
+        Args:
+            solar_terms_path: 节气表文件路径 (None 或文件不存在时用 lunar_python 计算)
+        """
+        self.solar_terms = SolarTermTable.load(solar_terms_path) if solar_terms_path else None
 
     def _reduce_to_single(self, num: int) -> int:
         """将数字迭代相加至个位数"""
@@ -93,11 +203,9 @@ class FengshuiCalculator:
             num = sum(int(d) for d in str(num))
         return num
 
-    def calculate_ming_gua(
-        self, birth_year: int, gender: Literal["male", "female"]
-    ) -> MingGuaResult:
+    def _ming_gua_number(self, birth_year: int, gender: Literal["male", "female"]) -> int:
         """
-        计算本命卦
+        按公式计算本命卦数 (不查表)
 
         规则:
         - 男: 11 - (年份后两位数字之和迭代至个位)
@@ -133,18 +241,22 @@ class FengshuiCalculator:
         if gua_num == 5:
             gua_num = 2 if gender == "male" else 8
 
+        return gua_num
+
+    def _compute_ming_gua(self, gua_num: int) -> MingGuaResult:
+        """由卦数构建本命卦结果 (不查表)"""
         # 获取卦信息
         gua_info = MING_GUA_MAP[gua_num]
 
         # 判断东四命/西四命
         if gua_num in EAST_LIFE:
             life_group = "东四命"
-            favorable_dirs = ["北", "南", "东", "东南"]
-            unfavorable_dirs = ["西", "西北", "西南", "东北"]
+            favorable_dirs = ("北", "南", "东", "东南")
+            unfavorable_dirs = ("西", "西北", "西南", "东北")
         else:
             life_group = "西四命"
-            favorable_dirs = ["西", "西北", "西南", "东北"]
-            unfavorable_dirs = ["北", "南", "东", "东南"]
+            favorable_dirs = ("西", "西北", "西南", "东北")
+            unfavorable_dirs = ("北", "南", "东", "东南")
 
         return MingGuaResult(
             gua_number=gua_num,
@@ -156,20 +268,31 @@ class FengshuiCalculator:
             unfavorable_directions=unfavorable_dirs,
         )
 
-    def calculate_flying_stars(self, year: int) -> FlyingStarResult:
+    def ming_gua_number(self, birth_year: int, gender: Literal["male", "female"]) -> int:
+        """本命卦数 (预计算范围内查表)"""
+        if TABLE_START_YEAR <= birth_year <= TABLE_END_YEAR:
+            numbers, _ = _ming_gua_tables()
+            return numbers[(birth_year - TABLE_START_YEAR) * 2 + (gender != "male")]
+        return self._ming_gua_number(birth_year, gender)
+
+    def calculate_ming_gua(
+        self, birth_year: int, gender: Literal["male", "female"]
+    ) -> MingGuaResult:
         """
-        计算流年飞星
+        计算本命卦 (查表，规则见 _ming_gua_number)
 
-        规则: 使用三元九运，计算某年的九宫飞星分布
+        Returns:
+            MingGuaResult: 只读结果，同一卦数返回同一对象
         """
-        # 计算中宫星 (简化公式)
-        # 标准公式较复杂，此处使用近似算法
-        base_year = 2024  # 已知2024年五黄入中
-        base_center = 5
+        _, results = _ming_gua_tables()
+        return results[self.ming_gua_number(birth_year, gender)][0]
 
-        diff = year - base_year
-        center_star = ((base_center - diff - 1) % 9) + 1
+    def center_star(self, year: int) -> int:
+        """某年的流年中宫星 (见 annual_center_star)"""
+        return annual_center_star(year)
 
+    def _compute_flying_stars(self, center_star: int, year: int = 0) -> FlyingStarResult:
+        """按中宫星排出九宫飞星盘 (不查表)"""
         # 按洛书顺序飞星
         # 洛书顺序: 中->西北->西->东北->南->北->西南->东->东南
         luo_shu_order = [5, 6, 7, 8, 9, 1, 2, 3, 4]
@@ -180,13 +303,13 @@ class FengshuiCalculator:
             # 计算该方位的星
             star_num = ((center_star + luo_shu_order[i] - 5 - 1) % 9) + 1
             star_info = NINE_STARS[star_num]
-            positions[direction] = {
+            positions[direction] = MappingProxyType({
                 "star_number": star_num,
                 "star_name": star_info["name"],
                 "element": star_info["element"],
                 "nature": star_info["nature"],
                 "effect": star_info["effect"],
-            }
+            })
 
         # 找出吉凶方位
         auspicious = []
@@ -214,20 +337,91 @@ class FengshuiCalculator:
         return FlyingStarResult(
             year=year,
             center_star=center_star,
-            positions=positions,
-            auspicious=auspicious,
-            inauspicious=inauspicious,
+            positions=MappingProxyType(positions),
+            auspicious=tuple(auspicious),
+            inauspicious=tuple(inauspicious),
             wealth_position=wealth_pos,
             romance_position=romance_pos,
         )
 
+    def calculate_flying_stars(self, year: int) -> FlyingStarResult:
+        """
+        计算流年飞星 (查表; 超出预计算范围时复用 9 种盘面之一并填入年份)
+        """
+        if TABLE_START_YEAR <= year <= TABLE_END_YEAR:
+            return _flying_stars_by_year()[year - TABLE_START_YEAR]
+        chart, _ = _flying_star_charts()[self.center_star(year) - 1]
+        return replace(chart, year=year)
+
+    def solar_year(self, day: date) -> int:
+        """某日所属的流年 (以立春为岁首)"""
+        return solar_year(day, self.solar_terms)
+
+    def flying_star_days(self, start: date, end: date):
+        """
+        日期范围内每天的年、月、日飞星 (向量化，见 fengshui_calendar.py)
+
+        Returns:
+            FlyingStarDays: 列式结果
+        """
+        from .fengshui_calendar import flying_star_days
+
+        return flying_star_days(start, end, self.solar_terms)
+
+    def iter_daily_charts(self, year: int):
+        """逐日生成某公历年的日飞星盘 (NDJSON 字节串，每行一天)"""
+        from .fengshui_calendar import iter_daily_charts
+
+        return iter_daily_charts(year, self.solar_terms)
+
+    def analyze_floor_plan(
+        self,
+        grid,
+        facing: str,
+        birth_year: int,
+        gender: Literal["male", "female"],
+        year: Optional[int] = None,
+        room_names: Optional[dict[int, str]] = None,
+    ):
+        """
+        户型九宫分析: 叠加流年飞星与本命吉凶方位为各房间评分
+
+        Args:
+            grid: (N, M) 房间编号网格，-1 表示非房间格子
+            facing: 网格上方所对的方位
+            birth_year: 出生年份
+            gender: 性别
+            year: 流年年份 (默认今天所属的流年)
+            room_names: 房间编号 -> 名称
+
+        Returns:
+            FloorPlanResult: 见 fengshui_floorplan.py
+        """
+        from .fengshui_floorplan import analyze_floor_plan
+
+        if year is None:
+            year = self.solar_year(date.today())
+        return analyze_floor_plan(
+            grid,
+            facing,
+            self.calculate_flying_stars(year),
+            self.calculate_ming_gua(birth_year, gender),
+            room_names=room_names,
+        )
+
     def generate_recommendations(
         self, ming_gua: MingGuaResult, flying_stars: FlyingStarResult
     ) -> list[str]:
         """生成风水布局建议"""
+        return [
+            *self._ming_gua_recommendations(ming_gua),
+            self._wealth_recommendation(flying_stars.year, flying_stars.wealth_position),
+            *self._flying_star_recommendations(flying_stars),
+        ]
+
+    def _ming_gua_recommendations(self, ming_gua: MingGuaResult) -> list[str]:
+        """基于本命卦的建议"""
         recs = []
-
-        # 基于本命卦
         recs.append(
             f"命主属「{ming_gua.life_group}」，本命卦为「{ming_gua.gua_name}」。"
         )
@@ -235,12 +429,15 @@ class FengshuiCalculator:
             f"个人吉方为：{'、'.join(ming_gua.favorable_directions)}；"
             f"不利方位：{'、'.join(ming_gua.unfavorable_directions)}。"
         )
+        return recs
 
-        # 基于流年飞星
-        recs.append(
-            f"{flying_stars.year}年流年财位在「{flying_stars.wealth_position}」，"
-            f"可摆放绿植或流水摆件催财。"
-        )
+    def _wealth_recommendation(self, year: int, wealth_position: str) -> str:
+        """流年财位建议 (唯一与年份相关的一条)"""
+        return f"{year}年流年财位在「{wealth_position}」，可摆放绿植或流水摆件催财。"
+
+    def _flying_star_recommendations(self, flying_stars: FlyingStarResult) -> list[str]:
+        """基于流年飞星的建议 (与年份无关，只取决于盘面)"""
+        recs = []
         recs.append(
             f"桃花位在「{flying_stars.romance_position}」，单身者可在此方位放置鲜花。"
         )
@@ -265,17 +462,22 @@ class FengshuiCalculator:
         Args:
             birth_year: 出生年份
             gender: 性别 ("male" 或 "female")
-            current_year: 流年年份 (默认当前年)
+            current_year: 流年年份 (默认今天所属的流年，以立春为界)
 
         Returns:
             FengshuiResult: 完整风水分析结果
         """
         if current_year is None:
-            current_year = datetime.now().year
+            current_year = self.solar_year(date.today())
 
         ming_gua = self.calculate_ming_gua(birth_year, gender)
         flying_stars = self.calculate_flying_stars(current_year)
-        recommendations = self.generate_recommendations(ming_gua, flying_stars)
+        before, after = _recommendation_table()[ming_gua.gua_number, flying_stars.center_star]
+        recommendations = (
+            *before,
+            self._wealth_recommendation(current_year, flying_stars.wealth_position),
+            *after,
+        )
 
         return FengshuiResult(
             ming_gua=ming_gua,
@@ -283,25 +485,40 @@ class FengshuiCalculator:
             recommendations=recommendations,
         )
 
+    def _ming_gua_to_dict(self, ming_gua: MingGuaResult) -> dict:
+        """本命卦结果的字典形式"""
+        return {
+            "gua_number": ming_gua.gua_number,
+            "gua_name": ming_gua.gua_name,
+            "element": ming_gua.element,
+            "life_group": ming_gua.life_group,
+            "best_direction": ming_gua.best_direction,
+            "favorable_directions": ming_gua.favorable_directions,
+            "unfavorable_directions": ming_gua.unfavorable_directions,
+        }
+
+    def _flying_stars_to_dict(self, flying_stars: FlyingStarResult) -> dict:
+        """飞星盘的字典形式 (不含年份)"""
+        return {
+            "center_star": flying_stars.center_star,
+            "wealth_position": flying_stars.wealth_position,
+            "romance_position": flying_stars.romance_position,
+            "auspicious": flying_stars.auspicious,
+            "inauspicious": flying_stars.inauspicious,
+        }
+
     def to_dict(self, result: FengshuiResult) -> dict:
-        """将结果转换为字典格式"""
+        """
+        将结果转换为字典格式
+
+        本命卦与飞星盘的字典形式已预计算 (列表字段为只读元组)，
+        此处只做浅拷贝，避免调用方修改共享数据
+        """
+        _, ming_guas = _ming_gua_tables()
+        _, ming_gua = ming_guas[result.ming_gua.gua_number]
+        _, chart = _flying_star_charts()[result.flying_stars.center_star - 1]
         return {
-            "ming_gua": {
-                "gua_number": result.ming_gua.gua_number,
-                "gua_name": result.ming_gua.gua_name,
-                "element": result.ming_gua.element,
-                "life_group": result.ming_gua.life_group,
-                "best_direction": result.ming_gua.best_direction,
-                "favorable_directions": result.ming_gua.favorable_directions,
-                "unfavorable_directions": result.ming_gua.unfavorable_directions,
-            },
-            "flying_stars": {
-                "year": result.flying_stars.year,
-                "center_star": result.flying_stars.center_star,
-                "wealth_position": result.flying_stars.wealth_position,
-                "romance_position": result.flying_stars.romance_position,
-                "auspicious": result.flying_stars.auspicious,
-                "inauspicious": result.flying_stars.inauspicious,
-            },
-            "recommendations": result.recommendations,
+            "ming_gua": dict(ming_gua),
+            "flying_stars": {"year": result.flying_stars.year, **chart},
+            "recommendations": list(result.recommendations),
         }
@@ -0,0 +1,167 @@
+"""
+年 / 月 / 日飞星历 (Flying Star Calendar)
+
+规则:
+- 流年: 以立春为岁首，中宫星沿用 fengshui.annual_center_star
+- 月飞星: 以十二节 (立春、惊蛰 ... 小寒) 为月首。子午卯酉年寅月八白入中，
+  辰戌丑未年寅月五黄入中，寅申巳亥年寅月二黑入中，逐月逆行
+- 日飞星: 冬至前后最近的甲子日起一白顺行 (阳遁)，
+  夏至前后最近的甲子日起九紫逆行 (阴遁)
+- 盘面统一复用 FengshuiCalculator 预计算的 9 种飞星盘
+
+交节日期来自 solar_terms 节气表，精度为天。
+任意日期范围均以 NumPy 向量化计算; iter_daily_charts 按月分块生成，
+流式输出一整年时无需在内存中构建完整列表。
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from .fengshui import _flying_star_charts, annual_center_star
+from .solar_terms import DONG_ZHI, JIE_POSITIONS, XIA_ZHI, SolarTermTable, term_ordinals
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 寅月入中星: 按年支 % 3 (0 = 子午卯酉, 1 = 丑辰未戌, 2 = 寅巳申亥)
+MONTH_START_STAR = (8, 5, 2)
+
+# 1900-01-01 为甲戌日 (甲子序号 10)
+_JIAZI_EPOCH = date(1900, 1, 1).toordinal() - 10
+
+# 1970-01-01 的公历序数 (datetime64 与 date.toordinal 换算)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def day_jiazi(ordinal):
+    """公历序数 -> 日柱甲子序号 (支持 NumPy 数组)"""
+    return (ordinal - _JIAZI_EPOCH) % 60
+
+
+def _nearest_jiazi_day(ordinal):
+    """距离某日最近的甲子日 (前后相距 30 天时取后者，支持 NumPy 数组)"""
+    import numpy as np
+
+    offset = day_jiazi(ordinal)
+    return np.where(offset < 30, ordinal - offset, ordinal + 60 - offset)
+
+
+@dataclass(frozen=True)
+class FlyingStarDays:
+    """逐日飞星 (列式数组，第 i 行对应第 i 天)"""
+    dates: np.ndarray        # (N,) datetime64[D]
+    solar_year: np.ndarray   # (N,) 以立春为岁首的年份
+    month: np.ndarray        # (N,) 节令月 (0 = 寅月 ... 11 = 丑月)
+    year_star: np.ndarray    # (N,) 流年中宫星
+    month_star: np.ndarray   # (N,) 流月中宫星
+    day_star: np.ndarray     # (N,) 流日中宫星
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+def flying_star_days(
+    start: date, end: date, table: Optional[SolarTermTable] = None
+) -> FlyingStarDays:
+    """
+    计算日期范围内 (含首尾) 每天的年、月、日飞星
+
+    Args:
+        start: 起始日期
+        end: 结束日期
+        table: 节气表 (None 时用 lunar_python 逐年计算)
+
+    Returns:
+        FlyingStarDays: 列式结果
+    """
+    import numpy as np
+
+    if end < start:
+        raise ValueError("结束日期不能早于起始日期")
+
+    ordinals = np.arange(start.toordinal(), end.toordinal() + 1, dtype=np.int64)
+    # 多取一年: 年初日期需回溯上一年的大雪、冬至
+    first_year = start.year - 1
+    terms = term_ordinals(first_year, end.year, table)
+
+    # 节令月: 最近一个已交的节
+    jie = terms[:, JIE_POSITIONS].ravel()
+    k = np.searchsorted(jie, ordinals, side="right") - 1
+    position = k % 12  # 0 = 小寒, 1 = 立春 ... 11 = 大雪
+    month = (position - 1) % 12
+    solar_year = first_year + k // 12 - (position == 0)
+
+    year_star = annual_center_star(solar_year)
+    month_start = np.array(MONTH_START_STAR, dtype=np.int64)[(solar_year - 4) % 12 % 3]
+    month_star = (month_start - month - 1) % 9 + 1
+
+    # 日家九星: 夏至、冬至附近的甲子日交替作为阴遁、阳遁起点
+    anchors = np.column_stack((
+        _nearest_jiazi_day(terms[:, XIA_ZHI]),
+        _nearest_jiazi_day(terms[:, DONG_ZHI]),
+    )).ravel()
+    k = np.searchsorted(anchors, ordinals, side="right") - 1
+    elapsed = (ordinals - anchors[k]) % 9
+    day_star = np.where(k % 2 == 1, elapsed + 1, 9 - elapsed)
+
+    return FlyingStarDays(
+        dates=(ordinals - _EPOCH_ORDINAL).astype("datetime64[D]"),
+        solar_year=solar_year.astype(np.int16),
+        month=month.astype(np.uint8),
+        year_star=year_star.astype(np.uint8),
+        month_star=month_star.astype(np.uint8),
+        day_star=day_star.astype(np.uint8),
+    )
+
+
+def flying_star_days_to_dict(days: FlyingStarDays) -> dict:
+    """将逐日飞星转换为列式字典 (charts 为 9 种盘面，下标为中宫星 - 1)"""
+    return {
+        "dates": days.dates.astype(str).tolist(),
+        "solar_year": days.solar_year.tolist(),
+        "month": days.month.tolist(),
+        "year_star": days.year_star.tolist(),
+        "month_star": days.month_star.tolist(),
+        "day_star": days.day_star.tolist(),
+        "charts": [data for _, data in _flying_star_charts()],
+    }
+
+
+@lru_cache(maxsize=None)
+def _chart_fragments() -> tuple[bytes, ...]:
+    """9 种飞星盘的预编码 JSON 片段，下标为中宫星 - 1"""
+    return tuple(
+        json.dumps(data, ensure_ascii=False).encode("utf-8")
+        for _, data in _flying_star_charts()
+    )
+
+
+def iter_daily_charts(
+    year: int, table: Optional[SolarTermTable] = None
+) -> Iterator[bytes]:
+    """
+    逐日生成某公历年的日飞星盘 (NDJSON，每行一天)
+
+    按月分块向量化计算，每块用完即释放，盘面使用预编码片段拼接
+    """
+    fragments = _chart_fragments()
+    for month in range(1, 13):
+        start = date(year, month, 1)
+        end = date(year + (month == 12), month % 12 + 1, 1).toordinal() - 1
+        days = flying_star_days(start, date.fromordinal(end), table)
+        for i, day in enumerate(days.dates.astype(str).tolist()):
+            yield (
+                b'{"date":"%s","solar_year":%d,"year_star":%d,"month_star":%d,'
+                b'"day_star":%d,"chart":%s}\n'
+                % (
+                    day.encode(), days.solar_year[i], days.year_star[i],
+                    days.month_star[i], days.day_star[i],
+                    fragments[days.day_star[i] - 1],
+                )
+            )
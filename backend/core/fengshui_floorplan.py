@@ -0,0 +1,213 @@
+"""
+户型九宫分析 (Floor Plan)
+
+将 N×M 的户型网格 (每格为房间编号) 按朝向划分到九宫，
+叠加流年飞星与本命卦吉凶方位，为每个房间评分:
+- 分宫: 以户型中心为原点，中间九分之一区域为中宫，其余按方位角划入八宫 (每宫 45°)
+- 格子得分: 飞星吉凶 (大吉 +2、吉 +1、凶 -1、大凶 -2) + 本命吉方 +1 / 凶方 -1
+- 房间得分: 房间内格子得分的平均值
+
+分宫只与网格尺寸和朝向有关，结果按 (行数, 列数, 朝向) 缓存;
+格子与房间的统计均为 NumPy 向量化运算，数千格的办公层平面也在毫秒级完成
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from .cache import LRUCache
+from .fengshui import DIRECTIONS, FlyingStarResult, MingGuaResult
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 八方 (顺时针，北为 0°)，朝向即网格上方 (第 0 行) 所对的方位
+COMPASS = ("北", "东北", "东", "东南", "南", "西南", "西", "西北")
+
+# 方位 -> 洛书宫位 (1-9，5 为中宫)
+PALACE_OF = {name: number for number, name in DIRECTIONS.items()}
+
+# 飞星吉凶得分
+NATURE_SCORES = {"大吉": 2, "吉": 1, "凶": -1, "大凶": -2}
+
+# 本命吉方 / 凶方得分
+PERSONAL_SCORE = 1
+
+# 非房间格子 (墙体、户外等) 的编号
+EMPTY_CELL = -1
+
+# 分宫结果缓存: (行数, 列数, 朝向) -> 宫位数组
+_PALACE_GRIDS = LRUCache(maxsize=64)
+
+
+def palace_grid(rows: int, cols: int, facing: str) -> np.ndarray:
+    """
+    计算网格每格所属的宫位 (结果只读并缓存)
+
+    Args:
+        rows, cols: 网格尺寸
+        facing: 网格上方所对的方位 (COMPASS 之一)
+
+    Returns:
+        (rows, cols) 的 uint8 数组，元素为洛书宫位 1-9
+    """
+    import numpy as np
+
+    if facing not in COMPASS:
+        raise ValueError(f"朝向须为 {'、'.join(COMPASS)} 之一")
+
+    key = (rows, cols, facing)
+    grid = _PALACE_GRIDS.get(key)
+    if grid is not None:
+        return grid
+
+    # 格子中心的归一化坐标 (x 向右、y 向上，范围 -0.5 ~ 0.5)
+    x = (np.arange(cols) + 0.5) / cols - 0.5
+    y = 0.5 - (np.arange(rows) + 0.5) / rows
+    x, y = np.meshgrid(x, y)
+
+    # 方位角: 网格上方为朝向，顺时针增加
+    bearing = np.degrees(np.arctan2(x, y)) + COMPASS.index(facing) * 45
+    sector = np.rint(bearing / 45).astype(np.int64) % 8
+    palace_of_sector = np.array([PALACE_OF[name] for name in COMPASS], dtype=np.uint8)
+
+    grid = palace_of_sector[sector]
+    grid[np.maximum(np.abs(x), np.abs(y)) < 1 / 6] = PALACE_OF["中宫"]
+    grid.flags.writeable = False
+    _PALACE_GRIDS.put(key, grid)
+    return grid
+
+
+def palace_scores(flying_stars: FlyingStarResult, ming_gua: MingGuaResult) -> np.ndarray:
+    """
+    九宫得分表
+
+    Returns:
+        长度 10 的 int64 数组，下标为洛书宫位 (0 不使用)
+    """
+    import numpy as np
+
+    scores = np.zeros(10, dtype=np.int64)
+    for direction, info in flying_stars.positions.items():
+        scores[PALACE_OF[direction]] += NATURE_SCORES[info["nature"]]
+    for direction in ming_gua.favorable_directions:
+        scores[PALACE_OF[direction]] += PERSONAL_SCORE
+    for direction in ming_gua.unfavorable_directions:
+        scores[PALACE_OF[direction]] -= PERSONAL_SCORE
+    return scores
+
+
+@dataclass(frozen=True)
+class RoomScore:
+    """单个房间评分"""
+    room: int                    # 房间编号
+    name: str                    # 房间名称
+    cells: int                   # 格子数
+    score: float                 # 平均得分
+    palace: str                  # 主要所在宫位 (格子最多的宫位)
+    star_name: str               # 主要宫位的流年飞星
+    palaces: dict[str, int]      # 各宫位格子数
+
+
+@dataclass(frozen=True)
+class FloorPlanResult:
+    """户型分析结果"""
+    facing: str
+    year: int
+    palaces: np.ndarray          # (N, M) 每格宫位 (1-9)
+    cell_scores: np.ndarray      # (N, M) 每格得分，非房间格子为 0
+    rooms: list[RoomScore]       # 按得分降序
+
+
+def analyze_floor_plan(
+    grid,
+    facing: str,
+    flying_stars: FlyingStarResult,
+    ming_gua: MingGuaResult,
+    room_names: Optional[dict[int, str]] = None,
+) -> FloorPlanResult:
+    """
+    户型九宫分析
+
+    Args:
+        grid: (N, M) 房间编号数组，EMPTY_CELL (-1) 表示非房间格子
+        facing: 网格上方所对的方位
+        flying_stars: 流年飞星 (FengshuiCalculator.calculate_flying_stars)
+        ming_gua: 本命卦 (FengshuiCalculator.calculate_ming_gua)
+        room_names: 房间编号 -> 名称 (可选)
+
+    Returns:
+        FloorPlanResult: 每格宫位、得分与各房间评分
+    """
+    import numpy as np
+
+    grid = np.asarray(grid)
+    if grid.ndim != 2 or grid.size == 0 or not np.issubdtype(grid.dtype, np.integer):
+        raise ValueError("grid 应为非空的二维整数网格")
+    if (grid < EMPTY_CELL).any():
+        raise ValueError(f"房间编号须为非负整数 (非房间格子用 {EMPTY_CELL})")
+
+    palaces = palace_grid(*grid.shape, facing)
+    scores = palace_scores(flying_stars, ming_gua)
+    inside = grid != EMPTY_CELL
+    cell_scores = np.where(inside, scores[palaces], 0)
+
+    # 房间统计: 按 (房间, 宫位) 计数，再按房间汇总
+    room_ids, room_index = np.unique(grid[inside], return_inverse=True)
+    counts = np.bincount(
+        room_index * 10 + palaces[inside], minlength=len(room_ids) * 10
+    ).reshape(len(room_ids), 10)
+    totals = counts.sum(axis=1)
+    averages = (counts @ scores) / totals
+    dominant = counts.argmax(axis=1)
+
+    room_names = room_names or {}
+    rooms = []
+    for i in np.argsort(-averages, kind="stable"):
+        room = int(room_ids[i])
+        palace_name = DIRECTIONS[int(dominant[i])]
+        rooms.append(RoomScore(
+            room=room,
+            name=room_names.get(room, f"房间{room}"),
+            cells=int(totals[i]),
+            score=round(float(averages[i]), 3),
+            palace=palace_name,
+            star_name=flying_stars.positions[palace_name]["star_name"],
+            palaces={
+                DIRECTIONS[p]: int(counts[i, p]) for p in range(1, 10) if counts[i, p]
+            },
+        ))
+
+    return FloorPlanResult(
+        facing=facing,
+        year=flying_stars.year,
+        palaces=palaces,
+        cell_scores=cell_scores,
+        rooms=rooms,
+    )
+
+
+def floor_plan_to_dict(result: FloorPlanResult, include_grid: bool = False) -> dict:
+    """将户型分析结果转换为字典格式 (include_grid 时附带每格宫位与得分)"""
+    data = {
+        "facing": result.facing,
+        "year": result.year,
+        "rooms": [
+            {
+                "room": r.room,
+                "name": r.name,
+                "cells": r.cells,
+                "score": r.score,
+                "palace": r.palace,
+                "star_name": r.star_name,
+                "palaces": r.palaces,
+            }
+            for r in result.rooms
+        ],
+    }
+    if include_grid:
+        data["palaces"] = result.palaces.tolist()
+        data["cell_scores"] = result.cell_scores.tolist()
+    return data
@@ -0,0 +1,179 @@
+"""
+八字合婚 (Hehun) - 两个命盘的匹配评分与大规模候选检索
+
+评分项 (均为整数，查表计算):
+- 日干: 天干五合 +30，相生 +15，比和 +10，相克 -10
+- 日支 (夫妻宫): 六合 +25，三合 +15，六冲 -25
+- 年支: 六合 +10，三合 +10，六冲 -10
+- 喜用互补: 对方最旺五行为我之喜用神，每方向 +10
+
+检索: 候选按 (日干, 日支, 最旺五行, 喜用神集合) 分桶，桶内除年支外各项得分相同。
+按桶上界从高到低逐桶向量化评分，上界低于当前第 K 名时提前结束，
+无需对每个候选逐一用 Python 计算。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .bazi_engine import STEM_ELEMENT, ChartScore, score_chart, score_charts
+
+
+# 日干关系得分 [我的日干][对方日干]
+def _stem_pair_score(a: int, b: int) -> int:
+    if abs(a - b) == 5:  # 甲己、乙庚、丙辛、丁壬、戊癸
+        return 30
+    ea, eb = STEM_ELEMENT[a], STEM_ELEMENT[b]
+    diff = (eb - ea) % 5
+    if diff == 0:
+        return 10
+    if diff in (1, 4):  # 我生 / 生我
+        return 15
+    return -10
+
+
+def _branch_pair_score(a: int, b: int, combine: int, trine: int, clash: int) -> int:
+    if (a + b) % 12 == 1:  # 子丑、寅亥、卯戌、辰酉、巳申、午未
+        return combine
+    if abs(a - b) == 6:
+        return clash
+    if a != b and a % 4 == b % 4:  # 申子辰、亥卯未、寅午戌、巳酉丑
+        return trine
+    return 0
+
+
+STEM_PAIR = tuple(tuple(_stem_pair_score(a, b) for b in range(10)) for a in range(10))
+DAY_BRANCH_PAIR = tuple(
+    tuple(_branch_pair_score(a, b, 25, 15, -25) for b in range(12)) for a in range(12)
+)
+YEAR_BRANCH_PAIR = tuple(
+    tuple(_branch_pair_score(a, b, 10, 10, -10) for b in range(12)) for a in range(12)
+)
+COMPLEMENT_SCORE = 10
+
+_STEM_PAIR_NP = np.array(STEM_PAIR, dtype=np.int16)
+_DAY_BRANCH_PAIR_NP = np.array(DAY_BRANCH_PAIR, dtype=np.int16)
+_YEAR_BRANCH_PAIR_NP = np.array(YEAR_BRANCH_PAIR, dtype=np.int16)
+_YEAR_BRANCH_MAX = int(_YEAR_BRANCH_PAIR_NP.max())
+
+
+@dataclass(frozen=True)
+class CompatibilityResult:
+    """合婚评分"""
+    score: int          # 总分
+    day_stem: int       # 日干得分
+    day_branch: int     # 日支得分
+    year_branch: int    # 年支得分
+    complement: int     # 喜用互补得分
+
+
+def _dominant(score: ChartScore) -> int:
+    """最旺五行"""
+    return max(range(5), key=lambda e: score.scores[e])
+
+
+def compatibility(
+    a: tuple[int, int, int, int], b: tuple[int, int, int, int]
+) -> CompatibilityResult:
+    """
+    计算两个命盘的合婚评分
+
+    Args:
+        a, b: 年、月、日、时柱的甲子序号
+    """
+    sa, sb = score_chart(a), score_chart(b)
+
+    day_stem = STEM_PAIR[a[2] % 10][b[2] % 10]
+    day_branch = DAY_BRANCH_PAIR[a[2] % 12][b[2] % 12]
+    year_branch = YEAR_BRANCH_PAIR[a[0] % 12][b[0] % 12]
+    complement = COMPLEMENT_SCORE * (
+        (_dominant(sb) in sa.favorable) + (_dominant(sa) in sb.favorable)
+    )
+    return CompatibilityResult(
+        score=day_stem + day_branch + year_branch + complement,
+        day_stem=day_stem,
+        day_branch=day_branch,
+        year_branch=year_branch,
+        complement=complement,
+    )
+
+
+class CompatibilityIndex:
+    """候选命盘的分桶索引，用于检索最匹配的前 K 名"""
+
+    def __init__(self, pillars: np.ndarray):
+        """
+        Args:
+            pillars: (N, 4) 候选命盘的甲子序号数组
+        """
+        pillars = np.asarray(pillars)
+        scores = score_charts(pillars)
+
+        day_stem = (pillars[:, 2] % 10).astype(np.int64)
+        day_branch = (pillars[:, 2] % 12).astype(np.int64)
+        dominant = scores.scores.argmax(axis=1)
+        favorable_mask = np.zeros(len(pillars), dtype=np.int64)
+        for column in scores.favorable.T:
+            favorable_mask |= np.where(column >= 0, 1 << column.astype(np.int64), 0)
+
+        bucket = ((day_stem * 12 + day_branch) * 5 + dominant) * 32 + favorable_mask
+        order = np.argsort(bucket, kind="stable")
+        keys, starts, counts = np.unique(bucket[order], return_index=True, return_counts=True)
+
+        self.size = len(pillars)
+        self._order = order
+        self._year_branch = (pillars[order, 0] % 12).astype(np.int64)
+        self._starts = starts
+        self._counts = counts
+        # 每个桶的特征 (由分桶键还原)
+        self._bucket_mask = keys % 32
+        self._bucket_dominant = keys // 32 % 5
+        self._bucket_day_branch = keys // 160 % 12
+        self._bucket_day_stem = keys // 1920
+
+    def search(
+        self, pillars: tuple[int, int, int, int], k: int = 10
+    ) -> list[tuple[int, int]]:
+        """
+        检索最匹配的 K 个候选
+
+        Args:
+            pillars: 查询命盘的甲子序号
+            k: 返回数量
+
+        Returns:
+            [(候选下标, 总分), ...]，按总分降序
+        """
+        if k <= 0 or self.size == 0:
+            return []
+
+        query = score_chart(pillars)
+        favorable_mask = sum(1 << e for e in query.favorable)
+        query_dominant = _dominant(query)
+
+        # 每个桶除年支外的得分 (向量化)
+        base = (
+            _STEM_PAIR_NP[pillars[2] % 10, self._bucket_day_stem]
+            + _DAY_BRANCH_PAIR_NP[pillars[2] % 12, self._bucket_day_branch]
+            + COMPLEMENT_SCORE * (((favorable_mask >> self._bucket_dominant) & 1)
+                                  + ((self._bucket_mask >> query_dominant) & 1))
+        ).astype(np.int64)
+        year_row = _YEAR_BRANCH_PAIR_NP[pillars[0] % 12]
+
+        best_scores = np.empty(0, dtype=np.int64)
+        best_ids = np.empty(0, dtype=np.int64)
+        for b in np.argsort(-base, kind="stable"):
+            # 上界不超过当前第 K 名，后续桶不可能进入前 K
+            if len(best_scores) >= k and base[b] + _YEAR_BRANCH_MAX < best_scores.min():
+                break
+            start, count = self._starts[b], self._counts[b]
+            candidate_scores = base[b] + year_row[self._year_branch[start:start + count]]
+
+            best_scores = np.concatenate([best_scores, candidate_scores])
+            best_ids = np.concatenate([best_ids, self._order[start:start + count]])
+            # 按总分降序、下标升序保留前 K 名
+            keep = np.lexsort((best_ids, -best_scores))[:k]
+            best_scores, best_ids = best_scores[keep], best_ids[keep]
+
+        return [(int(i), int(s)) for i, s in zip(best_ids, best_scores)]
+
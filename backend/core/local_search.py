@@ -0,0 +1,336 @@
+"""
+本地外应语料库 (Local Search) - 基于 SQLite FTS5 的离线全文检索
+
+无法访问外网 (或不希望每次预测都等待网络搜索) 时，将新闻、文章等语料
+预先导入本地 SQLite 库，由 ContextCrawler 的 local 搜索源查询。
+
+- 分词: FTS5 自带的 unicode61 分词器把连续汉字视为一个词，因此入库前先做
+  NFKC + 小写，连续汉字切分为重叠的二元组 (如"业绩不好" -> 业绩 绩不 不好)，
+  英文与数字保持整词
+- 查询: 每个关键词作为二元组短语匹配，逐级放宽 (AND -> OR -> 拆分二元组)，
+  在最新导入的候选文档中按 bm25 排序 (标题权重高于正文)，
+  摘要取正文中首个命中位置附近的片段
+- 存储: documents 表保存原文 (url 唯一，重复导入即更新)，documents_fts 为无内容
+  (content='') 的倒排索引，不重复存储分词文本; WAL 模式，每个线程使用独立连接
+
+导入 (JSON Lines，每行一篇，字段 title / body (或 content) / url / published):
+    python -m core.local_search ingest news.jsonl [more.jsonl ...] [--db data/local_search.db]
+    python -m core.local_search stats
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import unicodedata
+from typing import Iterable, Iterator, Optional
+
+
+# 默认语料库路径 (支持环境变量覆盖)
+DEFAULT_LOCAL_SEARCH_DB = os.getenv(
+    "LOCAL_SEARCH_DB",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "local_search.db"),
+)
+
+# 标题与正文的 bm25 权重
+TITLE_WEIGHT = 3.0
+BODY_WEIGHT = 1.0
+
+# 摘要长度与命中位置之前保留的字符数
+SNIPPET_LENGTH = 120
+SNIPPET_LEAD = 20
+
+# 每批导入的文档数 (每批一个事务)
+INGEST_BATCH = 1000
+
+# 每次检索参与 bm25 排序的候选文档数上限 (取最新导入的命中文档)
+MAX_CANDIDATES = 500
+
+# 连续汉字 (含扩展 A 区与兼容区) 或连续的其他字母数字
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(f"([{_CJK}]+)|[^\\W_{_CJK}]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    published TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, content = '', tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# bm25 排序函数 (标题权重高于正文)
+_RANK = f"bm25({TITLE_WEIGHT}, {BODY_WEIGHT})"
+
+# 检索的逐级放宽顺序: (关键词连接方式, 关键词是否整体作为短语)
+# 全部关键词命中 -> 任一关键词命中 -> 任一二元组命中
+_SEARCH_STAGES = (("AND", True), ("OR", True), ("OR", False))
+
+# 先按 rowid 倒序取最新的候选文档 (FTS5 可提前终止)，再在候选中按 bm25 排序
+_SEARCH_SQL = (
+    "SELECT d.id, d.title, d.body, d.url, d.published, c.rank FROM ("
+    "SELECT rowid, rank FROM documents_fts WHERE documents_fts MATCH ? AND rank MATCH ? "
+    "ORDER BY rowid DESC LIMIT ?"
+    ") AS c JOIN documents AS d ON d.id = c.rowid ORDER BY c.rank LIMIT ?"
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    切分为索引词项
+
+    连续汉字切为重叠二元组 (单个汉字保留为一元)，字母数字保持整词，均为小写
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(unicodedata.normalize("NFKC", text).lower()):
+        run = match.group()
+        if match.group(1) and len(run) > 1:
+            tokens.extend(map(str.__add__, run, run[1:]))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def match_expression(query: str, operator: str = "OR", phrase: bool = True) -> str:
+    """
+    查询串 -> FTS5 MATCH 表达式
+
+    按空白拆分为关键词，关键词之间以 operator (AND / OR) 连接;
+    phrase 为 True 时每个关键词的二元组组成短语 (须连续出现)，
+    否则拆为独立的二元组 (用于未分词的长关键词，如"今年财运")
+    """
+    phrases = []
+    for term in query.split():
+        tokens = tokenize(term)
+        for item in ([" ".join(tokens)] if phrase and tokens else tokens):
+            item = '"%s"' % item
+            if item not in phrases:
+                phrases.append(item)
+    return f" {operator} ".join(phrases)
+
+
+def make_snippet(body: str, terms: Iterable[str], length: int = SNIPPET_LENGTH) -> str:
+    """截取正文中首个关键词命中位置附近的片段 (未命中时取开头)"""
+    lowered = unicodedata.normalize("NFKC", body).lower()
+    hits = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(min(hits) - SNIPPET_LEAD, 0) if hits else 0
+    snippet = body[start:start + length].strip()
+    if start > 0:
+        snippet = "…" + snippet
+    if start + length < len(body):
+        snippet += "…"
+    return snippet
+
+
+class LocalSearchIndex:
+    """SQLite FTS5 语料库 (线程安全，每个线程使用独立连接)"""
+
+    def __init__(self, path: str = DEFAULT_LOCAL_SEARCH_DB, create: bool = True):
+        """
+        打开语料库
+
+        Args:
+            path: 数据库文件路径
+            create: 文件不存在时是否创建 (False 时抛出 FileNotFoundError)
+        """
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(f"本地语料库不存在: {path}")
+        self.path = path
+        self._local = threading.local()
+
+        if create:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def search(self, query: str, limit: int = 3) -> list[dict]:
+        """
+        全文检索
+
+        逐级放宽匹配条件直到凑满 limit 条 (见 _SEARCH_STAGES);
+        每一级只对最新导入的 MAX_CANDIDATES 篇命中文档计算 bm25，
+        高频词查询也不必为全部命中文档打分
+
+        Args:
+            query: 以空格分隔的关键词 (如 ContextCrawler 提取的关键词)
+            limit: 最多返回条数
+
+        Returns:
+            按相关度排序的结果，字段 title / snippet / url / published / score
+        """
+        conn = self._connection()
+        rows = []
+        seen = set()
+        expressions = []
+        for operator, phrase in _SEARCH_STAGES:
+            expression = match_expression(query, operator, phrase)
+            if not expression:
+                return []
+            if expression in expressions:
+                continue  # 单个关键词时各级表达式可能相同
+            expressions.append(expression)
+            for row in conn.execute(_SEARCH_SQL, (expression, _RANK, MAX_CANDIDATES, limit)):
+                if row[0] not in seen and len(rows) < limit:
+                    seen.add(row[0])
+                    rows.append(row)
+            if len(rows) >= limit:
+                break
+
+        # 摘要定位: 完整关键词及其二元组 (逐级放宽后可能只命中二元组)
+        terms = [unicodedata.normalize("NFKC", t).lower() for t in query.split()]
+        terms += tokenize(query)
+        return [
+            {
+                "title": title,
+                "snippet": make_snippet(body, terms),
+                "url": url or "",
+                "published": published,
+                "score": round(-rank, 4),
+            }
+            for _, title, body, url, published, rank in rows
+        ]
+
+    def ingest(self, documents: Iterable[dict], batch_size: int = INGEST_BATCH) -> int:
+        """
+        批量导入文档 (url 相同的文档覆盖旧版本)
+
+        Args:
+            documents: 文档字典，字段 title / body (或 content) / url / published
+            batch_size: 每个事务导入的文档数
+
+        Returns:
+            导入的文档数 (跳过标题与正文均为空的文档)
+        """
+        conn = self._connection()
+        count = 0
+        batch = []
+
+        def flush():
+            with conn:
+                for title, body, url, published in batch:
+                    if url:
+                        old = conn.execute(
+                            "SELECT id, title, body FROM documents WHERE url = ?", (url,)
+                        ).fetchone()
+                        if old is not None:
+                            # 无内容 FTS 表删除时需提供原索引文本
+                            conn.execute("DELETE FROM documents WHERE id = ?", old[:1])
+                            conn.execute(
+                                "INSERT INTO documents_fts (documents_fts, rowid, title, body) "
+                                "VALUES ('delete', ?, ?, ?)",
+                                (old[0], " ".join(tokenize(old[1])), " ".join(tokenize(old[2]))),
+                            )
+                    rowid = conn.execute(
+                        "INSERT INTO documents (url, title, body, published) VALUES (?, ?, ?, ?)",
+                        (url, title, body, published),
+                    ).lastrowid
+                    conn.execute(
+                        "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                        (rowid, " ".join(tokenize(title)), " ".join(tokenize(body))),
+                    )
+            batch.clear()
+
+        for doc in documents:
+            title = (doc.get("title") or "").strip()
+            body = (doc.get("body") or doc.get("content") or "").strip()
+            if not title and not body:
+                continue
+            batch.append((title, body, doc.get("url") or None, doc.get("published")))
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return count
+
+    def optimize(self):
+        """合并 FTS5 索引段 (大批量导入后执行，可加快查询)"""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+    def count(self) -> int:
+        """文档总数"""
+        return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def info(self) -> dict:
+        """语料库统计"""
+        return {
+            "path": self.path,
+            "documents": self.count(),
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+
+def read_jsonl(paths: Iterable[str]) -> Iterator[dict]:
+    """逐行读取 JSON Lines 文件 ("-" 表示标准输入)"""
+    for path in paths:
+        f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"[LocalSearch] 跳过 {path}:{line_no}: {e}", file=sys.stderr)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地外应语料库")
+    parser.add_argument("--db", default=DEFAULT_LOCAL_SEARCH_DB, help="数据库文件路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="导入 JSON Lines 文档")
+    ingest.add_argument("files", nargs="+", help='JSON Lines 文件 ("-" 表示标准输入)')
+    ingest.add_argument("--batch-size", type=int, default=INGEST_BATCH)
+    ingest.add_argument("--no-optimize", action="store_true", help="导入后不合并索引段")
+
+    search = commands.add_parser("search", help="检索 (调试用)")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=3)
+
+    commands.add_parser("stats", help="语料库统计")
+
+    args = parser.parse_args()
+    try:
+        index = LocalSearchIndex(args.db, create=args.command == "ingest")
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    if args.command == "ingest":
+        count = index.ingest(read_jsonl(args.files), args.batch_size)
+        if not args.no_optimize:
+            index.optimize()
+        print(f"[LocalSearch] 已导入 {count} 篇文档，共 {index.count()} 篇 ({args.db})")
+    elif args.command == "search":
+        for result in index.search(args.query, args.limit):
+            print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(json.dumps(index.info(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
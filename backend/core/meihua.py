@@ -5,10 +5,24 @@
 - 下卦 = 第一个数 % 8 (0视为8)
 - 上卦 = 第二个数 % 8 (0视为8)
 - 变爻 = 第三个数 % 6 (0视为6)
+
+卦以 6 位整数表示 (第 n 爻对应第 n-1 位，阳爻为 1):
+- 互卦 = 2,3,4 爻为下卦、3,4,5 爻为上卦 (移位取位)
+- 变卦 = 本卦 ^ (1 << (变爻 - 1))
+
+所有起卦结果 (8×8×6 = 384 种) 在首次使用时预计算，单次与批量计算均为查表
+(NumPy 仅在首次批量计算时导入)
 """
 
+from __future__ import annotations
+
+import json
 from dataclasses import dataclass
-from typing import Literal
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Literal, Mapping, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 # 八卦基础数据 (后天八卦数)
@@ -23,6 +37,23 @@ BAGUA = {
     8: {"name": "坤", "element": "土", "nature": "地", "direction": "西南"},
 }
 
+# 三爻卦爻位编码: 初爻为最低位，阳爻为 1
+TRIGRAM_BITS = {
+    1: 0b111,  # 乾 ☰
+    2: 0b011,  # 兑 ☱
+    3: 0b101,  # 离 ☲
+    4: 0b001,  # 震 ☳
+    5: 0b110,  # 巽 ☴
+    6: 0b010,  # 坎 ☵
+    7: 0b100,  # 艮 ☶
+    8: 0b000,  # 坤 ☷
+}
+
+# 爻位编码 -> 卦数
+BITS_TRIGRAM = tuple(
+    sorted(TRIGRAM_BITS, key=TRIGRAM_BITS.get)
+)
+
 # 六十四卦表 (上卦, 下卦) -> 卦名
 HEXAGRAM_64 = {
     (1, 1): "乾为天", (1, 2): "天泽履", (1, 3): "天火同人", (1, 4): "天雷无妄",
@@ -43,6 +74,14 @@ HEXAGRAM_64 = {
     (8, 5): "地风升", (8, 6): "地水师", (8, 7): "地山谦", (8, 8): "坤为地",
 }
 
+# 六十四卦编号: (上卦数 - 1) * 8 + (下卦数 - 1)
+HEXAGRAM_NAMES = tuple(
+    HEXAGRAM_64[(i // 8 + 1, i % 8 + 1)] for i in range(64)
+)
+
+# 体用关系编码 (批量计算结果中的 relation 列)
+RELATION_CODES = ("比和", "体生用", "体克用", "用生体", "用克体", "无明显生克")
+
 # 五行生克关系
 WUXING_RELATION = {
     # 我生
@@ -60,7 +99,7 @@ WUXING_RELATION = {
 }
 
 
-@dataclass
+@dataclass(frozen=True)
 class Trigram:
     """单个卦象（三爻卦）"""
     number: int
@@ -70,7 +109,7 @@ class Trigram:
     direction: str
 
 
-@dataclass
+@dataclass(frozen=True)
 class Hexagram:
     """六爻卦象结果"""
     upper: Trigram  # 上卦
@@ -78,8 +117,13 @@ class Hexagram:
     name: str       # 卦名
     moving_line: int  # 变爻位置 (1-6)
 
+    @property
+    def bits(self) -> int:
+        """六爻编码 (低 3 位为下卦，高 3 位为上卦)"""
+        return TRIGRAM_BITS[self.upper.number] << 3 | TRIGRAM_BITS[self.lower.number]
+
 
-@dataclass
+@dataclass(frozen=True)
 class MeihuaResult:
     """梅花易数完整结果"""
     original: Hexagram   # 本卦 (现状)
@@ -91,6 +135,98 @@ class MeihuaResult:
     interpretation: str  # 吉凶判断
 
 
+@dataclass(frozen=True)
+class MeihuaOutcome:
+    """预计算的起卦结果 (全局共享，只读)"""
+    result: MeihuaResult    # 结果对象
+    data: Mapping           # to_dict 的只读视图
+    json: bytes             # 预编码的 JSON 片段
+
+
+@dataclass(frozen=True)
+class MeihuaBatchResult:
+    """批量起卦结果 (列式数组，第 i 行对应第 i 组数字)"""
+    original: np.ndarray    # 本卦编号 (0-63, 见 HEXAGRAM_NAMES)
+    mutual: np.ndarray      # 互卦编号
+    changed: np.ndarray     # 变卦编号
+    moving_line: np.ndarray # 变爻位置 (1-6)
+    ti_gua: np.ndarray      # 体卦数 (1-8, 见 BAGUA)
+    yong_gua: np.ndarray    # 用卦数
+    relation: np.ndarray    # 体用关系编码 (见 RELATION_CODES)
+
+
+# 起卦结果表: 下卦 8 × 上卦 8 × 变爻 6 = 384 种，首次使用时构建
+_OUTCOME_TABLE: Optional[tuple[MeihuaOutcome, ...]] = None
+
+# 结果表的列式版本 (供批量计算使用)
+_OUTCOME_COLUMNS: Optional[MeihuaBatchResult] = None
+
+
+def _outcome_index(num1: int, num2: int, num3: int) -> int:
+    """(num1 % 8, num2 % 8, num3 % 6) -> 结果表下标"""
+    return (num1 % 8) * 48 + (num2 % 8) * 6 + num3 % 6
+
+
+def _freeze(value):
+    """递归转换为只读结构 (dict -> MappingProxyType, list -> tuple)"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _outcome_table() -> tuple[MeihuaOutcome, ...]:
+    """获取 (必要时构建) 384 项起卦结果表"""
+    global _OUTCOME_TABLE
+    if _OUTCOME_TABLE is None:
+        calc = MeihuaCalculator()
+        table = []
+        # 按下标顺序枚举，余数 0 即对应 8 / 6
+        for r1 in range(8):
+            for r2 in range(8):
+                for r3 in range(6):
+                    result = calc._compute(r1, r2, r3)
+                    data = calc.to_dict(result)
+                    table.append(MeihuaOutcome(
+                        result=result,
+                        data=_freeze(data),
+                        json=json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                    ))
+        _OUTCOME_TABLE = tuple(table)
+    return _OUTCOME_TABLE
+
+
+def _hexagram_id(hexagram: Hexagram) -> int:
+    """卦象 -> 六十四卦编号"""
+    return (hexagram.upper.number - 1) * 8 + (hexagram.lower.number - 1)
+
+
+def _outcome_columns() -> MeihuaBatchResult:
+    """获取 (必要时构建) 结果表的列式版本"""
+    global _OUTCOME_COLUMNS
+    if _OUTCOME_COLUMNS is None:
+        import numpy as np
+
+        results = [outcome.result for outcome in _outcome_table()]
+        columns = {
+            "original": [_hexagram_id(r.original) for r in results],
+            "mutual": [_hexagram_id(r.mutual) for r in results],
+            "changed": [_hexagram_id(r.changed) for r in results],
+            "moving_line": [r.original.moving_line for r in results],
+            "ti_gua": [r.ti_gua.number for r in results],
+            "yong_gua": [r.yong_gua.number for r in results],
+            "relation": [RELATION_CODES.index(r.ti_yong_relation) for r in results],
+        }
+        arrays = {}
+        for name, values in columns.items():
+            array = np.array(values, dtype=np.uint8)
+            array.flags.writeable = False
+            arrays[name] = array
+        _OUTCOME_COLUMNS = MeihuaBatchResult(**arrays)
+    return _OUTCOME_COLUMNS
+
+
 class MeihuaCalculator:
     """梅花易数计算器"""
 
@@ -117,63 +253,33 @@ class MeihuaCalculator:
         """根据上下卦数获取六十四卦名"""
         return self.hexagram_table.get((upper_num, lower_num), "未知卦象")
 
+    def _hexagram_from_bits(self, bits: int, moving_line: int) -> Hexagram:
+        """根据六爻编码构建卦象"""
+        upper = self._get_trigram(BITS_TRIGRAM[bits >> 3])
+        lower = self._get_trigram(BITS_TRIGRAM[bits & 0b111])
+        return Hexagram(
+            upper=upper,
+            lower=lower,
+            name=self._get_hexagram_name(upper.number, lower.number),
+            moving_line=moving_line,
+        )
+
     def _calculate_mutual(self, original: Hexagram) -> Hexagram:
         """
         计算互卦
         规则: 取本卦的2,3,4爻为下卦，3,4,5爻为上卦
-        简化: 使用经典互卦算法
         """
-        # 互卦计算较复杂，这里使用简化版本
-        # 实际项目中可以根据爻位精确计算
-        upper_num = (original.upper.number + original.lower.number) % 8
-        if upper_num == 0:
-            upper_num = 8
-        lower_num = (original.lower.number + original.moving_line) % 8
-        if lower_num == 0:
-            lower_num = 8
-
-        upper = self._get_trigram(upper_num)
-        lower = self._get_trigram(lower_num)
-        name = self._get_hexagram_name(upper.number, lower.number)
-
-        return Hexagram(
-            upper=upper,
-            lower=lower,
-            name=name,
-            moving_line=original.moving_line
-        )
+        bits = original.bits
+        mutual_bits = ((bits >> 2) & 0b111) << 3 | ((bits >> 1) & 0b111)
+        return self._hexagram_from_bits(mutual_bits, original.moving_line)
 
     def _calculate_changed(self, original: Hexagram) -> Hexagram:
         """
         计算变卦
-        规则: 动爻1-3在下卦变，4-6在上卦变
+        规则: 动爻阴阳互变 (1-3 爻在下卦，4-6 爻在上卦)
         """
-        moving = original.moving_line
-
-        if moving <= 3:
-            # 下卦变
-            # 简化: 下卦数字变化
-            new_lower_num = (original.lower.number + moving) % 8
-            if new_lower_num == 0:
-                new_lower_num = 8
-            new_lower = self._get_trigram(new_lower_num)
-            new_upper = original.upper
-        else:
-            # 上卦变
-            new_upper_num = (original.upper.number + moving - 3) % 8
-            if new_upper_num == 0:
-                new_upper_num = 8
-            new_upper = self._get_trigram(new_upper_num)
-            new_lower = original.lower
-
-        name = self._get_hexagram_name(new_upper.number, new_lower.number)
-
-        return Hexagram(
-            upper=new_upper,
-            lower=new_lower,
-            name=name,
-            moving_line=moving
-        )
+        changed_bits = original.bits ^ (1 << (original.moving_line - 1))
+        return self._hexagram_from_bits(changed_bits, original.moving_line)
 
     def _determine_ti_yong(self, original: Hexagram) -> tuple[Trigram, Trigram, str]:
         """
@@ -218,9 +324,39 @@ class MeihuaCalculator:
 
         return ti_gua, yong_gua, relation, interpretation
 
+    def lookup(self, num1: int, num2: int, num3: int) -> MeihuaOutcome:
+        """
+        查表获取起卦结果
+
+        结果对象、字典视图与 JSON 片段均为预计算的共享实例，请勿修改
+
+        Args:
+            num1: 第一个数字 (用于下卦)
+            num2: 第二个数字 (用于上卦)
+            num3: 第三个数字 (用于变爻)
+
+        Returns:
+            MeihuaOutcome: 预计算结果
+        """
+        return _outcome_table()[_outcome_index(num1, num2, num3)]
+
     def calculate(self, num1: int, num2: int, num3: int) -> MeihuaResult:
         """
-        完整梅花易数起卦计算
+        完整梅花易数起卦计算 (查表，返回共享的只读结果)
+
+        Args:
+            num1: 第一个数字 (用于下卦)
+            num2: 第二个数字 (用于上卦)
+            num3: 第三个数字 (用于变爻)
+
+        Returns:
+            MeihuaResult: 包含本卦、互卦、变卦及体用分析
+        """
+        return self.lookup(num1, num2, num3).result
+
+    def _compute(self, num1: int, num2: int, num3: int) -> MeihuaResult:
+        """
+        完整梅花易数起卦计算 (不查表，用于构建结果表)
 
         Args:
             num1: 第一个数字 (用于下卦)
@@ -265,6 +401,58 @@ class MeihuaCalculator:
             interpretation=interpretation
         )
 
+    def calculate_batch(self, nums: np.ndarray) -> MeihuaBatchResult:
+        """
+        批量起卦 (向量化查表)
+
+        Args:
+            nums: 形状为 (N, 3) 的整数数组，每行为一组 (num1, num2, num3)
+
+        Returns:
+            MeihuaBatchResult: 列式结果，各列长度为 N
+        """
+        import numpy as np
+
+        nums = np.asarray(nums)
+        if nums.ndim != 2 or nums.shape[1] != 3:
+            raise ValueError(f"nums 形状应为 (N, 3)，实际为 {nums.shape}")
+        if not np.issubdtype(nums.dtype, np.integer):
+            raise ValueError(f"nums 必须为整数数组，实际为 {nums.dtype}")
+        # 统一转为 int64 (uint64 与 int64 运算会被提升为 float64，无法作为下标)
+        if nums.dtype == np.uint64 and nums.size and nums.max() > np.iinfo(np.int64).max:
+            raise ValueError("nums 超出 int64 范围")
+        nums = nums.astype(np.int64, copy=False)
+
+        # 与 _outcome_index 相同的下标计算
+        rem = nums % np.array([8, 8, 6], dtype=np.int64)
+        index = rem[:, 0] * 48 + rem[:, 1] * 6 + rem[:, 2]
+
+        columns = _outcome_columns()
+        return MeihuaBatchResult(
+            original=columns.original[index],
+            mutual=columns.mutual[index],
+            changed=columns.changed[index],
+            moving_line=columns.moving_line[index],
+            ti_gua=columns.ti_gua[index],
+            yong_gua=columns.yong_gua[index],
+            relation=columns.relation[index],
+        )
+
+    def batch_to_dict(self, result: MeihuaBatchResult) -> dict:
+        """将批量结果转换为字典格式 (列式，附编码对照表)"""
+        return {
+            "original": result.original.tolist(),
+            "mutual": result.mutual.tolist(),
+            "changed": result.changed.tolist(),
+            "moving_line": result.moving_line.tolist(),
+            "ti_gua": result.ti_gua.tolist(),
+            "yong_gua": result.yong_gua.tolist(),
+            "relation": result.relation.tolist(),
+            "hexagram_names": list(HEXAGRAM_NAMES),
+            "trigram_names": {num: info["name"] for num, info in self.bagua.items()},
+            "relation_names": list(RELATION_CODES),
+        }
+
     def to_dict(self, result: MeihuaResult) -> dict:
         """将结果转换为字典格式 (便于 JSON 序列化)"""
         return {
@@ -0,0 +1,72 @@
+"""
+请求合并 (Single Flight)
+
+同一时刻相同键的并发调用只执行一次上游请求，其余调用等待同一个结果:
+- 首个调用者 (leader) 创建任务，后续调用者直接等待该任务
+- 每个调用者可以独立取消 (如各自的截止时间)，所有等待者都离开后任务才被取消
+- 任务结束即移除，不缓存结果 (缓存由调用方负责)
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """异步请求合并器 (仅在单个事件循环内使用)"""
+
+    def __init__(self):
+        self._flights: dict[Hashable, list] = {}  # 键 -> [任务, 等待者数量]
+        self.calls = 0       # 总调用次数
+        self.executed = 0    # 实际执行次数
+        self.coalesced = 0   # 被合并的调用次数
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或加入同键的进行中调用
+
+        Args:
+            key: 合并键
+            fn: 无参函数，返回待执行的 awaitable (仅 leader 调用)
+
+        Returns:
+            上游调用结果 (异常同样传递给所有等待者)
+        """
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            flight = [task, 0]
+            self._flights[key] = flight
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.coalesced += 1
+
+        task = flight[0]
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and flight[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            flight[1] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        """任务结束后移除 (避免误删同键的新任务)"""
+        flight = self._flights.get(key)
+        if flight is not None and flight[0] is task:
+            del self._flights[key]
+
+    def info(self) -> dict:
+        """合并统计"""
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / self.calls if self.calls else 0.0,
+            "in_flight": len(self._flights),
+        }
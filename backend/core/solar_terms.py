@@ -0,0 +1,240 @@
+"""
+二十四节气表 (Solar Terms) - 预计算的交节日期查找表
+
+将 1899-2100 年每年 24 个节气的交节日期 (北京时间) 预先算好存入紧凑的二进制文件，
+运行时直接读表，跳过 lunar_python。1899 年仅用于回溯 1900 年初所在的节令。
+
+文件格式 (小端):
+- 文件头: 魔数 "SLTM"、版本、每年节气数、起始年、年数
+- 数据区: 年数 × 24 个 uint16 (交节日为当年第几天，1 起)，按 TERM_NAMES 顺序
+
+日期精度为天: 交节当天即视为已交节。表外年份或表文件缺失时，
+按年调用 lunar_python 计算并缓存。
+
+构建:
+    python -m core.solar_terms [--output data/solar_terms.bin]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+from array import array
+from datetime import date
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 默认节气表文件路径 (支持环境变量覆盖)
+DEFAULT_SOLAR_TERMS_PATH = os.getenv(
+    "SOLAR_TERMS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "solar_terms.bin"),
+)
+
+# 覆盖范围 (比八字索引多一年，用于回溯 1900 年初的节令)
+START_YEAR = 1899
+END_YEAR = 2100
+
+MAGIC = b"SLTM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHhH")  # 魔数, 版本, 每年节气数, 起始年, 年数
+
+# 公历年内的节气顺序 (偶数下标为"节"，奇数下标为"气")
+TERM_NAMES = (
+    "小寒", "大寒", "立春", "雨水", "惊蛰", "春分",
+    "清明", "谷雨", "立夏", "小满", "芒种", "夏至",
+    "小暑", "大暑", "立秋", "处暑", "白露", "秋分",
+    "寒露", "霜降", "立冬", "小雪", "大雪", "冬至",
+)
+TERMS_PER_YEAR = len(TERM_NAMES)
+TERM_INDEX = {name: i for i, name in enumerate(TERM_NAMES)}
+
+LI_CHUN = TERM_INDEX["立春"]
+XIA_ZHI = TERM_INDEX["夏至"]
+DONG_ZHI = TERM_INDEX["冬至"]
+
+# 十二节 (月令交接) 在 TERM_NAMES 中的下标: 小寒、立春、惊蛰 ... 大雪
+JIE_POSITIONS = tuple(range(0, TERMS_PER_YEAR, 2))
+
+# lunar_python 节气表中，公历当年冬至的键名 (中文键"冬至"为上一年的冬至)
+_LUNAR_KEYS = TERM_NAMES[:-1] + ("DONG_ZHI",)
+
+# 1970-01-01 的公历序数 (datetime64 与 date.toordinal 换算)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=64)
+def _compute_year(year: int) -> tuple[int, ...]:
+    """用 lunar_python 计算某公历年 24 个节气的交节日 (公历序数)"""
+    try:
+        from lunar_python import Lunar
+    except ImportError:
+        raise ImportError("请安装 lunar_python: pip install lunar_python")
+
+    table = Lunar.fromYmd(year, 1, 1).getJieQiTable()
+    ordinals = []
+    for key in _LUNAR_KEYS:
+        solar = table[key]
+        ordinals.append(date(solar.getYear(), solar.getMonth(), solar.getDay()).toordinal())
+    return tuple(ordinals)
+
+
+class SolarTermTable:
+    """内存中的节气表 (文件仅约 10KB，直接整体读入)"""
+
+    def __init__(self, path: str):
+        """
+        读取节气表文件
+
+        Args:
+            path: 节气表文件路径
+
+        Raises:
+            ValueError: 文件格式不正确
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, per_year, start_year, years = HEADER.unpack_from(data, 0)
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or per_year != TERMS_PER_YEAR
+            or len(data) != HEADER.size + years * per_year * 2
+        ):
+            raise ValueError(f"节气表文件格式错误: {path}")
+
+        days = array("H")
+        days.frombytes(data[HEADER.size:])
+        if days.itemsize != 2:
+            raise ValueError("当前平台不支持 16 位无符号整型数组")
+        if struct.pack("=H", 1) != struct.pack("<H", 1):
+            days.byteswap()
+
+        self.start_year = start_year
+        self.end_year = start_year + years - 1
+        self._days = days
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SOLAR_TERMS_PATH) -> Optional["SolarTermTable"]:
+        """加载节气表，文件不存在或损坏时返回 None"""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def get(self, year: int) -> Optional[tuple[int, ...]]:
+        """某公历年 24 个节气的交节日 (公历序数)，超出范围返回 None"""
+        if not self.start_year <= year <= self.end_year:
+            return None
+        base = date(year, 1, 1).toordinal() - 1
+        pos = (year - self.start_year) * TERMS_PER_YEAR
+        return tuple(base + d for d in self._days[pos:pos + TERMS_PER_YEAR])
+
+
+def year_terms(year: int, table: Optional[SolarTermTable] = None) -> tuple[int, ...]:
+    """
+    某公历年 24 个节气的交节日
+
+    Args:
+        year: 公历年份
+        table: 节气表 (None 或超出范围时使用 lunar_python)
+
+    Returns:
+        按 TERM_NAMES 顺序的公历序数 (date.toordinal)
+    """
+    if table is not None:
+        terms = table.get(year)
+        if terms is not None:
+            return terms
+    return _compute_year(year)
+
+
+def term_date(year: int, name: str, table: Optional[SolarTermTable] = None) -> date:
+    """某公历年某节气的交节日期"""
+    return date.fromordinal(year_terms(year, table)[TERM_INDEX[name]])
+
+
+def solar_year(day: date, table: Optional[SolarTermTable] = None) -> int:
+    """以立春为岁首的年份 (立春前属上一年)"""
+    if day.toordinal() >= year_terms(day.year, table)[LI_CHUN]:
+        return day.year
+    return day.year - 1
+
+
+def term_ordinals(
+    start_year: int, end_year: int, table: Optional[SolarTermTable] = None
+) -> np.ndarray:
+    """
+    连续多年的节气交节日 (向量化计算使用)
+
+    Returns:
+        (年数, 24) 的 int64 数组，元素为公历序数
+    """
+    import numpy as np
+
+    if (
+        table is not None
+        and table.start_year <= start_year
+        and end_year <= table.end_year
+    ):
+        years = np.arange(start_year, end_year + 1)
+        first = table.start_year * TERMS_PER_YEAR
+        days = np.frombuffer(table._days, dtype=np.uint16)[
+            start_year * TERMS_PER_YEAR - first:(end_year + 1) * TERMS_PER_YEAR - first
+        ].reshape(-1, TERMS_PER_YEAR)
+        # 每年 1 月 1 日的序数 (由 datetime64 年份换算)
+        jan1 = (years - 1970).astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+        return days.astype(np.int64) + (jan1 + _EPOCH_ORDINAL - 1)[:, None]
+
+    return np.array(
+        [year_terms(year, table) for year in range(start_year, end_year + 1)],
+        dtype=np.int64,
+    ).reshape(-1, TERMS_PER_YEAR)
+
+
+def build(path: str, start_year: int = START_YEAR, end_year: int = END_YEAR):
+    """
+    生成节气表文件
+
+    Args:
+        path: 输出路径
+        start_year: 起始年份
+        end_year: 结束年份 (含)
+    """
+    days = array("H")
+    for year in range(start_year, end_year + 1):
+        base = date(year, 1, 1).toordinal() - 1
+        terms = _compute_year(year)
+        if any(b <= a for a, b in zip(terms, terms[1:])) or terms[0] <= base or terms[-1] - base > 366:
+            raise ValueError(f"{year} 年节气日期异常: {terms}")
+        days.extend(t - base for t in terms)
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        days.byteswap()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, TERMS_PER_YEAR, start_year, end_year - start_year + 1))
+        f.write(days.tobytes())
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建二十四节气表")
+    parser.add_argument("--output", default=DEFAULT_SOLAR_TERMS_PATH, help="输出文件路径")
+    parser.add_argument("--start-year", type=int, default=START_YEAR)
+    parser.add_argument("--end-year", type=int, default=END_YEAR)
+    args = parser.parse_args()
+
+    build(args.output, args.start_year, args.end_year)
+    print(f"[SolarTerms] 已生成 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
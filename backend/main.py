@@ -3,24 +3,72 @@
 
 提供以下接口:
 - GET  /api/health          健康检查
+- GET  /api/metrics         运行指标 (缓存命中率等)
+- POST /api/context/prefetch 预取外应 (后台开始搜索，返回凭证供预测接口复用)
 - POST /api/predict/simple  简单版预测 (梅花易数)
+- POST /api/predict/simple/stream 简单版预测 (SSE 流式输出)
+- POST /api/predict/simple/batch 批量起卦 (仅梅花易数，不含外应与 AI)
 - POST /api/predict/detailed 详细版预测 (命+运+局)
+- POST /api/predict/detailed/stream 详细版预测 (SSE 流式输出)
+- POST /api/bazi/batch      八字批量统计 (身强弱、喜用神分布)
+- POST /api/hehun           八字合婚评分
+- POST /api/fengshui/calendar 日期范围内逐日的年/月/日飞星
+- GET  /api/fengshui/calendar/{year}/daily 流式输出整年日飞星盘 (NDJSON)
+- POST /api/fengshui/floorplan 户型九宫分析 (房间评分)
+- POST /api/chat             追问 AI
+- POST /api/chat/stream      追问 AI (SSE 流式输出)
+
+SSE 接口的事件顺序:
+- payload  确定性结果 (卦象 / 八字 / 风水)，不等待搜索与 AI，立即发送 (追问接口无此事件)
+- context  外应搜索结果
+- token    AI 生成的文本片段 ({"text": ...})，按顺序拼接即完整回答
+- done     结束 ({"success": ..., "error": ...})
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Path, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Literal, Optional
-from datetime import datetime
-
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Literal, Optional
+from datetime import date, datetime
+from functools import partial
+import json
+import os
+import time
+
+import core
 from core import MeihuaCalculator, BaziCalculator, FengshuiCalculator, ContextCrawler
-from services import AIService
+from services import AIService, AIStreamError, LatencyStats
+from services.similar_cache import SimilarQuestionCache
+
+# 启动时预热延迟导入的依赖 (lunar_python / duckduckgo_search / NumPy)
+# 默认关闭以保证冷启动最快，长驻部署可设置 CYBERGUA_WARMUP=1
+WARMUP = os.getenv("CYBERGUA_WARMUP", "0").lower() in ("1", "true", "yes")
+
+# 八字批量统计: 单次请求的行数上限、索引未覆盖 (需逐行调用 lunar_python) 的行数上限
+BAZI_BATCH_MAX_ROWS = int(os.getenv("BAZI_BATCH_MAX_ROWS", "200000"))
+BAZI_BATCH_MAX_UNINDEXED = int(os.getenv("BAZI_BATCH_MAX_UNINDEXED", "2000"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期: 启动时创建 AI 服务连接池并按需预热，退出时关闭连接池与搜索资源"""
+    await ai.start()
+    if WARMUP:
+        await run_in_threadpool(core.warmup)
+    yield
+    await ai.aclose()
+    await crawler.aclose()
+
 
 # 创建 FastAPI 应用
 app = FastAPI(
     title="赛博玄学 API",
     description="整合八字、梅花易数、九宫飞星的命理预测系统",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS 配置 (允许前端跨域请求)
@@ -38,6 +86,12 @@ bazi = BaziCalculator()
 fengshui = FengshuiCalculator()
 crawler = ContextCrawler()
 ai = AIService()
+# 相似问题缓存: 同一卦象 (详细版另加命盘、风水) 下措辞相近的问题复用回答，跳过搜索与 AI
+answers = SimilarQuestionCache()
+
+# SSE 接口延迟统计: 收到请求到发出第一个事件、到发出第一段 AI 文本
+sse_first_event = LatencyStats()
+sse_first_token = LatencyStats()
 
 
 # ==================== 请求/响应模型 ====================
@@ -46,6 +100,15 @@ class SimpleRequest(BaseModel):
     """简单版请求"""
     nums: list[int] = Field(..., min_length=3, max_length=3, description="三个数字 (1-64)")
     question: str = Field(..., min_length=1, max_length=500, description="问题")
+    context_token: Optional[str] = Field(None, max_length=64, description="外应预取凭证")
+    no_cache: bool = Field(False, description="跳过 AI 回复缓存 (重新生成并刷新缓存)")
+
+
+class SimpleBatchRequest(BaseModel):
+    """批量起卦请求"""
+    nums: list[Annotated[list[int], Field(min_length=3, max_length=3)]] = Field(
+        ..., min_length=1, max_length=100_000, description="多组三个数字"
+    )
 
 
 class DetailedRequest(BaseModel):
@@ -57,6 +120,98 @@ class DetailedRequest(BaseModel):
     gender: Literal["male", "female"] = Field(..., description="性别")
     nums: list[int] = Field(..., min_length=3, max_length=3, description="三个数字 (1-64)")
     question: str = Field(..., min_length=1, max_length=500, description="问题")
+    context_token: Optional[str] = Field(None, max_length=64, description="外应预取凭证")
+    no_cache: bool = Field(False, description="跳过 AI 回复缓存 (重新生成并刷新缓存)")
+
+
+class BaziBatchRequest(BaseModel):
+    """八字批量统计请求 (births 与日期范围二选一)"""
+    births: Optional[list[Annotated[list[int], Field(min_length=4, max_length=4)]]] = Field(
+        None, max_length=BAZI_BATCH_MAX_ROWS, description="出生时间列表，每项为 [年, 月, 日, 时]"
+    )
+    start_date: Optional[date] = Field(None, description="起始日期 (含)")
+    end_date: Optional[date] = Field(None, description="结束日期 (含)")
+    hours: list[Annotated[int, Field(ge=0, le=23)]] = Field(
+        default=list(range(24)), min_length=1, description="日期范围模式下每天取样的小时"
+    )
+    include_rows: bool = Field(False, description="是否返回逐行明细")
+
+    @model_validator(mode="after")
+    def check_source(self):
+        has_range = self.start_date is not None and self.end_date is not None
+        if (self.births is None) == (not has_range):
+            raise ValueError("births 与 start_date/end_date 必须二选一")
+        if has_range:
+            if self.start_date > self.end_date:
+                raise ValueError("start_date 不能晚于 end_date")
+            if self.start_date.year < 1900 or self.end_date.year > 2100:
+                raise ValueError("日期范围须在 1900-2100 年之间")
+            rows = ((self.end_date - self.start_date).days + 1) * len(self.hours)
+            if rows > BAZI_BATCH_MAX_ROWS:
+                raise ValueError(f"日期范围共 {rows} 行，超过上限 {BAZI_BATCH_MAX_ROWS}")
+        else:
+            from core.bazi_batch import validate_births
+
+            validate_births(self.births)
+        return self
+
+
+class BirthInfo(BaseModel):
+    """出生时间"""
+    birth_year: int = Field(..., ge=1900, le=2100, description="出生年份")
+    birth_month: int = Field(..., ge=1, le=12, description="出生月份")
+    birth_day: int = Field(..., ge=1, le=31, description="出生日期")
+    birth_hour: int = Field(..., ge=0, le=23, description="出生时辰 (0-23)")
+
+    def as_tuple(self) -> tuple[int, int, int, int]:
+        return (self.birth_year, self.birth_month, self.birth_day, self.birth_hour)
+
+
+class HehunRequest(BaseModel):
+    """合婚请求"""
+    person_a: BirthInfo
+    person_b: BirthInfo
+
+
+class FengshuiCalendarRequest(BaseModel):
+    """飞星历请求"""
+    start_date: date = Field(..., description="起始日期 (含)")
+    end_date: date = Field(..., description="结束日期 (含)")
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.start_date > self.end_date:
+            raise ValueError("start_date 不能晚于 end_date")
+        if self.start_date.year < 1900 or self.end_date.year > 2100:
+            raise ValueError("日期范围须在 1900-2100 年之间")
+        return self
+
+
+class FloorPlanRequest(BaseModel):
+    """户型九宫分析请求"""
+    grid: list[list[int]] = Field(
+        ..., min_length=1, max_length=2000, description="房间编号网格 (行优先)，-1 表示非房间格子"
+    )
+    facing: Literal["北", "东北", "东", "东南", "南", "西南", "西", "西北"] = Field(
+        ..., description="网格上方 (第一行) 所对的方位"
+    )
+    birth_year: int = Field(..., ge=1900, le=2100, description="出生年份")
+    gender: Literal["male", "female"] = Field(..., description="性别")
+    year: Optional[int] = Field(None, ge=1900, le=2100, description="流年 (默认当前流年)")
+    room_names: dict[int, str] = Field(default={}, description="房间编号 -> 名称")
+    include_grid: bool = Field(False, description="是否返回每格宫位与得分")
+
+    @model_validator(mode="after")
+    def check_grid(self):
+        width = len(self.grid[0])
+        if width == 0 or width > 2000 or any(len(row) != width for row in self.grid):
+            raise ValueError("grid 每行长度须一致且在 1-2000 之间")
+        return self
+
+
+class PrefetchRequest(BaseModel):
+    """外应预取请求"""
+    question: str = Field(..., min_length=1, max_length=500, description="问题")
 
 
 class HealthResponse(BaseModel):
@@ -66,6 +221,12 @@ class HealthResponse(BaseModel):
     timestamp: str
 
 
+class PrefetchResponse(BaseModel):
+    """外应预取响应"""
+    token: str
+    expires_in: float
+
+
 class SimpleResponse(BaseModel):
     """简单版响应"""
     hexagram: dict
@@ -75,6 +236,20 @@ class SimpleResponse(BaseModel):
     error: Optional[str] = None
 
 
+class SimpleBatchResponse(BaseModel):
+    """批量起卦响应 (列式，编码对照见 *_names 字段)"""
+    original: list[int]
+    mutual: list[int]
+    changed: list[int]
+    moving_line: list[int]
+    ti_gua: list[int]
+    yong_gua: list[int]
+    relation: list[int]
+    hexagram_names: list[str]
+    trigram_names: dict[int, str]
+    relation_names: list[str]
+
+
 class DetailedResponse(BaseModel):
     """详细版响应"""
     bazi: dict
@@ -86,6 +261,143 @@ class DetailedResponse(BaseModel):
     error: Optional[str] = None
 
 
+def _json_object(**fields) -> bytes:
+    """
+    编码 JSON 对象
+
+    bytes 类型的字段视为预编码的 JSON 片段，直接拼接而不再序列化
+    """
+    parts = []
+    for key, value in fields.items():
+        if not isinstance(value, bytes):
+            value = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        parts.append(json.dumps(key).encode("utf-8") + b":" + value)
+    return b"{" + b",".join(parts) + b"}"
+
+
+def _json_response(**fields) -> Response:
+    """组装 JSON 响应 (字段规则同 _json_object)"""
+    return Response(content=_json_object(**fields), media_type="application/json")
+
+
+def _sse(event: str, data) -> bytes:
+    """编码一个 SSE 事件 (data 为 bytes 时视为预编码的 JSON)"""
+    if not isinstance(data, bytes):
+        data = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    return b"event: " + event.encode("ascii") + b"\ndata: " + data + b"\n\n"
+
+
+async def _sse_events(
+    received: float,
+    payload: Optional[bytes],
+    search,
+    analyze,
+    similar: Optional[dict] = None,
+    remember=None,
+):
+    """
+    SSE 事件流: payload → context → token... → done
+
+    Args:
+        received: 收到请求的时刻 (time.perf_counter)
+        payload: 确定性结果 (预编码 JSON)，None 表示不发送 payload 事件
+        search: 启动外应搜索的函数 (返回协程)
+        analyze: 以外应结果为参数、返回 AI 文本流的函数
+        similar: 相似问题缓存命中的 {"answer", "context"}，不为 None 时跳过搜索与 AI
+        remember: 生成成功后以 (外应字典, 完整回答) 调用，用于写入相似问题缓存
+    """
+    first = True
+    try:
+        if payload is not None:
+            sse_first_event.record(time.perf_counter() - received)
+            first = False
+            yield _sse("payload", payload)
+
+        if similar is not None:
+            if first:
+                sse_first_event.record(time.perf_counter() - received)
+            yield _sse("context", similar["context"])
+            sse_first_token.record(time.perf_counter() - received)
+            yield _sse("token", {"text": similar["answer"]})
+            yield _sse("done", {"success": True, "error": None})
+            return
+
+        context_result = await search()
+        context_dict = crawler.to_dict(context_result)
+        if first:
+            sse_first_event.record(time.perf_counter() - received)
+        yield _sse("context", context_dict)
+
+        first = True
+        pieces = []
+        async for text in analyze(context_result):
+            if first:
+                first = False
+                sse_first_token.record(time.perf_counter() - received)
+            pieces.append(text)
+            yield _sse("token", {"text": text})
+        if remember is not None and pieces:
+            remember(context_dict, "".join(pieces))
+        yield _sse("done", {"success": True, "error": None})
+
+    except AIStreamError as e:
+        yield _sse("done", {"success": False, "error": str(e)})
+    except Exception as e:
+        yield _sse("done", {"success": False, "error": str(e) or type(e).__name__})
+
+
+def _event_stream(events) -> StreamingResponse:
+    """SSE 响应 (关闭缓存与反向代理缓冲，保证逐事件送达)"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _hexagram_id(outcome) -> str:
+    """卦象 id: 本卦上卦、下卦序数与动爻 (决定全部起卦结果)"""
+    original = outcome.result.original
+    return f"{original.upper.number}{original.lower.number}{original.moving_line}"
+
+
+def _bazi_id(bazi_dict: dict) -> str:
+    """命盘 id: 四柱与当前大运、流年"""
+    pillars = bazi_dict.get("four_pillars", {})
+    luck = bazi_dict.get("luck") or {}
+    current = (luck.get("current") or {}).get("ganzhi", "")
+    annual = (luck.get("annual") or {}).get("ganzhi", "")
+    return "".join(pillars.get(k, "") for k in ("year", "month", "day", "hour")) + f"/{current}/{annual}"
+
+
+def _fengshui_id(fengshui_dict: dict) -> str:
+    """风水 id: 本命卦序数与流年"""
+    ming_gua = fengshui_dict.get("ming_gua", {})
+    flying = fengshui_dict.get("flying_stars", {})
+    return f"{ming_gua.get('gua_number', '')}/{flying.get('year', '')}"
+
+
+def _detailed_scope(outcome, bazi_dict: dict, fengshui_dict: dict) -> str:
+    """详细版相似问题缓存的作用域: 模型 + 卦象、命盘、风水 id"""
+    return (
+        f"detailed:{ai.model}:{_hexagram_id(outcome)}:"
+        f"{_bazi_id(bazi_dict)}:{_fengshui_id(fengshui_dict)}"
+    )
+
+
+def _similar_answer(scope: str, request) -> Optional[dict]:
+    """查询相似问题缓存 (请求 no_cache 时跳过)"""
+    if request.no_cache:
+        return None
+    hit = answers.get(scope, request.question)
+    return hit.value if hit is not None else None
+
+
+def _remember_answer(scope: str, question: str, context_dict: dict, answer: str):
+    """写入相似问题缓存"""
+    answers.put(scope, question, {"answer": answer, "context": context_dict})
+
+
 # ==================== API 路由 ====================
 
 @app.get("/api/health", response_model=HealthResponse)
@@ -104,6 +416,47 @@ async def health_check():
     )
 
 
+@app.get("/api/metrics")
+async def metrics():
+    """
+    运行指标
+
+    返回各计算器缓存的命中统计、外应搜索状态、AI 服务连接池占用、回复缓存、预填充与流式首字延迟
+    """
+    return {
+        "bazi_cache": bazi.cache_info(),
+        "crawler": crawler.info(),
+        "ai": {
+            "singleflight": ai.flight.info(),
+            "pool": ai.pool_info(),
+            "stream": ai.stream_info(),
+            "cache": ai.cache_info(),
+            "similar": answers.info(),
+            "prefill": ai.prefill_info(),
+        },
+        "sse": {
+            "first_event": sse_first_event.info(),
+            "first_token": sse_first_token.info(),
+        },
+    }
+
+
+@app.post("/api/context/prefetch", response_model=PrefetchResponse)
+async def context_prefetch(request: PrefetchRequest):
+    """
+    预取外应
+
+    用户输入问题后即在后台开始搜索，预测接口携带返回的 context_token
+    时直接等待或复用该搜索结果 (凭证在 expires_in 秒内有效)
+    """
+    try:
+        token = crawler.prefetch(request.question)
+        return PrefetchResponse(token=token, expires_in=crawler.prefetches.ttl)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/predict/simple", response_model=SimpleResponse)
 async def predict_simple(request: SimpleRequest):
     """
@@ -112,44 +465,128 @@ async def predict_simple(request: SimpleRequest):
     使用梅花易数快速起卦，适合日常决策
     """
     try:
-        # 1. 起卦
-        result = meihua.calculate(
+        # 1. 起卦 (查表，结果与 JSON 片段均为预计算)
+        outcome = meihua.lookup(
             request.nums[0],
             request.nums[1],
             request.nums[2],
         )
-        hexagram_dict = meihua.to_dict(result)
 
-        # 2. 搜索外应
-        context_result = crawler.search(request.question)
+        # 2. 同一卦象下问过相似问题时直接复用回答
+        scope = f"simple:{ai.model}:{_hexagram_id(outcome)}"
+        similar = _similar_answer(scope, request)
+        if similar is not None:
+            return _json_response(
+                hexagram=outcome.json,
+                context=similar["context"],
+                ai_analysis=similar["answer"],
+                success=True,
+                error=None,
+            )
+
+        # 3. 搜索外应
+        context_result = await crawler.search_async(request.question, token=request.context_token)
         context_dict = crawler.to_dict(context_result)
 
-        # 3. AI 分析
+        # 4. AI 分析
         ai_response = await ai.analyze_simple(
-            hexagram=hexagram_dict,
+            hexagram=outcome.data,
             context=context_result.summary,
             question=request.question,
+            use_cache=not request.no_cache,
         )
 
         if not ai_response.success:
-            return SimpleResponse(
-                hexagram=hexagram_dict,
+            return _json_response(
+                hexagram=outcome.json,
                 context=context_dict,
                 ai_analysis=f"AI 分析暂时不可用: {ai_response.error}",
                 success=False,
                 error=ai_response.error,
             )
 
-        return SimpleResponse(
-            hexagram=hexagram_dict,
+        _remember_answer(scope, request.question, context_dict, ai_response.content)
+        return _json_response(
+            hexagram=outcome.json,
             context=context_dict,
             ai_analysis=ai_response.content,
             success=True,
+            error=None,
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/predict/simple/stream")
+async def predict_simple_stream(request: SimpleRequest):
+    """
+    简单版预测 (SSE 流式输出)
+
+    卦象起好即作为 payload 事件发送，随后依次发送外应、AI 文本片段与结束事件
+    """
+    received = time.perf_counter()
+    try:
+        outcome = meihua.lookup(
+            request.nums[0],
+            request.nums[1],
+            request.nums[2],
         )
 
+        scope = f"simple:{ai.model}:{_hexagram_id(outcome)}"
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    return _event_stream(_sse_events(
+        received,
+        _json_object(hexagram=outcome.json),
+        lambda: crawler.search_async(request.question, token=request.context_token),
+        lambda context_result: ai.analyze_simple_stream(
+            hexagram=outcome.data,
+            context=context_result.summary,
+            question=request.question,
+            use_cache=not request.no_cache,
+        ),
+        similar=_similar_answer(scope, request),
+        remember=partial(_remember_answer, scope, request.question),
+    ))
+
+
+@app.post("/api/predict/simple/batch", response_model=SimpleBatchResponse)
+def predict_simple_batch(request: SimpleBatchRequest):
+    """
+    批量起卦
+
+    仅做梅花易数向量化计算，跳过外应搜索与 AI 分析，适合批量统计
+    """
+    try:
+        result = meihua.calculate_batch(request.nums)
+        return meihua.batch_to_dict(result)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _detailed_bazi(request: DetailedRequest) -> dict:
+    """详细版八字排盘结果 (含当前大运与流年)"""
+    bazi_result = bazi.calculate(
+        year=request.birth_year,
+        month=request.birth_month,
+        day=request.birth_day,
+        hour=request.birth_hour,
+    )
+    bazi_dict = bazi.to_dict(bazi_result)
+    timeline = bazi.luck_timeline(
+        year=request.birth_year,
+        month=request.birth_month,
+        day=request.birth_day,
+        hour=request.birth_hour,
+        gender=request.gender,
+    )
+    bazi_dict["luck"] = bazi.luck_to_dict(timeline, datetime.now().year)
+    return bazi_dict
+
 
 @app.post("/api/predict/detailed", response_model=DetailedResponse)
 async def predict_detailed(request: DetailedRequest):
@@ -159,22 +596,15 @@ async def predict_detailed(request: DetailedRequest):
     综合八字、梅花易数、九宫飞星，生成完整战略报告
     """
     try:
-        # 1. 八字排盘
-        bazi_result = bazi.calculate(
-            year=request.birth_year,
-            month=request.birth_month,
-            day=request.birth_day,
-            hour=request.birth_hour,
-        )
-        bazi_dict = bazi.to_dict(bazi_result)
+        # 1. 八字排盘 (含大运流年)
+        bazi_dict = _detailed_bazi(request)
 
-        # 2. 梅花起卦
-        meihua_result = meihua.calculate(
+        # 2. 梅花起卦 (查表)
+        outcome = meihua.lookup(
             request.nums[0],
             request.nums[1],
             request.nums[2],
         )
-        hexagram_dict = meihua.to_dict(meihua_result)
 
         # 3. 风水分析
         fengshui_result = fengshui.calculate(
@@ -183,23 +613,38 @@ async def predict_detailed(request: DetailedRequest):
         )
         fengshui_dict = fengshui.to_dict(fengshui_result)
 
-        # 4. 搜索外应
-        context_result = crawler.search(request.question)
+        # 4. 同一卦象、命盘与风水下问过相似问题时直接复用回答
+        scope = _detailed_scope(outcome, bazi_dict, fengshui_dict)
+        similar = _similar_answer(scope, request)
+        if similar is not None:
+            return _json_response(
+                bazi=bazi_dict,
+                hexagram=outcome.json,
+                fengshui=fengshui_dict,
+                context=similar["context"],
+                ai_report=similar["answer"],
+                success=True,
+                error=None,
+            )
+
+        # 5. 搜索外应
+        context_result = await crawler.search_async(request.question, token=request.context_token)
         context_dict = crawler.to_dict(context_result)
 
-        # 5. AI 综合分析
+        # 6. AI 综合分析
         ai_response = await ai.analyze_detailed(
             bazi=bazi_dict,
-            hexagram=hexagram_dict,
+            hexagram=outcome.data,
             fengshui=fengshui_dict,
             context=context_result.summary,
             question=request.question,
+            use_cache=not request.no_cache,
         )
 
         if not ai_response.success:
-            return DetailedResponse(
+            return _json_response(
                 bazi=bazi_dict,
-                hexagram=hexagram_dict,
+                hexagram=outcome.json,
                 fengshui=fengshui_dict,
                 context=context_dict,
                 ai_report=f"AI 分析暂时不可用: {ai_response.error}",
@@ -207,14 +652,157 @@ async def predict_detailed(request: DetailedRequest):
                 error=ai_response.error,
             )
 
-        return DetailedResponse(
+        _remember_answer(scope, request.question, context_dict, ai_response.content)
+        return _json_response(
             bazi=bazi_dict,
-            hexagram=hexagram_dict,
+            hexagram=outcome.json,
             fengshui=fengshui_dict,
             context=context_dict,
             ai_report=ai_response.content,
             success=True,
+            error=None,
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/predict/detailed/stream")
+async def predict_detailed_stream(request: DetailedRequest):
+    """
+    详细版预测 (SSE 流式输出)
+
+    八字、卦象、风水算好即作为 payload 事件发送，随后依次发送外应、AI 文本片段与结束事件
+    """
+    received = time.perf_counter()
+    try:
+        bazi_dict = _detailed_bazi(request)
+        outcome = meihua.lookup(
+            request.nums[0],
+            request.nums[1],
+            request.nums[2],
+        )
+        fengshui_dict = fengshui.to_dict(fengshui.calculate(
+            birth_year=request.birth_year,
+            gender=request.gender,
+        ))
+        scope = _detailed_scope(outcome, bazi_dict, fengshui_dict)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return _event_stream(_sse_events(
+        received,
+        _json_object(bazi=bazi_dict, hexagram=outcome.json, fengshui=fengshui_dict),
+        lambda: crawler.search_async(request.question, token=request.context_token),
+        lambda context_result: ai.analyze_detailed_stream(
+            bazi=bazi_dict,
+            hexagram=outcome.data,
+            fengshui=fengshui_dict,
+            context=context_result.summary,
+            question=request.question,
+            use_cache=not request.no_cache,
+        ),
+        similar=_similar_answer(scope, request),
+        remember=partial(_remember_answer, scope, request.question),
+    ))
+
+
+@app.post("/api/bazi/batch")
+def bazi_batch(request: BaziBatchRequest):
+    """
+    八字批量统计
+
+    对出生时间列表或日期范围批量排盘，返回身强弱、喜用神等分布直方图
+    (CPU 密集，使用同步函数由线程池执行; 索引未覆盖的行在当前线程逐行计算，
+    不在请求中创建进程池，超过 BAZI_BATCH_MAX_UNINDEXED 行时返回 400)
+    """
+    from core.bazi_batch import births_in_range, cohort_to_dict
+
+    try:
+        if request.births is not None:
+            births = request.births
+        else:
+            births = births_in_range(request.start_date, request.end_date, request.hours)
+
+        result = bazi.calculate_batch(births, workers=1, max_unindexed=BAZI_BATCH_MAX_UNINDEXED)
+        return cohort_to_dict(result, include_rows=request.include_rows)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/hehun")
+async def hehun(request: HehunRequest):
+    """
+    八字合婚
+
+    基于双方四柱的日干、日支、年支关系与喜用神互补评分
+    """
+    try:
+        result = bazi.compatibility(request.person_a.as_tuple(), request.person_b.as_tuple())
+        return {
+            "score": result.score,
+            "day_stem": result.day_stem,
+            "day_branch": result.day_branch,
+            "year_branch": result.year_branch,
+            "complement": result.complement,
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/fengshui/calendar")
+def fengshui_calendar(request: FengshuiCalendarRequest):
+    """
+    飞星历
+
+    返回日期范围内每天的流年、流月、流日中宫星 (列式)，盘面见 charts
+    """
+    from core.fengshui_calendar import flying_star_days_to_dict
+
+    try:
+        days = fengshui.flying_star_days(request.start_date, request.end_date)
+        return flying_star_days_to_dict(days)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/fengshui/calendar/{year}/daily")
+def fengshui_daily_stream(year: int = Path(..., ge=1900, le=2100, description="公历年份")):
+    """
+    流式输出整年的日飞星盘
+
+    每行一个 JSON 对象 (NDJSON)，按月分块计算，不在内存中构建整年列表
+    """
+    return StreamingResponse(
+        fengshui.iter_daily_charts(year), media_type="application/x-ndjson"
+    )
+
+
+@app.post("/api/fengshui/floorplan")
+def fengshui_floorplan(request: FloorPlanRequest):
+    """
+    户型九宫分析
+
+    按朝向将户型网格划入九宫，叠加流年飞星与本命吉凶方位，为每个房间评分
+    """
+    from core.fengshui_floorplan import floor_plan_to_dict
+
+    try:
+        result = fengshui.analyze_floor_plan(
+            request.grid,
+            request.facing,
+            birth_year=request.birth_year,
+            gender=request.gender,
+            year=request.year,
+            room_names=request.room_names,
         )
+        return floor_plan_to_dict(result, include_grid=request.include_grid)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -226,7 +814,9 @@ class ChatRequest(BaseModel):
     hexagram: dict = Field(..., description="当前卦象信息")
     bazi: Optional[dict] = Field(None, description="八字信息 (详细版)")
     fengshui: Optional[dict] = Field(None, description="风水信息 (详细版)")
-    history: list[dict] = Field(default=[], description="对话历史")
+    history: list[dict] = Field(default=[], description="对话历史 (role / content，回答可附带当轮 context)")
+    context_token: Optional[str] = Field(None, max_length=64, description="外应预取凭证")
+    no_cache: bool = Field(False, description="跳过 AI 回复缓存 (重新生成并刷新缓存)")
 
 
 class ChatResponse(BaseModel):
@@ -246,70 +836,19 @@ async def chat_followup(request: ChatRequest):
     """
     try:
         # 1. 搜索相关大数据
-        context_result = crawler.search(request.question)
+        context_result = await crawler.search_async(request.question, token=request.context_token)
         context_dict = crawler.to_dict(context_result)
         
-        # 2. 构建追问 Prompt
-        system = """你是一位精通梅花易数、八字命理和风水学的资深命理师。
-用户已经完成了起卦，现在基于卦象结果向你追问。
-请结合卦象信息和网络搜索的最新资讯，给出专业且实用的回答。
-回答要简洁有力，控制在 300 字以内。"""
-
-        # 格式化卦象信息
-        hexagram = request.hexagram
-        hex_info = f"""【当前卦象】
-本卦：{hexagram.get('original', {}).get('name', '未知')}
-变卦：{hexagram.get('changed', {}).get('name', '未知')}
-体用关系：{hexagram.get('ti_yong_relation', '未知')}
-初步判断：{hexagram.get('interpretation', '')}"""
-
-        # 如果有八字信息
-        bazi_info = ""
-        if request.bazi:
-            four_pillars = request.bazi.get("four_pillars", {})
-            bazi_info = f"""
-【八字信息】
-四柱：{four_pillars.get('year', '')} {four_pillars.get('month', '')} {four_pillars.get('day', '')} {four_pillars.get('hour', '')}
-日主：{request.bazi.get('day_master', '')}（{request.bazi.get('strength', '')}）
-喜用神：{'、'.join(request.bazi.get('favorable_elements', []))}"""
-
-        # 如果有风水信息
-        fengshui_info = ""
-        if request.fengshui:
-            ming_gua = request.fengshui.get("ming_gua", {})
-            flying = request.fengshui.get("flying_stars", {})
-            fengshui_info = f"""
-【风水信息】
-本命卦：{ming_gua.get('gua_name', '')}
-吉方：{'、'.join(ming_gua.get('favorable_directions', []))}
-流年财位：{flying.get('wealth_position', '')}"""
-
-        # 格式化对话历史
-        history_str = ""
-        if request.history:
-            history_str = "\n【之前的对话】\n"
-            for h in request.history[-5:]:  # 只保留最近5条
-                role = "用户" if h.get("role") == "user" else "大师"
-                history_str += f"{role}：{h.get('content', '')}\n"
-
-        # 组合用户消息
-        user_msg = f"""{hex_info}
-{bazi_info}
-{fengshui_info}
-{history_str}
-【网络搜索参考】
-{context_result.summary}
-
-【用户追问】
-{request.question}
-
-请结合以上信息回答用户的问题。"""
-
-        # 构建完整 prompt
-        prompt = f"<|im_start|>system\n{system}<|im_end|>\n<|im_start|>user\n{user_msg}<|im_end|>\n<|im_start|>assistant\n"
-        
-        # 3. 调用 AI
-        ai_response = await ai.generate(prompt)
+        # 2. 调用 AI
+        ai_response = await ai.chat(
+            hexagram=request.hexagram,
+            bazi=request.bazi,
+            fengshui=request.fengshui,
+            history=request.history,
+            context=context_result.summary,
+            question=request.question,
+            use_cache=not request.no_cache,
+        )
         
         if not ai_response.success:
             return ChatResponse(
@@ -329,6 +868,29 @@ async def chat_followup(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chat/stream")
+async def chat_followup_stream(request: ChatRequest):
+    """
+    追问 AI (SSE 流式输出)
+
+    依次发送外应、AI 文本片段与结束事件
+    """
+    return _event_stream(_sse_events(
+        time.perf_counter(),
+        None,
+        lambda: crawler.search_async(request.question, token=request.context_token),
+        lambda context_result: ai.chat_stream(
+            hexagram=request.hexagram,
+            bazi=request.bazi,
+            fengshui=request.fengshui,
+            history=request.history,
+            context=context_result.summary,
+            question=request.question,
+            use_cache=not request.no_cache,
+        ),
+    ))
+
+
 # ==================== 启动入口 ====================
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+"""
+正文抓取基准 (本地桩服务器)
+
+在本机启动一个 HTTP 桩服务器，模拟几类结果页:
+- /fast       普通文章页
+- /gbk        GBK 编码、仅在 <meta> 中声明编码的页面
+- /slow       先返回部分正文、之后长时间不再发送 (测试截止时间返回部分正文)
+- /huge       Content-Length 超过字节上限
+- /endless    不声明长度、持续发送链接列表 (无正文，测试流式字节上限)
+- /missing    404
+- /redirect   302 到 /fast
+- /to-file    302 到 file:// 地址
+- /loop       重定向到自身 (测试次数上限)
+
+然后用 ArticleFetcher (允许本机地址，仅测试用) 与开启正文抓取的 ContextCrawler 并发抓取，
+打印每页结果、总耗时与抓取统计，并检查每页的 complete、error 与正文;
+再用默认配置的 ArticleFetcher 检查本机、内网与云元数据地址均被拒绝。
+任一检查不通过时以状态码 1 退出。
+
+用法 (在 backend 目录下):
+    python scripts/bench_article_fetch.py [--deadline 1.0] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.article_fetcher import ArticleFetcher  # noqa: E402
+from core.crawler import ContextCrawler, SearchProvider, SearchResult  # noqa: E402
+
+PARAGRAPH = "据报道，今年以来多家公司业绩稳步回升，市场信心逐渐恢复，分析人士认为下半年仍有增长空间。"
+
+ARTICLE = (
+    "<html><head><title>新闻</title><script>var x = '不应出现';</script></head><body>"
+    "<nav><a href='/'>首页</a><a href='/news'>新闻</a></nav>"
+    "<article><h1>公司业绩回升</h1>" + f"<p>{PARAGRAPH}</p>" * 20 + "</article>"
+    "<footer>版权所有 不应出现在正文中的页脚文字内容</footer></body></html>"
+)
+
+GBK_ARTICLE = (
+    '<html><head><meta charset="gbk"></head><body>'
+    f"<p>{PARAGRAPH}</p></body></html>"
+).encode("gbk")
+
+
+# 重定向页面 -> Location
+REDIRECTS = {"/redirect": "/fast", "/to-file": "file:///etc/passwd", "/loop": "/loop"}
+
+# 页面 -> (complete, error 中应包含的文字 (None 表示无错误), 正文是否应包含 PARAGRAPH)
+EXPECTED = {
+    "/fast": (True, None, True),
+    "/gbk": (True, None, True),
+    "/slow": (False, "deadline exceeded", True),
+    "/huge": (True, "larger than", False),
+    "/endless": (True, "larger than", False),
+    "/missing": (True, "404", False),
+    "/redirect": (True, None, True),
+    "/to-file": (True, "unsupported url", False),
+    "/loop": (True, "more than", False),
+}
+
+# 默认配置 (只允许公网地址) 下应拒绝的地址 ({base} 为桩服务器地址)
+PRIVATE_URLS = (
+    "{base}/fast",
+    "{base}/redirect",
+    "http://localhost:{port}/fast",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.1/",
+    "http://[::1]:{port}/fast",
+)
+
+
+def check(path: str, article, expected: tuple) -> list[str]:
+    """检查单页结果，返回不符合预期之处"""
+    complete, error, has_text = expected
+    problems = []
+    if article.complete != complete:
+        problems.append(f"{path}: complete={article.complete}, 应为 {complete}")
+    if error is None and article.error is not None:
+        problems.append(f"{path}: 不应出错，实际 error={article.error!r}")
+    if error is not None and error not in (article.error or ""):
+        problems.append(f"{path}: error 应包含 {error!r}，实际为 {article.error!r}")
+    if has_text and PARAGRAPH not in article.text:
+        problems.append(f"{path}: 未提取到正文")
+    if not has_text and article.text:
+        problems.append(f"{path}: 不应有正文，实际 {article.text[:24]!r}")
+    if "不应出现" in article.text:
+        problems.append(f"{path}: 正文中混入了脚本或页脚文字")
+    return problems
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """桩服务器请求处理"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, content_type: str = "text/html; charset=utf-8", length: int = None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if length is None:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        try:
+            if self.path == "/fast":
+                body = ARTICLE.encode("utf-8")
+                self._headers(length=len(body))
+                self.wfile.write(body)
+            elif self.path == "/gbk":
+                self._headers("text/html", len(GBK_ARTICLE))
+                self.wfile.write(GBK_ARTICLE)
+            elif self.path == "/slow":
+                self._headers()
+                self._chunk(f"<html><body><p>{PARAGRAPH}</p><p>{PARAGRAPH}".encode("utf-8"))
+                time.sleep(5)
+                self._chunk(b"</p></body></html>")
+                self._chunk(b"")
+            elif self.path in REDIRECTS:
+                self.send_response(302)
+                self.send_header("Location", REDIRECTS[self.path])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif self.path == "/huge":
+                self._headers(length=50 * 1024 * 1024)
+            elif self.path == "/endless":
+                self._headers()
+                for _ in range(10000):
+                    self._chunk(b"<li><a href='#'>link</a></li>" * 256)
+                self._chunk(b"")
+            else:
+                self.send_error(404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class StubProvider(SearchProvider):
+    """返回桩服务器页面的搜索源"""
+
+    name = "stub"
+
+    def __init__(self, base: str, paths: list[str]):
+        self.base = base
+        self.paths = paths
+
+    def search(self, query: str, max_results: int) -> list[SearchResult]:
+        return [
+            SearchResult(title=path, snippet=f"摘要 {path}", url=self.base + path)
+            for path in self.paths[:max_results]
+        ]
+
+
+async def run(base: str, deadline: float, rounds: int) -> list[str]:
+    problems = []
+    paths = list(EXPECTED)
+    fetcher = ArticleFetcher(max_bytes=256 * 1024, page_timeout=3.0, allow_private_addresses=True)
+
+    start = time.perf_counter()
+    articles = await fetcher.fetch_all([base + p for p in paths], deadline=deadline)
+    elapsed = time.perf_counter() - start
+    print(f"fetch_all {len(paths)} pages (deadline {deadline}s): {elapsed:.2f}s")
+    for path, article in zip(paths, articles):
+        print(
+            f"  {path:<9} complete={article.complete!s:<5} chars={len(article.text):<4} "
+            f"error={article.error}  {article.text[:24]!r}"
+        )
+        problems += check(path, article, EXPECTED[path])
+    if elapsed > deadline + 0.5:
+        problems.append(f"fetch_all 耗时 {elapsed:.2f}s，超过截止时间 {deadline}s")
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await fetcher.fetch_all([base + "/fast", base + "/gbk"], deadline=deadline)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(f"keep-alive fetch of 2 pages: p50={samples[len(samples) // 2]:.1f}ms")
+    print(f"fetcher stats: {fetcher.info()}")
+    await fetcher.aclose()
+
+    # 默认配置: 非公网地址在建立连接前即被拒绝
+    fetcher = ArticleFetcher()
+    port = base.rsplit(":", 1)[1]
+    urls = [url.format(base=base, port=port) for url in PRIVATE_URLS]
+    articles = await fetcher.fetch_all(urls, deadline=deadline)
+    print("public addresses only (default):")
+    for url, article in zip(urls, articles):
+        print(f"  {url:<42} error={article.error}")
+        problems += check(url, article, (True, "non-public address", False))
+    await fetcher.aclose()
+
+    crawler = ContextCrawler(
+        provider=StubProvider(base, ["/fast", "/slow", "/missing"]),
+        fetch_articles=True,
+        cache_size=0,
+    )
+    crawler.fetcher = ArticleFetcher(deadline=deadline, allow_private_addresses=True)
+    start = time.perf_counter()
+    result = await crawler.search_async("公司业绩", timeout=deadline + 1)
+    print(f"crawler.search_async with articles: {time.perf_counter() - start:.2f}s")
+    print(f"  summary ({len(result.summary)} chars): {result.summary[:60]}…")
+    if not result.success or PARAGRAPH not in result.summary:
+        problems.append("crawler.search_async: 摘要中没有抓取到的正文")
+    await crawler.aclose()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="正文抓取基准 (本地桩服务器)")
+    parser.add_argument("--deadline", type=float, default=1.0, help="整体截止时间 (秒)")
+    parser.add_argument("--rounds", type=int, default=20, help="keep-alive 抓取轮数")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        problems = asyncio.run(run(f"http://127.0.0.1:{server.server_port}", args.deadline, args.rounds))
+    finally:
+        server.shutdown()
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
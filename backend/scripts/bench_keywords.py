@@ -0,0 +1,73 @@
+"""
+关键词提取微基准
+
+对比逐个 str.replace 的旧实现与单次正则扫描的 normalize_query，
+并统计一组改写问题在旧/新缓存键下的去重效果。
+
+用法 (在 backend 目录下):
+    python scripts/bench_keywords.py [--number 20000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.crawler import STOP_WORDS, ContextCrawler, canonical_query  # noqa: E402
+
+QUESTIONS = [
+    "今年财运怎么样",
+    "今年财运怎么样？",
+    "今年 财运，怎么样!",
+    "请问我今年的财运会好吗",
+    "我们公司为什么业绩不好",
+    "帮我看看下个月适合跳槽吗？",
+    "ＡＢＣ 公司的股票会涨吗？",
+    "股票 ABC 公司 会不会涨",
+    "想问一下我的感情什么时候能稳定下来呢",
+    "如何提升事业运",
+]
+
+
+def legacy_extract(question: str) -> str:
+    """旧实现: 逐个停用词 str.replace 后再用正则压缩空白"""
+    query = question
+    for word in STOP_WORDS:
+        query = query.replace(word, " ")
+    query = re.sub(r"\s+", " ", query).strip()
+    if len(query) < 4:
+        query = question[:20]
+    return query
+
+
+def bench(fn, number: int) -> float:
+    """每次调用的平均耗时 (微秒)"""
+    seconds = timeit.timeit(lambda: [fn(q) for q in QUESTIONS], number=number)
+    return seconds / (number * len(QUESTIONS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词提取微基准")
+    parser.add_argument("--number", type=int, default=20000, help="重复轮数")
+    args = parser.parse_args()
+
+    crawler = ContextCrawler()
+    legacy_us = bench(legacy_extract, args.number)
+    new_us = bench(crawler._extract_keywords, args.number)
+    key_us = bench(lambda q: canonical_query(crawler._extract_keywords(q)), args.number)
+
+    print(f"legacy str.replace    {legacy_us:8.2f} us/query")
+    print(f"normalize_query       {new_us:8.2f} us/query  ({legacy_us / new_us:.1f}x)")
+    print(f"+ canonical cache key {key_us:8.2f} us/query")
+
+    legacy_keys = {" ".join(legacy_extract(q).lower().split()) for q in QUESTIONS}
+    new_keys = {crawler._cache_key(crawler._extract_keywords(q)) for q in QUESTIONS}
+    print(f"distinct cache keys for {len(QUESTIONS)} questions: "
+          f"legacy {len(legacy_keys)}, canonical {len(new_keys)}")
+
+
+if __name__ == "__main__":
+    main()
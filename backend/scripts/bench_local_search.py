@@ -0,0 +1,102 @@
+"""
+本地外应语料库基准
+
+生成合成中文语料 (词频服从 Zipf 分布) 导入临时 SQLite FTS5 库，
+测量导入吞吐与典型问题的检索延迟 (含关键词提取)。
+
+用法 (在 backend 目录下):
+    python scripts/bench_local_search.py [--docs 100000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.crawler import ContextCrawler, LocalSearchProvider  # noqa: E402
+from core.local_search import LocalSearchIndex  # noqa: E402
+
+# 常用汉字 (合成词表的字母表)
+ALPHABET = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动"
+    "同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自"
+    "二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日"
+    "那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变"
+    "条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总"
+    "次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指"
+)
+
+QUESTIONS = [
+    "今年财运怎么样",
+    "我们公司为什么业绩不好",
+    "下个月适合跳槽吗？",
+    "股票 ABC 公司会涨吗",
+    "感情什么时候能稳定",
+    "考研能不能成功",
+    "房价明年会跌吗",
+    "新项目的合作能成吗",
+]
+
+
+def make_corpus(count: int, seed: int = 0) -> list[dict]:
+    """合成语料: 2-4 字词表 (Zipf 词频)，标题 3 词、正文 60-120 词"""
+    rng = random.Random(seed)
+    vocab = list({
+        "".join(rng.choices(ALPHABET, k=rng.randint(2, 4))) for _ in range(20000)
+    })
+    # 把问题中的关键词以中等词频混入词表 (排名 100 起)，保证检索有命中
+    keywords = ["财运", "公司", "业绩", "跳槽", "股票", "abc", "感情", "稳定", "考研", "房价", "合作", "项目"]
+    for i, word in enumerate(keywords):
+        vocab.insert(100 + i * 50, word)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    docs = []
+    for i in range(count):
+        words = rng.choices(vocab, weights, k=rng.randint(63, 123))
+        docs.append({
+            "title": "".join(words[:3]),
+            "body": "，".join("".join(words[j:j + 6]) for j in range(3, len(words), 6)) + "。",
+            "url": f"https://example.com/news/{i}",
+            "published": f"2024-{i % 12 + 1:02d}-01",
+        })
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地外应语料库基准")
+    parser.add_argument("--docs", type=int, default=100000, help="合成文档数")
+    parser.add_argument("--queries", type=int, default=200, help="每个问题的检索次数")
+    args = parser.parse_args()
+
+    docs = make_corpus(args.docs)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "local_search.db")
+        index = LocalSearchIndex(path)
+        start = time.perf_counter()
+        index.ingest(docs)
+        index.optimize()
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path) / 2**20
+        print(f"ingest {args.docs} docs: {elapsed:.1f}s ({args.docs / elapsed:,.0f} docs/s), {size:.0f} MB")
+
+        crawler = ContextCrawler(provider=LocalSearchProvider(path), cache_size=0)
+        for question in QUESTIONS:
+            crawler.search(question)  # 预热 (打开连接、加载页缓存)
+            samples = []
+            for _ in range(args.queries):
+                start = time.perf_counter()
+                result = crawler.search(question)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            print(
+                f"{question:<16} hits={len(result.results)} "
+                f"p50={statistics.median(samples):6.2f}ms p95={samples[int(len(samples) * 0.95)]:6.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
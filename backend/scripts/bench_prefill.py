@@ -0,0 +1,141 @@
+"""
+Prompt 前缀复用基准 (模拟 Ollama 的 KV 缓存)
+
+在本机启动一个模拟 Ollama /api/chat 的桩服务器: 按 ChatML 拼出完整 Prompt，
+与上一次请求留下的序列 (上次的 Prompt + 回答) 求最长公共前缀，
+只有前缀之后的部分计入 prompt_eval_count (以字符数近似 token 数)，与 llama.cpp 的行为一致。
+
+模拟一次完整会话: 详细版预测后按前端的方式连续追问 --turns 轮，
+打印每次请求的 Prompt 长度、实际需预填充的长度与复用比例。
+
+用法 (在 backend 目录下):
+    python scripts/bench_prefill.py [--turns 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 桩服务器的 KV 缓存 (上一次处理过的完整序列) 与每次请求的 (Prompt 长度, 预填充长度)
+state = {"cached": "", "requests": []}
+
+
+def render(messages: list[dict]) -> str:
+    """按 ChatML 模板拼接消息 (与 Qwen 模型的对话模板一致)"""
+    text = "".join(f"<|im_start|>{m['role']}\n{m['content']}<|im_end|>\n" for m in messages)
+    return text + "<|im_start|>assistant\n"
+
+
+def common_prefix(a: str, b: str) -> int:
+    """最长公共前缀长度"""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    """模拟 Ollama /api/tags 与 /api/chat (非流式)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send({"models": [{"name": "qwen2.5:1.5b"}]})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = render(body["messages"])
+        evaluated = len(prompt) - common_prefix(prompt, state["cached"])
+        answer = f"第{len(state['requests'])}次回答：" + "宜守不宜攻，静待时机。" * 10
+        state["cached"] = prompt + answer + "<|im_end|>\n"
+        state["requests"].append((len(prompt), evaluated))
+        self._send({
+            "message": {"role": "assistant", "content": answer},
+            "done": True,
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": evaluated * 100_000,
+        })
+
+
+def run(base: str, turns: int):
+    from fastapi.testclient import TestClient
+
+    import main
+    from core.crawler import ContextCrawler, SearchProvider, SearchResult
+
+    class StubProvider(SearchProvider):
+        name = "stub"
+
+        def search(self, query, max_results):
+            return [SearchResult(title=f"{query} 相关新闻", snippet=f"关于「{query}」的最新报道摘要。", url="")]
+
+    main.crawler = ContextCrawler(provider=StubProvider(), cache_size=0)
+    main.ai.base_url = base
+
+    with TestClient(main.app) as client:
+        report = client.post("/api/predict/detailed", json={
+            "birth_year": 1990, "birth_month": 5, "birth_day": 15, "birth_hour": 10,
+            "gender": "male", "nums": [3, 8, 5], "question": "我适合创业吗",
+            "no_cache": True,
+        }).json()
+
+        # 与前端 ResultView 相同: 历史中的回答附带当轮 context
+        history = []
+        for turn in range(turns):
+            question = f"第{turn + 1}个追问：什么时候行动最好？"
+            answer = client.post("/api/chat", json={
+                "question": question,
+                "hexagram": report["hexagram"],
+                "bazi": report["bazi"],
+                "fengshui": report["fengshui"],
+                "history": history,
+                "no_cache": True,
+            }).json()
+            history.append({"role": "user", "content": question})
+            history.append({"role": "assistant", "content": answer["answer"], "context": answer["context"]})
+
+        prefill = client.get("/api/metrics").json()["ai"]["prefill"]
+
+    total_prompt = total_eval = 0
+    for i, (length, evaluated) in enumerate(state["requests"]):
+        label = "predict" if i == 0 else f"chat {i}"
+        total_prompt += length
+        total_eval += evaluated
+        print(f"{label:<8} prompt {length:5d} chars  prefill {evaluated:5d}  reused {1 - evaluated / length:6.1%}")
+    print(f"total    prompt {total_prompt:5d} chars  prefill {total_eval:5d}  reused {1 - total_eval / total_prompt:6.1%}")
+    print(f"metrics ai.prefill: {prefill}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt 前缀复用基准 (模拟 Ollama 的 KV 缓存)")
+    parser.add_argument("--turns", type=int, default=8, help="追问轮数")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run(f"http://127.0.0.1:{server.server_port}", args.turns)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+相似问题缓存基准
+
+1. 用一组人工标注的问题对检查内容字规则与阈值 (按默认阈值标注): 同义改写应命中，
+   意思不同 (含反义)、改动过大的问题应不命中; 任一问题对不符合标注时以状态码 1 退出
+2. 向同一作用域写入大量合成问题，测量查找延迟与平均候选数
+
+用法 (在 backend 目录下):
+    python scripts/bench_similar.py [--entries 4096] [--threshold 0.7]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.similar_cache import SimilarQuestionCache, jaccard, shingles  # noqa: E402
+
+# (已缓存的问题, 新问题, 是否应复用回答)
+PAIRS = [
+    # 同义改写: 语序、停用词、正反问不同
+    ("我今年财运如何", "今年我的财运怎么样", True),
+    ("我今年财运如何", "请问今年财运会怎么样呢？", True),
+    ("我适合创业吗", "我适不适合创业", True),
+    ("下个月适合跳槽吗", "下个月跳槽合适吗", True),
+    ("这次考研能成功吗", "这次考研可以成功吗？", True),
+    ("今年财运好吗", "今年财运好不好", True),
+    # 多出非极性字: 由阈值决定 (改动越大越不复用)
+    ("感情什么时候能稳定", "什么时候感情能稳定下来", False),
+    ("我今年财运如何", "我今年下半年财运如何", False),
+    ("我适合创业吗", "我适合在北京创业吗", False),
+    # 意思不同: 替换了内容字
+    ("我今年财运如何", "明年财运如何", False),
+    ("我适合创业吗", "我适合结婚吗", False),
+    ("下个月适合跳槽吗", "下个月适合搬家吗", False),
+    ("这次考研能成功吗", "这次面试能成功吗", False),
+    ("房价明年会跌吗", "房价明年会涨吗", False),
+    # 反义: 只差一个字，Jaccard 相似度接近甚至超过阈值
+    ("这只股票明天会涨吗", "这只股票明天会跌吗", False),
+    ("今年能考上研究生吗", "今年考不上研究生吗", False),
+    ("我能升职吗", "我不能升职吗", False),
+    ("这段感情能成吗", "这段感情能散吗", False),
+    ("今年财运好吗", "今年财运不好吗", False),
+    ("我今年下半年的财运如何", "我明年下半年的财运如何", False),
+]
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="相似问题缓存基准")
+    parser.add_argument("--entries", type=int, default=4096, help="同一作用域内的问题数")
+    parser.add_argument("--threshold", type=float, default=None, help="相似度阈值 (默认使用 AI_SIMILAR_THRESHOLD)")
+    args = parser.parse_args()
+    if args.threshold is None:
+        args.threshold = SimilarQuestionCache().threshold
+
+    correct = 0
+    problems = []
+    for cached, question, expected in PAIRS:
+        cache = SimilarQuestionCache(threshold=args.threshold)
+        cache.put("scope", cached, cached)
+        hit = cache.get("scope", question) is not None
+        correct += hit == expected
+        similarity = jaccard(shingles(cached), shingles(question))
+        mark = "ok " if hit == expected else "BAD"
+        print(f"{mark} {similarity:.2f} hit={hit!s:<5} {cached} / {question}")
+        if hit != expected:
+            kind = "误复用" if hit else "未命中"
+            problems.append(f"{kind}: {cached} / {question} (相似度 {similarity:.2f})")
+    print(f"{correct}/{len(PAIRS)} pairs as expected (threshold {args.threshold})")
+
+    rng = random.Random(0)
+    alphabet = "财运事业感情婚姻健康学业考试跳槽创业投资房产搬家出行合作官司子女父母今年明年下月"
+    cache = SimilarQuestionCache(threshold=args.threshold, maxsize=args.entries)
+    for i in range(args.entries):
+        cache.put("scope", "".join(rng.choices(alphabet, k=rng.randint(4, 12))), i)
+    queries = ["".join(rng.choices(alphabet, k=rng.randint(4, 12))) for _ in range(2000)]
+    start = time.perf_counter()
+    for question in queries:
+        cache.get("scope", question)
+    elapsed = (time.perf_counter() - start) / len(queries) * 1000
+    info = cache.info()
+    print(
+        f"{args.entries} entries: {elapsed:.3f}ms/lookup, "
+        f"avg candidates {info['avg_candidates']:.1f}, hit rate {info['hit_rate']:.2%}"
+    )
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+冷启动导入耗时基准
+
+在独立子进程中执行 `python -X importtime -c "import main"`，解析输出并报告:
+- 总导入耗时与最耗时的顶层包
+- 是否提前加载了应当延迟导入的重依赖
+
+以下情况返回非零退出码 (可用于 CI 防止冷启动回退):
+- 导入 main 时加载了 lunar_python / duckduckgo_search / numpy
+- 总导入耗时超过 --max-ms
+
+用法 (在 backend 目录下):
+    python scripts/bench_startup.py [--max-ms 1500] [--repeat 3] [--top 10]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# 冷启动时不应加载的依赖 (均已改为首次使用时导入)
+LAZY_MODULES = ("lunar_python", "duckduckgo_search", "numpy")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str = "main") -> list[tuple[int, int, int, str]]:
+    """
+    在子进程中导入模块并采集 importtime 数据
+
+    Returns:
+        [(自身耗时 us, 累计耗时 us, 嵌套深度, 模块名), ...]
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            rows.append((int(own), int(cumulative), len(indent) // 2, name))
+    return rows
+
+
+def summarize(rows: list[tuple[int, int, int, str]]) -> tuple[int, dict[str, int]]:
+    """汇总总耗时 (顶层导入累计之和) 与各顶层包的自身耗时之和"""
+    total = sum(cumulative for _, cumulative, depth, _ in rows if depth == 0)
+    packages: dict[str, int] = defaultdict(int)
+    for own, _, _, name in rows:
+        packages[name.split(".")[0]] += own
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动导入耗时基准")
+    parser.add_argument("--module", default="main", help="导入的模块 (默认 main)")
+    parser.add_argument("--max-ms", type=float, default=1500.0, help="总耗时上限 (毫秒)")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数 (取最小值)")
+    parser.add_argument("--top", type=int, default=10, help="显示最耗时的顶层包数量")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(args.repeat, 1))]
+    totals = [summarize(rows)[0] for rows in runs]
+    best = min(range(len(runs)), key=lambda i: totals[i])
+    total, packages = summarize(runs[best])
+
+    print(f"import {args.module}: {total / 1000:.1f} ms "
+          f"(best of {len(runs)}, all: {', '.join(f'{t / 1000:.1f}' for t in totals)})")
+    print(f"{'package':<28}{'self ms':>10}")
+    for name, own in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<28}{own / 1000:>10.1f}")
+
+    failed = False
+    loaded = sorted({name.split(".")[0] for *_, name in runs[best]} & set(LAZY_MODULES))
+    if loaded:
+        print(f"FAIL: 冷启动加载了应延迟导入的模块: {', '.join(loaded)}")
+        failed = True
+    if total / 1000 > args.max_ms:
+        print(f"FAIL: 导入耗时 {total / 1000:.1f} ms 超过上限 {args.max_ms:.0f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
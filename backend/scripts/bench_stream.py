@@ -0,0 +1,186 @@
+"""
+流式输出基准 (本地 Ollama 桩服务器)
+
+在本机启动一个模拟 Ollama 的 HTTP 桩服务器: /api/chat 每隔 --interval 秒
+产出一段文本，共 --tokens 段 (stream=true 时按 NDJSON 逐行发送，否则生成完毕后一次返回)。
+
+分别请求 /api/predict/detailed 与 /api/predict/detailed/stream (外应搜索使用
+空结果的桩搜索源)，对比:
+- 首个事件 (payload) 到达时间
+- 第一段 AI 文本到达时间
+- 完整回答到达时间
+并验证两种方式拼接出的回答一致、客户端断开后桩服务器停止生成。
+
+用法 (在 backend 目录下):
+    python scripts/bench_stream.py [--tokens 60] [--interval 0.02]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOKENS = 60
+INTERVAL = 0.02
+
+# 桩服务器已发送的 NDJSON 行数 (用于检查断开后是否停止生成)
+sent = {"lines": 0}
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    """模拟 Ollama /api/tags 与 /api/chat"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str = "application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        self._send(json.dumps({"models": [{"name": "qwen2.5:1.5b"}]}).encode())
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        pieces = [f"第{i}段。" for i in range(TOKENS)]
+        if not body.get("stream"):
+            time.sleep(TOKENS * INTERVAL)
+            message = {"role": "assistant", "content": "".join(pieces)}
+            self._send(json.dumps({"message": message, "done": True}).encode())
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for piece in pieces:
+                time.sleep(INTERVAL)
+                message = {"role": "assistant", "content": piece}
+                self._chunk(json.dumps({"message": message, "done": False}, ensure_ascii=False).encode() + b"\n")
+                sent["lines"] += 1
+            message = {"role": "assistant", "content": ""}
+            self._chunk(json.dumps({"message": message, "done": True}).encode() + b"\n")
+            self._chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def parse_events(lines):
+    """逐行解析 SSE，产出 (事件名, 数据)"""
+    event = None
+    for line in lines:
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+
+def serve(app) -> tuple:
+    """在后台线程启动 uvicorn (TestClient 会缓冲整个响应体，无法测量流式到达时间)"""
+    import socket
+
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def run(base: str):
+    import httpx
+
+    import main
+    from core.crawler import ContextCrawler, SearchProvider
+
+    class EmptyProvider(SearchProvider):
+        name = "empty"
+
+        def search(self, query, max_results):
+            return []
+
+    main.crawler = ContextCrawler(provider=EmptyProvider(), cache_size=0)
+    main.ai.base_url = base
+    body = {
+        "birth_year": 1990, "birth_month": 5, "birth_day": 15, "birth_hour": 10,
+        "gender": "male", "nums": [3, 8, 5], "question": "今年财运怎么样",
+        "no_cache": True,  # 跳过回复缓存，每次都请求桩服务器
+    }
+
+    server, thread, url = serve(main.app)
+    with httpx.Client(base_url=url, timeout=30) as client:
+        start = time.perf_counter()
+        full = client.post("/api/predict/detailed", json=body).json()
+        print(f"non-stream detailed: {(time.perf_counter() - start) * 1000:7.1f}ms (whole answer)")
+
+        start = time.perf_counter()
+        marks, text, done = {}, [], None
+        with client.stream("POST", "/api/predict/detailed/stream", json=body) as response:
+            for event, data in parse_events(response.iter_lines()):
+                marks.setdefault(event, (time.perf_counter() - start) * 1000)
+                if event == "token":
+                    text.append(data["text"])
+                elif event == "done":
+                    done = data
+        print(
+            f"stream detailed:     payload {marks['payload']:6.1f}ms  "
+            f"first token {marks['token']:6.1f}ms  done {marks['done']:7.1f}ms"
+        )
+        print(f"  done={done}  identical={''.join(text) == full['ai_report']}")
+
+        # 读到第一段文本后断开，桩服务器应随即停止生成
+        sent["lines"] = 0
+        with client.stream("POST", "/api/chat/stream", json={
+            "question": "何时行动", "hexagram": full["hexagram"], "no_cache": True,
+        }) as response:
+            for event, _ in parse_events(response.iter_lines()):
+                if event == "token":
+                    break
+        time.sleep(TOKENS * INTERVAL / 2)
+        print(f"chat stream closed after first token: stub sent {sent['lines']}/{TOKENS} lines")
+
+        metrics = client.get("/api/metrics").json()
+        print(f"ai.stream: {metrics['ai']['stream']}")
+        print(f"sse: {metrics['sse']}")
+    server.should_exit = True
+    thread.join()
+
+
+def main():
+    global TOKENS, INTERVAL
+    parser = argparse.ArgumentParser(description="流式输出基准 (本地 Ollama 桩服务器)")
+    parser.add_argument("--tokens", type=int, default=TOKENS, help="每次生成的文本段数")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="每段文本的生成间隔 (秒)")
+    args = parser.parse_args()
+    TOKENS, INTERVAL = args.tokens, args.interval
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run(f"http://127.0.0.1:{server.server_port}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
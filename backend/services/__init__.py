@@ -1,4 +1,4 @@
 # 服务层模块
-from .ai_service import AIService
+from .ai_service import AIService, AIStreamError, LatencyStats
 
-__all__ = ["AIService"]
+__all__ = ["AIService", "AIStreamError", "LatencyStats"]
@@ -2,17 +2,29 @@
 AI 服务模块 (AI Service)
 
 负责:
-- 组合 Prompt
-- 调用 Ollama API
+- 组合对话消息: 固定的系统提示词与命盘信息在前 (同一会话中逐字节不变)，
+  外应、问题等每轮变化的内容在后，Ollama 可复用前缀的 KV 缓存而不必重新预填充
+- 调用 Ollama /api/chat (keep_alive 使模型与 KV 缓存常驻)
 - 生成简单版/详细版分析报告
 - 自动检测可用模型
+- 合并相同消息的并发请求 (SingleFlight)
+- 复用长连接: 全部请求共享一个 httpx.AsyncClient (随应用生命周期创建与关闭)
+- 流式生成: 增量读取 Ollama 的 NDJSON 流，逐段产出文本并统计首字延迟 (TTFB)
+- 回复缓存: 按 (模型, 消息摘要, 生成参数) 精确匹配，内存 LRU + 可选 SQLite 持久层
 """
 
 import httpx
+from collections import deque
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
+import hashlib
 import json
 import os
+import time
+
+from core.cache import LRUCache, SQLiteCache
+from core.singleflight import SingleFlight
 
 
 # Ollama 配置 (支持环境变量，方便 Docker 部署)
@@ -29,6 +41,82 @@ PREFERRED_MODELS = [
 
 DEFAULT_MODEL = "qwen2.5:1.5b"  # 默认回退模型
 
+# 连接池: 最大连接数、最大空闲长连接数、空闲长连接保留时间 (秒)
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "10"))
+OLLAMA_MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "10"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+
+# 分阶段超时 (秒): 建立连接、读取响应 (生成耗时)、等待连接池空闲连接
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))
+OLLAMA_POOL_TIMEOUT = float(os.getenv("OLLAMA_POOL_TIMEOUT", "10"))
+
+# 健康检查、模型检测的超时 (秒)
+PROBE_TIMEOUT = 5.0
+
+# 模型在 Ollama 中的常驻时间 (如 "30m"，-1 表示常驻; 卸载后再次请求需重新加载并预填充)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# 追问时最多带上的历史消息数，及历史窗口前移的步长 (消息数)
+HISTORY_LIMIT = 10
+HISTORY_STEP = 4
+
+# 系统提示词 (各模式共用且固定不变)
+SYSTEM_PROMPT = """你是一位精通梅花易数、八字命理和风水学的资深命理师。
+用户通过报数起卦 (详细版另有生辰八字与风水格局)，你需要结合以下命盘信息与网络搜索的最新资讯分析吉凶。
+请用通俗易懂的语言解读，给出专业且实用的建议。"""
+
+# 各模式的回答要求 (随用户消息发送，不影响系统消息前缀)
+SIMPLE_INSTRUCTION = "请根据以上信息，给出你的分析和建议。回答需要简洁有力，控制在 200 字以内。"
+
+DETAILED_INSTRUCTION = """请综合分析命盘、卦象和风水格局，严格按照以下三个部分输出分析报告：
+
+## 一、命 (能否做？)
+分析八字格局，判断命主是否有能力承载此事。
+
+## 二、运 (何时做？)
+分析卦象吉凶，判断事情的时机和趋势。
+
+## 三、局 (在哪做？)
+分析风水方位，给出具体的布局建议。
+
+## 总结
+综合以上分析，给出最终建议。
+
+回答需要专业且有条理，总字数控制在 600 字以内。"""
+
+CHAT_INSTRUCTION = "请结合以上信息回答用户的追问。回答要简洁有力，控制在 300 字以内。"
+
+# 生成参数
+GENERATE_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "num_predict": 1024,
+}
+
+# 回复缓存: 内存条目数 (0 表示禁用)、有效期 (秒)、SQLite 持久层路径 (空表示不启用) 与条目上限
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "512"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "86400"))
+AI_CACHE_DB = os.getenv("AI_CACHE_DB", "")
+AI_CACHE_DB_SIZE = int(os.getenv("AI_CACHE_DB_SIZE", "20000"))
+
+# 延迟统计保留的最近样本数
+LATENCY_WINDOW = 256
+
+# 对话消息列表 ({"role": ..., "content": ...})
+Messages = List[dict]
+
+
+def _parse_keep_alive(value: str):
+    """keep_alive 取值: 纯数字按秒数传递，其余 (如 "30m") 原样传递"""
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
 
 @dataclass
 class AIResponse:
@@ -37,6 +125,41 @@ class AIResponse:
     model: str
     success: bool
     error: Optional[str] = None
+    cached: bool = False          # 是否来自回复缓存
+
+
+class AIStreamError(Exception):
+    """流式生成失败 (消息可直接展示给用户)"""
+
+
+class LatencyStats:
+    """延迟统计: 累计次数与最近 window 个样本的均值、分位数 (毫秒)"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.count = 0
+        self.last: Optional[float] = None
+        self.samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        """记录一次耗时 (秒)"""
+        self.count += 1
+        self.last = seconds * 1000
+        self.samples.append(self.last)
+
+    def info(self) -> dict:
+        """统计结果 (毫秒，无样本时为 None)"""
+        ordered = sorted(self.samples)
+
+        def quantile(q: float) -> Optional[float]:
+            return round(ordered[min(int(len(ordered) * q), len(ordered) - 1)], 1) if ordered else None
+
+        return {
+            "count": self.count,
+            "last_ms": round(self.last, 1) if self.last is not None else None,
+            "avg_ms": round(sum(ordered) / len(ordered), 1) if ordered else None,
+            "p50_ms": quantile(0.5),
+            "p95_ms": quantile(0.95),
+        }
 
 
 class AIService:
@@ -46,7 +169,17 @@ class AIService:
         self,
         base_url: str = OLLAMA_BASE_URL,
         model: str = None,  # None 表示自动检测
-        timeout: float = 120.0,
+        timeout: float = OLLAMA_READ_TIMEOUT,
+        connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+        pool_timeout: float = OLLAMA_POOL_TIMEOUT,
+        max_connections: int = OLLAMA_MAX_CONNECTIONS,
+        max_keepalive: int = OLLAMA_MAX_KEEPALIVE,
+        keepalive_expiry: float = OLLAMA_KEEPALIVE_EXPIRY,
+        cache_size: int = AI_CACHE_SIZE,
+        cache_ttl: float = AI_CACHE_TTL,
+        cache_db: Optional[str] = AI_CACHE_DB,
+        cache_db_size: Optional[int] = AI_CACHE_DB_SIZE,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
     ):
         """
         初始化 AI 服务
@@ -54,12 +187,180 @@ class AIService:
         Args:
             base_url: Ollama API 地址
             model: 使用的模型名称 (None 则自动检测)
-            timeout: 请求超时时间 (秒)
+            timeout: 读取响应超时时间 (秒)
+            connect_timeout: 建立连接超时时间 (秒)
+            pool_timeout: 等待连接池空闲连接的超时时间 (秒)
+            max_connections: 连接池最大连接数
+            max_keepalive: 最大空闲长连接数
+            keepalive_expiry: 空闲长连接保留时间 (秒)
+            cache_size: 回复缓存的内存容量 (0 表示禁用)
+            cache_ttl: 回复缓存有效期 (秒)
+            cache_db: 回复缓存的 SQLite 持久层路径 (None 或空字符串表示不启用)
+            cache_db_size: 持久层最大条目数 (None 表示不限)
+            keep_alive: 模型在 Ollama 中的常驻时间 (如 "30m"，数字表示秒，-1 表示常驻)
         """
         self.base_url = base_url
         self._model = model
         self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_timeout = pool_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.keep_alive = _parse_keep_alive(str(keep_alive))
         self._detected_model = None
+        self.flight = SingleFlight()
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+        self.disk_cache = (
+            SQLiteCache(cache_db, ttl=cache_ttl, table="ai_cache", maxsize=cache_db_size)
+            if cache_db else None
+        )
+        self.cache_bypassed = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        # 连接池统计
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self.pool_timeouts = 0
+        # 流式生成统计: 首字延迟 (发出请求到收到第一段文本)、完整生成耗时
+        self.streams = 0
+        self.stream_errors = 0
+        self.ttfb = LatencyStats()
+        self.stream_duration = LatencyStats()
+        # 预填充统计: Ollama 实际计算的 Prompt token 数与耗时 (命中 KV 缓存的前缀不计)
+        self.prompt_evals = 0
+        self.prompt_tokens = 0
+        self.prefill = LatencyStats()
+
+    async def start(self):
+        """创建共享的 HTTP 客户端 (应用启动时调用)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(
+                    self.timeout,
+                    connect=self.connect_timeout,
+                    write=self.connect_timeout,
+                    pool=self.pool_timeout,
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+
+    async def aclose(self):
+        """关闭 HTTP 客户端与其中的长连接 (应用退出时调用)"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    @asynccontextmanager
+    async def _request(self):
+        """获取共享客户端 (未启动时自动创建) 并统计进行中的请求数"""
+        if self._client is None:
+            await self.start()
+        self.requests += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            yield self._client
+        except httpx.PoolTimeout:
+            self.pool_timeouts += 1
+            raise
+        finally:
+            self.active -= 1
+
+    def pool_info(self) -> dict:
+        """
+        连接池统计
+
+        saturation 为进行中 (含排队) 请求数与最大连接数之比，超过 1 表示有请求在排队等待空闲连接
+        """
+        connections = idle = None
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is not None:
+            try:
+                connections = len(pool.connections)
+                idle = sum(1 for c in pool.connections if c.is_idle())
+            except Exception:
+                pass
+        return {
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            "keepalive_expiry": self.keepalive_expiry,
+            "requests": self.requests,
+            "active": self.active,
+            "peak_active": self.peak_active,
+            "saturation": self.active / self.max_connections if self.max_connections else 0.0,
+            "pool_timeouts": self.pool_timeouts,
+            "connections": connections,
+            "idle_connections": idle,
+        }
+
+    def stream_info(self) -> dict:
+        """流式生成统计 (首字延迟与完整生成耗时，单位毫秒)"""
+        return {
+            "streams": self.streams,
+            "errors": self.stream_errors,
+            "ttfb": self.ttfb.info(),
+            "duration": self.stream_duration.info(),
+        }
+
+    def prefill_info(self) -> dict:
+        """Prompt 预填充统计 (平均实际计算的 token 数与耗时)"""
+        return {
+            "keep_alive": self.keep_alive,
+            "requests": self.prompt_evals,
+            "avg_prompt_tokens": self.prompt_tokens / self.prompt_evals if self.prompt_evals else None,
+            "duration": self.prefill.info(),
+        }
+
+    def cache_info(self) -> dict:
+        """回复缓存统计 (内存与持久层命中、被跳过的次数)"""
+        memory = self.cache.info()
+        disk = self.disk_cache.info() if self.disk_cache is not None else None
+        hits = memory["hits"] + (disk["hits"] if disk else 0)
+        lookups = memory["hits"] + memory["misses"]
+        return {
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "bypassed": self.cache_bypassed,
+            "memory": memory,
+            "disk": disk,
+        }
+
+    @staticmethod
+    def _cache_key(model: str, messages: Messages, options: dict) -> str:
+        """缓存键: 模型 + 消息摘要 + 生成参数摘要"""
+        prompt_digest = hashlib.sha256(
+            json.dumps(messages, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        options_digest = hashlib.sha256(
+            json.dumps(options, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{model}:{prompt_digest}:{options_digest}"
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """依次查内存、SQLite 缓存 (SQLite 命中时回填内存)"""
+        content = self.cache.get(key)
+        if content is None and self.disk_cache is not None:
+            try:
+                content = self.disk_cache.get(key)
+            except Exception:
+                content = None  # 持久层故障不影响生成
+            if content is not None:
+                self.cache.put(key, content)
+        return content
+
+    def _cache_put(self, key: str, content: str):
+        """写入内存与 SQLite 缓存"""
+        self.cache.put(key, content)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.put(key, content)
+            except Exception:
+                pass
 
     @property
     def model(self) -> str:
@@ -78,8 +379,8 @@ class AIService:
             最佳可用模型名称，如果没有则返回 None
         """
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
+            async with self._request() as client:
+                response = await client.get("/api/tags", timeout=PROBE_TIMEOUT)
                 if response.status_code != 200:
                     return None
                 
@@ -108,177 +409,334 @@ class AIService:
     async def check_health(self) -> bool:
         """检查 Ollama 服务是否可用，并自动检测模型"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                if response.status_code == 200:
-                    # 顺便检测最佳模型
-                    await self.detect_best_model()
-                    return True
-                return False
+            async with self._request() as client:
+                response = await client.get("/api/tags", timeout=PROBE_TIMEOUT)
+            if response.status_code == 200:
+                # 顺便检测最佳模型
+                await self.detect_best_model()
+                return True
+            return False
         except Exception:
             return False
 
-    def _build_simple_prompt(
+    def _chart_block(
         self,
         hexagram: dict,
-        context: str,
-        question: str,
+        bazi: Optional[dict] = None,
+        fengshui: Optional[dict] = None,
     ) -> str:
-        """构建简单版 Prompt"""
-        system = """你是一位精通梅花易数的命理大师。
-用户通过报数起卦，你需要根据卦象分析吉凶。
-请用通俗易懂的语言解读，给出具体的建议。
-回答需要简洁有力，控制在 200 字以内。"""
+        """
+        命盘信息 (卦象，详细版另加八字、风水)
 
-        user = f"""用户问题：{question}
+        只由排盘结果决定，同一次会话中逐字节不变，与系统提示词一起构成各轮请求的共同前缀
+        """
+        original = hexagram.get("original", {})
+        ti_gua = hexagram.get("ti_gua", {})
+        yong_gua = hexagram.get("yong_gua", {})
+        block = (
+            "【梅花卦象】\n"
+            f"本卦：{original.get('name', '未知')}"
+            f"（上卦{original.get('upper', {}).get('name', '')}，"
+            f"下卦{original.get('lower', {}).get('name', '')}）\n"
+            f"变卦：{hexagram.get('changed', {}).get('name', '未知')}\n"
+            f"体卦：{ti_gua.get('name', '')}（{ti_gua.get('element', '')}）\n"
+            f"用卦：{yong_gua.get('name', '')}（{yong_gua.get('element', '')}）\n"
+            f"体用关系：{hexagram.get('ti_yong_relation', '')}\n"
+            f"初步判断：{hexagram.get('interpretation', '')}"
+        )
 
-起卦结果：
-- 本卦：{hexagram.get('original', {}).get('name', '未知')}
-  （上卦{hexagram.get('original', {}).get('upper', {}).get('name', '')}，
-    下卦{hexagram.get('original', {}).get('lower', {}).get('name', '')}）
-- 变卦：{hexagram.get('changed', {}).get('name', '未知')}
-- 体卦：{hexagram.get('ti_gua', {}).get('name', '')}（{hexagram.get('ti_gua', {}).get('element', '')}）
-- 用卦：{hexagram.get('yong_gua', {}).get('name', '')}（{hexagram.get('yong_gua', {}).get('element', '')}）
-- 体用关系：{hexagram.get('ti_yong_relation', '')}
-- 初步判断：{hexagram.get('interpretation', '')}
+        if bazi:
+            four_pillars = bazi.get("four_pillars", {})
+            block += (
+                "\n\n【八字信息】\n"
+                f"年柱：{four_pillars.get('year', '')}\n"
+                f"月柱：{four_pillars.get('month', '')}\n"
+                f"日柱：{four_pillars.get('day', '')}\n"
+                f"时柱：{four_pillars.get('hour', '')}\n"
+                f"日主：{bazi.get('day_master', '')}（{bazi.get('day_master_wuxing', '')}）\n"
+                f"身强弱：{bazi.get('strength', '')}\n"
+                f"喜用神：{'、'.join(bazi.get('favorable_elements', []))}"
+            )
 
-外应参考（网络信息）：
-{context}
+            # 大运只取当前与下一步，以及当年流年
+            luck = bazi.get("luck") or {}
+            current_luck = luck.get("current")
+            next_luck = luck.get("next")
+            annual = luck.get("annual")
+            if current_luck:
+                block += (
+                    f"\n当前大运：{current_luck['ganzhi']}"
+                    f"（{current_luck['start_year']}-{current_luck['end_year']}）"
+                )
+            if next_luck:
+                block += (
+                    f"\n下步大运：{next_luck['ganzhi']}"
+                    f"（{next_luck['start_year']}-{next_luck['end_year']}）"
+                )
+            if annual:
+                block += f"\n流年：{annual['year']}年{annual['ganzhi']}"
+
+        if fengshui:
+            ming_gua = fengshui.get("ming_gua", {})
+            flying = fengshui.get("flying_stars", {})
+            block += (
+                "\n\n【风水格局】\n"
+                f"本命卦：{ming_gua.get('gua_name', '')}（{ming_gua.get('life_group', '')}）\n"
+                f"个人吉方：{'、'.join(ming_gua.get('favorable_directions', []))}\n"
+                f"流年财位：{flying.get('wealth_position', '')}\n"
+                f"流年桃花位：{flying.get('romance_position', '')}\n"
+                f"流年吉方：{'、'.join(flying.get('auspicious', []))}"
+            )
 
-请根据以上信息，给出你的分析和建议。"""
+        return block
 
-        return f"<|im_start|>system\n{system}<|im_end|>\n<|im_start|>user\n{user}<|im_end|>\n<|im_start|>assistant\n"
+    def _system_message(
+        self,
+        hexagram: dict,
+        bazi: Optional[dict] = None,
+        fengshui: Optional[dict] = None,
+    ) -> dict:
+        """系统消息: 固定的系统提示词 + 命盘信息"""
+        return {
+            "role": "system",
+            "content": f"{SYSTEM_PROMPT}\n\n{self._chart_block(hexagram, bazi, fengshui)}",
+        }
+
+    def _user_message(self, context: str, question: str, instruction: str) -> dict:
+        """用户消息: 外应、问题与本轮的回答要求 (每轮变化的内容都放在这里)"""
+        return {
+            "role": "user",
+            "content": f"【外应参考】\n{context}\n\n【用户问题】\n{question}\n\n{instruction}",
+        }
+
+    def _history_messages(self, history: List[dict]) -> Messages:
+        """
+        追问的历史消息
 
-    def _build_detailed_prompt(
+        最多保留 HISTORY_LIMIT 条，窗口按 HISTORY_STEP 整段前移 (而非每轮丢弃最早一条)，
+        使连续几轮请求的消息前缀保持一致。
+        回答附带当轮外应 (context.summary) 时，还原当轮发送的完整用户消息
+        """
+        history = [h for h in history if not h.get("isError")]
+        start = max(len(history) - HISTORY_LIMIT, 0)
+        start += -start % HISTORY_STEP
+        messages = []
+        for i, h in enumerate(history[start:], start):
+            content = h.get("content", "")
+            if h.get("role") != "user":
+                messages.append({"role": "assistant", "content": content})
+                continue
+            reply = history[i + 1] if i + 1 < len(history) else {}
+            summary = (reply.get("context") or {}).get("summary")
+            if reply.get("role") != "user" and summary is not None:
+                messages.append(self._user_message(summary, content, CHAT_INSTRUCTION))
+            else:
+                messages.append({"role": "user", "content": content})
+        return messages
+
+    def _build_simple_messages(
+        self,
+        hexagram: dict,
+        context: str,
+        question: str,
+    ) -> Messages:
+        """构建简单版对话消息"""
+        return [
+            self._system_message(hexagram),
+            self._user_message(context, question, SIMPLE_INSTRUCTION),
+        ]
+
+    def _build_detailed_messages(
         self,
         bazi: dict,
         hexagram: dict,
         fengshui: dict,
         context: str,
         question: str,
-    ) -> str:
-        """构建详细版 Prompt (命、运、局三段式)"""
-        system = """你是一位精通八字命理、梅花易数和风水学的资深命理师。
-你需要综合分析用户的命盘、卦象和风水格局，给出全面的战略建议。
-
-请严格按照以下三个部分输出分析报告：
-
-## 一、命 (能否做？)
-分析八字格局，判断命主是否有能力承载此事。
-
-## 二、运 (何时做？)
-分析卦象吉凶，判断事情的时机和趋势。
-
-## 三、局 (在哪做？)
-分析风水方位，给出具体的布局建议。
-
-## 总结
-综合以上分析，给出最终建议。
-
-回答需要专业且有条理，总字数控制在 600 字以内。"""
-
-        # 格式化八字
-        four_pillars = bazi.get("four_pillars", {})
-        bazi_str = (
-            f"年柱：{four_pillars.get('year', '')}\n"
-            f"月柱：{four_pillars.get('month', '')}\n"
-            f"日柱：{four_pillars.get('day', '')}\n"
-            f"时柱：{four_pillars.get('hour', '')}\n"
-            f"日主：{bazi.get('day_master', '')}（{bazi.get('day_master_wuxing', '')}）\n"
-            f"身强弱：{bazi.get('strength', '')}\n"
-            f"喜用神：{'、'.join(bazi.get('favorable_elements', []))}"
-        )
-
-        # 格式化卦象
-        hexagram_str = (
-            f"本卦：{hexagram.get('original', {}).get('name', '')}\n"
-            f"变卦：{hexagram.get('changed', {}).get('name', '')}\n"
-            f"体用关系：{hexagram.get('ti_yong_relation', '')}\n"
-            f"初步判断：{hexagram.get('interpretation', '')}"
-        )
-
-        # 格式化风水
-        ming_gua = fengshui.get("ming_gua", {})
-        flying = fengshui.get("flying_stars", {})
-        fengshui_str = (
-            f"本命卦：{ming_gua.get('gua_name', '')}（{ming_gua.get('life_group', '')}）\n"
-            f"个人吉方：{'、'.join(ming_gua.get('favorable_directions', []))}\n"
-            f"流年财位：{flying.get('wealth_position', '')}\n"
-            f"流年桃花位：{flying.get('romance_position', '')}\n"
-            f"流年吉方：{'、'.join(flying.get('auspicious', []))}"
-        )
-
-        user = f"""用户问题：{question}
-
-【八字信息】
-{bazi_str}
-
-【梅花卦象】
-{hexagram_str}
-
-【风水格局】
-{fengshui_str}
-
-【外应参考】
-{context}
-
-请按照「命、运、局」三段式格式，给出完整分析报告。"""
-
-        return f"<|im_start|>system\n{system}<|im_end|>\n<|im_start|>user\n{user}<|im_end|>\n<|im_start|>assistant\n"
-
-    async def generate(self, prompt: str, stream: bool = False) -> AIResponse:
+    ) -> Messages:
+        """构建详细版对话消息 (命、运、局三段式)"""
+        return [
+            self._system_message(hexagram, bazi, fengshui),
+            self._user_message(context, question, DETAILED_INSTRUCTION),
+        ]
+
+    def _build_chat_messages(
+        self,
+        hexagram: dict,
+        bazi: Optional[dict],
+        fengshui: Optional[dict],
+        history: List[dict],
+        context: str,
+        question: str,
+    ) -> Messages:
+        """构建追问对话消息 (系统消息与预测时相同，其后依次为历史对话与本轮追问)"""
+        return [
+            self._system_message(hexagram, bazi, fengshui),
+            *self._history_messages(history),
+            self._user_message(context, question, CHAT_INSTRUCTION),
+        ]
+
+    def _chat_payload(self, model: str, messages: Messages, stream: bool) -> dict:
+        """Ollama /api/chat 请求体"""
+        return {
+            "model": model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": GENERATE_OPTIONS,
+        }
+
+    def _record_prefill(self, data: dict):
+        """记录 Ollama 返回的 Prompt 预填充统计 (命中 KV 缓存的前缀不计入)"""
+        if data.get("prompt_eval_duration") is None:
+            return
+        self.prompt_evals += 1
+        self.prompt_tokens += data.get("prompt_eval_count", 0)
+        self.prefill.record(data["prompt_eval_duration"] / 1e9)
+
+    async def generate(self, messages: Messages, use_cache: bool = True) -> AIResponse:
         """
         调用 Ollama 生成回复
 
+        相同模型、消息与生成参数的回复命中缓存时直接返回;
+        并发的相同请求只请求一次 Ollama，共享同一结果
+        (需要边生成边输出时使用 generate_stream)
+
         Args:
-            prompt: 完整的提示词
-            stream: 是否使用流式输出
+            messages: 对话消息 (role / content)
+            use_cache: 是否读取回复缓存 (False 时重新生成并刷新缓存)
 
         Returns:
             AIResponse: AI 回复结果
         """
+        model = self.model
+        key = self._cache_key(model, messages, GENERATE_OPTIONS)
+        if use_cache:
+            content = self._cache_get(key)
+            if content is not None:
+                return AIResponse(content=content, model=model, success=True, cached=True)
+        else:
+            self.cache_bypassed += 1
+
+        async def run() -> AIResponse:
+            response = await self._generate(model, messages)
+            if response.success and response.content:
+                self._cache_put(key, response.content)
+            return response
+
+        return await self.flight.do(key, run)
+
+    async def generate_stream(self, messages: Messages, use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        流式调用 Ollama 生成回复
+
+        增量读取 NDJSON 响应，每收到一段文本即产出; 调用方提前停止迭代
+        (如客户端断开) 时关闭连接，Ollama 随即停止生成。
+        与 generate 共用回复缓存 (命中时一次产出完整回复，完整生成后写入缓存);
+        流式调用各自独立，不经过 SingleFlight 合并
+
+        Args:
+            messages: 对话消息 (role / content)
+            use_cache: 是否读取回复缓存 (False 时重新生成并刷新缓存)
+
+        Yields:
+            str: 逐段生成的文本
+
+        Raises:
+            AIStreamError: Ollama 返回错误、超时、连接失败或未发送 done 即结束
+        """
+        model = self.model
+        key = self._cache_key(model, messages, GENERATE_OPTIONS)
+        if use_cache:
+            content = self._cache_get(key)
+            if content is not None:
+                yield content
+                return
+        else:
+            self.cache_bypassed += 1
+
+        self.streams += 1
+        pieces = []
+        start = time.perf_counter()
+        first = True
+        done = False
+        try:
+            async with self._request() as client:
+                async with client.stream(
+                    "POST", "/api/chat", json=self._chat_payload(model, messages, True)
+                ) as response:
+                    if response.status_code != 200:
+                        raise AIStreamError(f"Ollama API 返回错误: {response.status_code}")
+
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if data.get("error"):
+                            raise AIStreamError(data["error"])
+                        text = (data.get("message") or {}).get("content", "")
+                        if text:
+                            if first:
+                                first = False
+                                self.ttfb.record(time.perf_counter() - start)
+                            pieces.append(text)
+                            yield text
+                        if data.get("done"):
+                            done = True
+                            self._record_prefill(data)
+                            break
+            # 未收到 done 即结束的流 (上游中途断开) 是截断的回复，不写入缓存
+            if not done:
+                raise AIStreamError("回复未完成: Ollama 在生成结束前断开")
+            self.stream_duration.record(time.perf_counter() - start)
+            if pieces:
+                self._cache_put(key, "".join(pieces))
+
+        except AIStreamError:
+            self.stream_errors += 1
+            raise
+        except httpx.TimeoutException:
+            self.stream_errors += 1
+            raise AIStreamError("请求超时，请稍后重试")
+        except (httpx.HTTPError, ValueError) as e:
+            self.stream_errors += 1
+            raise AIStreamError(str(e) or type(e).__name__)
+
+    async def _generate(self, model: str, messages: Messages) -> AIResponse:
+        """请求 Ollama /api/chat (不合并)"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with self._request() as client:
                 response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.7,
-                            "top_p": 0.9,
-                            "num_predict": 1024,
-                        },
-                    },
+                    "/api/chat", json=self._chat_payload(model, messages, False)
                 )
 
                 if response.status_code != 200:
                     return AIResponse(
                         content="",
-                        model=self.model,
+                        model=model,
                         success=False,
                         error=f"Ollama API 返回错误: {response.status_code}",
                     )
 
                 data = response.json()
+                self._record_prefill(data)
                 return AIResponse(
-                    content=data.get("response", ""),
-                    model=self.model,
+                    content=(data.get("message") or {}).get("content", ""),
+                    model=model,
                     success=True,
                 )
 
         except httpx.TimeoutException:
             return AIResponse(
                 content="",
-                model=self.model,
+                model=model,
                 success=False,
                 error="请求超时，请稍后重试",
             )
         except Exception as e:
             return AIResponse(
                 content="",
-                model=self.model,
+                model=model,
                 success=False,
                 error=str(e),
             )
@@ -288,6 +746,7 @@ class AIService:
         hexagram: dict,
         context: str,
         question: str,
+        use_cache: bool = True,
     ) -> AIResponse:
         """
         简单版分析
@@ -296,12 +755,13 @@ class AIService:
             hexagram: 梅花卦象结果 (字典格式)
             context: 外应搜索摘要
             question: 用户问题
+            use_cache: 是否读取回复缓存
 
         Returns:
             AIResponse: AI 分析结果
         """
-        prompt = self._build_simple_prompt(hexagram, context, question)
-        return await self.generate(prompt)
+        messages = self._build_simple_messages(hexagram, context, question)
+        return await self.generate(messages, use_cache=use_cache)
 
     async def analyze_detailed(
         self,
@@ -310,6 +770,7 @@ class AIService:
         fengshui: dict,
         context: str,
         question: str,
+        use_cache: bool = True,
     ) -> AIResponse:
         """
         详细版分析 (命、运、局)
@@ -320,9 +781,81 @@ class AIService:
             fengshui: 风水结果 (字典格式)
             context: 外应搜索摘要
             question: 用户问题
+            use_cache: 是否读取回复缓存
 
         Returns:
             AIResponse: AI 分析报告
         """
-        prompt = self._build_detailed_prompt(bazi, hexagram, fengshui, context, question)
-        return await self.generate(prompt)
+        messages = self._build_detailed_messages(bazi, hexagram, fengshui, context, question)
+        return await self.generate(messages, use_cache=use_cache)
+
+    def analyze_simple_stream(
+        self,
+        hexagram: dict,
+        context: str,
+        question: str,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """简单版分析 (流式，参数同 analyze_simple)"""
+        return self.generate_stream(
+            self._build_simple_messages(hexagram, context, question), use_cache=use_cache
+        )
+
+    def analyze_detailed_stream(
+        self,
+        bazi: dict,
+        hexagram: dict,
+        fengshui: dict,
+        context: str,
+        question: str,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """详细版分析 (流式，参数同 analyze_detailed)"""
+        return self.generate_stream(
+            self._build_detailed_messages(bazi, hexagram, fengshui, context, question),
+            use_cache=use_cache,
+        )
+
+    async def chat(
+        self,
+        hexagram: dict,
+        bazi: Optional[dict],
+        fengshui: Optional[dict],
+        history: List[dict],
+        context: str,
+        question: str,
+        use_cache: bool = True,
+    ) -> AIResponse:
+        """
+        追问
+
+        Args:
+            hexagram: 当前卦象 (字典格式)
+            bazi: 八字信息 (详细版，可为 None)
+            fengshui: 风水信息 (详细版，可为 None)
+            history: 对话历史 (见 _history_messages)
+            context: 外应搜索摘要
+            question: 追问问题
+            use_cache: 是否读取回复缓存
+
+        Returns:
+            AIResponse: AI 回答
+        """
+        messages = self._build_chat_messages(hexagram, bazi, fengshui, history, context, question)
+        return await self.generate(messages, use_cache=use_cache)
+
+    def chat_stream(
+        self,
+        hexagram: dict,
+        bazi: Optional[dict],
+        fengshui: Optional[dict],
+        history: List[dict],
+        context: str,
+        question: str,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """追问 (流式，参数同 chat)"""
+        return self.generate_stream(
+            self._build_chat_messages(hexagram, bazi, fengshui, history, context, question),
+            use_cache=use_cache,
+        )
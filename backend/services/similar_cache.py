@@ -0,0 +1,287 @@
+"""
+相似问题缓存 (Similar Question Cache)
+
+同一卦象 (详细版另加同一命盘、风水) 下，措辞不同但意思相近的问题
+(如「我今年财运如何」与「今年我的财运怎么样」) 直接复用已生成的回答，
+同时跳过外应搜索与 AI 生成。
+
+完全在本地计算，不依赖向量模型:
+- 问题先把正反问 (「适不适合」「会不会」) 还原为肯定形式，再经 normalize_query
+  规范化 (NFKC、小写、去停用词与标点)，取单字与字符 n-gram (单字使语序调整后仍有较高重合度)
+- 每个问题计算 MinHash 签名，按 LSH 分段 (band) 建倒排桶，只有同一作用域内、
+  至少一段签名相同的历史问题才作为候选
+- 内容字 (去停用词后的单字) 只允许一方比另一方多出若干字，且多出的字不含否定、
+  反义等极性字 (见 POLARITY_CHARS): 替换字 (「会涨」与「会跌」) 或插入否定
+  (「考上」与「考不上」) 都可能使意思相反，Jaccard 相似度却可能很高
+- 再按 n-gram 集合的精确 Jaccard 相似度复核，不低于阈值取最相似的一条
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from core.crawler import normalize_query
+
+from .ai_service import LatencyStats
+
+
+# 相似度阈值 (Jaccard，0-1)、最多保留的问题数 (0 表示禁用)、有效期 (秒)
+# 意思相反的问题由内容字规则排除 (单靠阈值不够: 「会涨」与「会跌」可达 0.73)，阈值只衡量措辞差异
+AI_SIMILAR_THRESHOLD = float(os.getenv("AI_SIMILAR_THRESHOLD", "0.6"))
+AI_SIMILAR_SIZE = int(os.getenv("AI_SIMILAR_SIZE", "4096"))
+AI_SIMILAR_TTL = float(os.getenv("AI_SIMILAR_TTL", "86400"))
+
+# MinHash 排列数与 LSH 分段数 (每段 NUM_PERM // BANDS 行)
+# 16 段 x 4 行时，Jaccard 约 0.5 的问题有一半概率成为候选，0.6 约 89%，0.7 以上约 99%
+NUM_PERM = 64
+BANDS = 16
+
+# 字符 n-gram 长度
+NGRAM = 2
+
+# 极性字: 一方多出其中任一字时不复用 (否定词与常见的涨跌、吉凶等反义字)
+POLARITY_CHARS = frozenset("不没无非未别莫勿否难反" "涨跌升降增减赚亏赔盈输赢胜败吉凶好坏")
+
+# 正反问 (如「适不适合」「会不会」「有没有」): 还原为肯定形式，避免「不」被当作否定
+_A_NOT_A_RE = re.compile(r"(\w)[不没]\1")
+
+# MinHash 使用的梅森素数与固定种子的哈希参数 (a * h + b) mod p
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PARAMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(question: str, n: int = NGRAM) -> frozenset:
+    """
+    问题的单字与字符 n-gram 集合
+
+    正反问还原为肯定形式，规范化后的词项直接拼接 (与原问题中的空格、标点、停用词位置无关);
+    全部为停用词时返回空集
+    """
+    text = normalize_query(_A_NOT_A_RE.sub(r"\1", question)).replace(" ", "")
+    return frozenset(text).union(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def content_chars(items: frozenset) -> frozenset:
+    """shingles 中的单字 (即去停用词后的内容字)"""
+    return frozenset(item for item in items if len(item) == 1)
+
+
+def compatible(a: frozenset, b: frozenset) -> bool:
+    """
+    两组内容字是否允许复用回答: 相同，或一方只是多出若干非极性字
+
+    双方各有对方没有的字 (替换) 时不允许
+    """
+    if a == b:
+        return True
+    if (a - b) and (b - a):
+        return False
+    return not (a ^ b) & POLARITY_CHARS
+
+
+def _hash(shingle: str) -> int:
+    """稳定的 64 位哈希 (不受 PYTHONHASHSEED 影响)"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(items: frozenset) -> tuple:
+    """MinHash 签名 (NUM_PERM 个最小哈希值)"""
+    hashes = [_hash(item) for item in items]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PARAMS)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard 相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class SimilarHit:
+    """相似问题命中结果"""
+    question: str        # 命中的历史问题
+    similarity: float    # Jaccard 相似度
+    value: Any           # 缓存的回答
+
+
+@dataclass
+class _Entry:
+    scope: str
+    question: str
+    shingles: frozenset
+    chars: frozenset
+    bands: tuple
+    value: Any
+    expires: float
+
+
+class SimilarQuestionCache:
+    """相似问题缓存 (线程安全，有界 LRU，带 TTL)"""
+
+    def __init__(
+        self,
+        threshold: float = AI_SIMILAR_THRESHOLD,
+        maxsize: int = AI_SIMILAR_SIZE,
+        ttl: float = AI_SIMILAR_TTL,
+        bands: int = BANDS,
+    ):
+        """
+        Args:
+            threshold: 复用回答所需的最低 Jaccard 相似度
+            maxsize: 最多保留的问题数 (0 表示禁用)
+            ttl: 条目有效期 (秒)
+            bands: LSH 分段数 (须整除 NUM_PERM; 段数越多，候选越多、召回越高)
+        """
+        if NUM_PERM % bands:
+            raise ValueError(f"bands 须整除 {NUM_PERM}")
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._buckets: dict[tuple, set[int]] = {}
+        self._ids: dict[tuple, int] = {}     # (作用域, n-gram 集合) -> 条目 id
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.candidates = 0
+        self.latency = LatencyStats()
+
+    def _band_keys(self, scope: str, signature: tuple) -> tuple:
+        """签名按段切分得到的桶键 (含作用域)"""
+        rows = self.rows
+        return tuple(
+            (scope, i, signature[i * rows:(i + 1) * rows]) for i in range(self.bands)
+        )
+
+    def _remove(self, entry_id: int):
+        """删除条目及其桶索引 (调用方持有锁)"""
+        entry = self._entries.pop(entry_id)
+        del self._ids[(entry.scope, entry.shingles)]
+        for key in entry.bands:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def get(self, scope: str, question: str) -> Optional[SimilarHit]:
+        """
+        查找作用域内与问题足够相似的历史问题
+
+        Args:
+            scope: 作用域 (如模型 + 卦象 id，只在同一作用域内匹配)
+            question: 用户问题
+
+        Returns:
+            内容字兼容 (见 compatible)、最相似且不低于阈值的命中结果，没有则返回 None
+        """
+        if self.maxsize <= 0:
+            return None
+        start = time.perf_counter()
+        items = shingles(question)
+        chars = content_chars(items)
+        best = None
+        if items:
+            keys = self._band_keys(scope, minhash(items))
+            now = time.monotonic()
+            with self._lock:
+                ids = set()
+                for key in keys:
+                    ids.update(self._buckets.get(key, ()))
+                self.candidates += len(ids)
+                for entry_id in ids:
+                    entry = self._entries[entry_id]
+                    if entry.expires <= now:
+                        self._remove(entry_id)
+                        continue
+                    if not compatible(chars, entry.chars):
+                        continue
+                    similarity = jaccard(items, entry.shingles)
+                    if similarity >= self.threshold and (best is None or similarity > best[0]):
+                        best = (similarity, entry_id)
+                if best is not None:
+                    self._entries.move_to_end(best[1])
+                    entry = self._entries[best[1]]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        else:
+            with self._lock:
+                self.misses += 1
+        self.latency.record(time.perf_counter() - start)
+        if best is None:
+            return None
+        return SimilarHit(question=entry.question, similarity=best[0], value=entry.value)
+
+    def put(self, scope: str, question: str, value: Any):
+        """
+        记录问题及其回答 (全部为停用词的问题不记录)，超出容量时淘汰最久未使用的条目;
+        作用域内规范化后相同的问题只保留最新的回答
+
+        Args:
+            scope: 作用域
+            question: 用户问题
+            value: 要复用的回答
+        """
+        if self.maxsize <= 0:
+            return
+        items = shingles(question)
+        if not items:
+            return
+        keys = self._band_keys(scope, minhash(items))
+        with self._lock:
+            previous = self._ids.get((scope, items))
+            if previous is not None:
+                self._remove(previous)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(
+                scope, question, items, content_chars(items), keys, value,
+                time.monotonic() + self.ttl,
+            )
+            self._ids[(scope, items)] = entry_id
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """清空缓存与统计"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._ids.clear()
+            self.hits = 0
+            self.misses = 0
+            self.candidates = 0
+            self.latency = LatencyStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> dict:
+        """命中率、平均候选数与查找延迟"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "avg_candidates": self.candidates / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "threshold": self.threshold,
+                "lookup": self.latency.info(),
+            }
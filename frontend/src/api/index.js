@@ -22,16 +22,28 @@ export async function checkHealth() {
   return response.data;
 }
 
+/**
+ * 预取外应 (后台开始搜索，预测时携带凭证复用结果)
+ * @param {string} question - 问题
+ * @returns {Promise<{token: string, expires_in: number}>}
+ */
+export async function prefetchContext(question) {
+  const response = await api.post("/context/prefetch", { question });
+  return response.data;
+}
+
 /**
  * 简单版预测 (梅花易数)
  * @param {number[]} nums - 三个数字
  * @param {string} question - 问题
+ * @param {string} [contextToken] - 外应预取凭证
  * @returns {Promise<Object>}
  */
-export async function predictSimple(nums, question) {
+export async function predictSimple(nums, question, contextToken = null) {
   const response = await api.post("/predict/simple", {
     nums,
     question,
+    context_token: contextToken,
   });
   return response.data;
 }
@@ -46,6 +58,7 @@ export async function predictSimple(nums, question) {
  * @param {string} params.gender - 性别 (male/female)
  * @param {number[]} params.nums - 三个数字
  * @param {string} params.question - 问题
+ * @param {string} [params.contextToken] - 外应预取凭证
  * @returns {Promise<Object>}
  */
 export async function predictDetailed(params) {
@@ -57,6 +70,7 @@ export async function predictDetailed(params) {
     gender: params.gender,
     nums: params.nums,
     question: params.question,
+    context_token: params.contextToken || null,
   });
   return response.data;
 }